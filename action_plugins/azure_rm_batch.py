@@ -0,0 +1,35 @@
+# Copyright (c) Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+
+
+class ActionModule(ActionBase):
+    '''
+    Run azure_rm_batch with the source of the module it batches, which is not shipped with it otherwise.
+    '''
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_args = self._task.args.copy()
+        name = module_args.get('module')
+        if not name:
+            result.update(failed=True, msg="missing required arguments: module")
+            return result
+
+        path = self._shared_loader_obj.module_loader.find_plugin(name, mod_type='.py')
+        if not path:
+            result.update(failed=True, msg="Could not find module {0}".format(name))
+            return result
+        with open(path, 'rb') as f:
+            module_args['module_source'] = to_text(f.read())
+
+        result.update(self._execute_module(module_name='azure_rm_batch', module_args=module_args, task_vars=task_vars))
+        return result
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+
+class ModuleDocFragment(object):
+
+    # Azure info modules doc fragment
+    DOCUMENTATION = r'''
+options:
+    cache_ttl:
+        description:
+            - Reuse the result of an earlier run of this module with the same arguments for this many seconds.
+            - Results are kept in C(~/.azure/ansible_info_cache.sqlite), only readable by the user, and dropped early when a module
+              changes resources of the same type.
+            - Results holding secrets, such as keys, passwords or connection strings, are not cached.
+        type: int
+        version_added: "2.10"
+    '''
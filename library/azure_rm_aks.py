@@ -715,9 +715,7 @@ class AzureRMManagedCluster(AzureRMModuleBase):
 
     def update_aks_tags(self):
         try:
-            poller = self.managedcluster_client.managed_clusters.update_tags(self.resource_group, self.name, self.tags)
-            response = self.get_poller_result(poller)
-            return response.tags
+            return self.patch_tags_at_scope(self.results['id'], self.results['tags'], 'replace')
         except CloudError as exc:
             self.fail("Error attempting to update AKS tags: {0}".format(exc.message))
 
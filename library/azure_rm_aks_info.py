@@ -44,6 +44,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
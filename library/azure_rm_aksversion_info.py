@@ -34,6 +34,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+#
+# Copyright (c) Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: azure_rm_batch
+
+version_added: "2.10"
+
+short_description: Run an Azure module for many sets of arguments in one module process
+
+description:
+    - Run an Azure module once for every item of I(items), as C(loop) would, but in a single module process.
+    - The runs share the authentication and the management clients, and run concurrently, see I(max_workers).
+    - Results are returned in the order of I(items), in the format of a registered C(loop), so C(register) works as before.
+    - Requires the C(azure_rm_batch) action plugin of this role, which ships the source of I(module).
+
+options:
+    module:
+        description:
+            - Name of the Azure module to run, for example C(azure_rm_securitygroup).
+            - Only modules built on C(AzureRMModuleBase) are supported.
+        required: true
+        type: str
+    items:
+        description:
+            - List of arguments of I(module), one dict per run.
+            - Authentication options of this module are defaults for the items.
+        required: true
+        type: list
+    max_workers:
+        description:
+            - Maximum number of runs at the same time.
+        type: int
+        default: 8
+    module_source:
+        description:
+            - Source of I(module), set by the action plugin.
+        type: str
+
+extends_documentation_fragment:
+    - azure
+
+author:
+    - Ansible Project
+'''
+
+EXAMPLES = '''
+    - name: Create many network security groups in one module process
+      azure_rm_batch:
+        module: azure_rm_securitygroup
+        max_workers: 16
+        items: "{{ security_groups }}"
+      vars:
+        security_groups:
+          - resource_group: myResourceGroup
+            name: mySecurityGroup1
+          - resource_group: myResourceGroup
+            name: mySecurityGroup2
+      register: nsgs
+
+    - name: Get facts of two resource groups
+      azure_rm_batch:
+        module: azure_rm_resourcegroup_info
+        items:
+          - name: myResourceGroup
+          - name: myOtherResourceGroup
+'''
+
+RETURN = '''
+results:
+    description:
+        - Results of the runs of I(module), in the order of I(items).
+        - Each result has the item in C(item), as a result of C(loop) has.
+    returned: always
+    type: list
+    sample: [{"changed": false, "item": {"name": "myResourceGroup"}, "ansible_loop_var": "item", "resourcegroups": []}]
+msg:
+    description:
+        - Summary of the runs.
+    returned: always
+    type: str
+    sample: All items completed
+'''
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+
+# module_utils used by the batched modules, imported here so they are shipped with this module
+try:
+    from ansible.module_utils import azure_rm_common_ext, azure_rm_common_rest
+    from ansible.module_utils.common import dict_transformations
+    from ansible.module_utils import _text, six
+    from ansible.module_utils.six.moves.urllib import parse
+    from ansible.module_utils.network.common import utils
+    from ansible.module_utils.common import removed
+except ImportError:
+    # only needed by the modules using them
+    pass
+
+
+class AzureRMBatch(AzureRMModuleBase):
+
+    def __init__(self):
+
+        self.module_arg_spec = dict(
+            module=dict(type='str', required=True),
+            items=dict(type='list', required=True),
+            max_workers=dict(type='int', default=8),
+            module_source=dict(type='str', no_log=True)
+        )
+
+        self.results = dict(
+            changed=False,
+            results=[]
+        )
+
+        self.items = None
+        self.max_workers = None
+        self.module_source = None
+
+        super(AzureRMBatch, self).__init__(self.module_arg_spec,
+                                           supports_check_mode=True,
+                                           supports_tags=False)
+
+    def exec_module(self, **kwargs):
+
+        for key in ['items', 'max_workers', 'module_source']:
+            setattr(self, key, kwargs[key])
+        name = kwargs['module']
+
+        if not self.module_source:
+            self.fail("The source of {0} is missing, azure_rm_batch needs its action plugin".format(name))
+        for item in self.items:
+            if not isinstance(item, dict):
+                self.fail("Items must be dicts of arguments of {0}, not {1}".format(name, item))
+
+        main = self.load_main(name)
+        results = self.run_batch(main, name, self.items, self.max_workers)
+
+        self.results['results'] = results
+        self.results['changed'] = any(result.get('changed') for result in results)
+        if any(result.get('failed') for result in results):
+            self.fail("One or more items failed", **self.results)
+        self.results['msg'] = 'All items completed'
+        return self.results
+
+    def load_main(self, name):
+        namespace = dict(__name__=name, __file__=name + '.py')
+        try:
+            exec(compile(self.module_source, namespace['__file__'], 'exec'), namespace)
+        except Exception as exc:
+            self.fail("Error loading {0} - {1}".format(name, str(exc)))
+        if not any(isinstance(value, type) and issubclass(value, AzureRMModuleBase) and value.__module__ == name
+                   for value in namespace.values()):
+            self.fail("{0} is not built on AzureRMModuleBase and cannot be batched".format(name))
+        if not callable(namespace.get('main')):
+            self.fail("{0} has no main function".format(name))
+        return namespace['main']
+
+
+def main():
+    AzureRMBatch()
+
+
+if __name__ == '__main__':
+    main()
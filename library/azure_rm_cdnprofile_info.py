@@ -36,6 +36,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Hai Cao (@caohai)
@@ -78,6 +78,42 @@ options:
     description:
         - Time (in seconds) to wait between polls when waiting for deployment completion.
     default: 10
+  progress_file:
+    description:
+        - Path of a local file to which deployment progress is written while waiting for completion.
+        - One JSON document is written per line each time a deployment operation, including operations of nested deployments, changes state.
+        - The file is truncated at the start of every deployment.
+        - Only used if I(wait_for_deployment_completion=yes).
+    type: path
+    version_added: "2.10"
+  fail_fast:
+    description:
+        - Fail the task as soon as any deployment operation, including operations of nested deployments, reports a failure.
+        - The deployment itself is not cancelled and keeps running in Azure.
+        - Only used if I(wait_for_deployment_completion=yes).
+    type: bool
+    default: 'no'
+    version_added: "2.10"
+  force:
+    description:
+        - Submit the deployment even if it is unchanged since the last successful deployment.
+        - By default a hash of the inline I(template), the I(parameters), the I(deployment_mode), the I(location) and the I(tags) is
+          recorded on the deployment as the C(ansibleDeploymentHash) output. When the latest deployment named I(name) succeeded with
+          the same hash, nothing is submitted and the task reports no change.
+        - The C(ansibleDeploymentHash) output is not returned in I(outputs), but it is listed with the outputs of the deployment in Azure
+          and counts towards the limit of 64 outputs of a template. The task fails if the template has an output of that name.
+          For a template that already has 64 outputs, no hash is recorded and the deployment is always submitted.
+        - Deployments using I(template_link) or I(parameters_link) are always submitted, since the linked content is not known to the module.
+    type: bool
+    default: 'no'
+    version_added: "2.10"
+  return_instances:
+    description:
+        - Whether to resolve the virtual machines of the deployment and their public IP addresses into the I(instances) return value.
+        - Set to C(no) to skip listing the network interfaces and public IP addresses of the resource group after the deployment.
+    type: bool
+    default: 'yes'
+    version_added: "2.10"
   state:
     description:
         - If I(state=present), template will be created.
@@ -115,6 +151,16 @@ EXAMPLES = '''
     template_link: 'https://raw.githubusercontent.com/Azure/azure-quickstart-templates/master/101-vm-simple-linux/azuredeploy.json'
     parameters_link: 'https://raw.githubusercontent.com/Azure/azure-quickstart-templates/master/101-vm-simple-linux/azuredeploy.parameters.json'
 
+# Stream progress to a local file and stop waiting on the first failed operation
+- name: Create Azure Deploy
+  azure_rm_deployment:
+    resource_group: myResourceGroup
+    name: myDeployment
+    template_link: 'https://raw.githubusercontent.com/Azure/azure-quickstart-templates/master/101-vm-simple-linux/azuredeploy.json'
+    parameters_link: 'https://raw.githubusercontent.com/Azure/azure-quickstart-templates/master/101-vm-simple-linux/azuredeploy.parameters.json'
+    progress_file: /tmp/myDeployment.progress.jsonl
+    fail_fast: yes
+
 # Create or update a template deployment based on a uri to the template and parameters specified inline.
 # This deploys a VM with SSH support for a given public key, then stores the result in 'azure_vms'. The result is then
 # used to create a new host group. This host group is then used to wait for each instance to respond to the public IP SSH.
@@ -331,6 +377,7 @@ deployment:
         instances:
             description:
                 - Provides the public IP addresses for each VM instance.
+                - C(null) when I(return_instances=no).
             type: list
             returned: always
             contains:
@@ -401,8 +448,18 @@ deployment:
           type: complex
           returned: always
           sample: { "hostname": { "type": "String", "value": "myvirtualmachine.eastus2.cloudapp.azure.com" } }
+        template_hash:
+          description:
+              - Hash of the deployed template, parameters and settings.
+              - Only set for deployments of an inline template with inline parameters and fewer than 64 outputs.
+          type: str
+          returned: always
+          sample: 0cb8f2ef1cbd5b0d5dbc3a6f2f4cd62e4e0a2b4b51a9a7d2ff6e4d8b6a1f2b3c
+          version_added: "2.10"
 '''
 
+import hashlib
+import json
 import time
 
 try:
@@ -424,6 +481,11 @@ except ImportError:
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
+TERMINAL_STATES = ['Canceled', 'Failed', 'Deleted', 'Succeeded']
+HASH_OUTPUT = 'ansibleDeploymentHash'
+# maximum number of outputs of a template accepted by Azure Resource Manager
+MAX_TEMPLATE_OUTPUTS = 64
+
 
 class AzureRMDeploymentManager(AzureRMModuleBase):
 
@@ -440,7 +502,11 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
             location=dict(type='str', default="westus"),
             deployment_mode=dict(type='str', default='incremental', choices=['complete', 'incremental']),
             wait_for_deployment_completion=dict(type='bool', default=True),
-            wait_for_deployment_polling_period=dict(type='int', default=10)
+            wait_for_deployment_polling_period=dict(type='int', default=10),
+            progress_file=dict(type='path'),
+            fail_fast=dict(type='bool', default=False),
+            force=dict(type='bool', default=False),
+            return_instances=dict(type='bool', default=True)
         )
 
         mutually_exclusive = [('template', 'template_link'),
@@ -457,9 +523,20 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
         self.name = None
         self.wait_for_deployment_completion = None
         self.wait_for_deployment_polling_period = None
+        self.progress_file = None
+        self.fail_fast = None
+        self.force = None
+        self.return_instances = None
         self.tags = None
         self.append_tags = None
 
+        self._tracked_deployments = []
+        self._retiring_deployments = set()
+        self._high_water_marks = dict()
+        self._operation_states = dict()
+        self._failed_operations = []
+        self._progress = None
+
         self.results = dict(
             deployment=dict(),
             changed=False,
@@ -476,26 +553,48 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
             setattr(self, key, kwargs[key])
 
         if self.state == 'present':
-            deployment = self.deploy_template()
+            self.merge_resource_group_tags()
+            template_hash = self.template_hash()
+            if template_hash:
+                outputs = self.template.get('outputs') or dict()
+                if HASH_OUTPUT in outputs:
+                    self.fail("The template has an output named {0}, which is reserved for the hash of the deployment. "
+                              "Rename the output.".format(HASH_OUTPUT))
+                if len(outputs) >= MAX_TEMPLATE_OUTPUTS:
+                    self.module.warn("The template has {0} outputs, no room is left to record the hash of the deployment, "
+                                     "so it is always submitted.".format(len(outputs)))
+                    template_hash = None
+            deployment = None
+            if template_hash and not self.force:
+                deployment = self.get_unchanged_deployment(template_hash)
+            if deployment is None:
+                deployment = self.deploy_template(template_hash)
+                self.results['changed'] = True
+                self.results['msg'] = 'deployment succeeded'
+            else:
+                self.results['msg'] = 'deployment is up to date'
+
             if deployment is None:
                 self.results['deployment'] = dict(
                     name=self.name,
                     group_name=self.resource_group,
                     id=None,
                     outputs=None,
-                    instances=None
+                    instances=None,
+                    template_hash=template_hash
                 )
             else:
+                outputs = deployment.properties.outputs
+                if outputs and HASH_OUTPUT in outputs:
+                    outputs = dict((key, value) for key, value in outputs.items() if key != HASH_OUTPUT)
                 self.results['deployment'] = dict(
                     name=deployment.name,
                     group_name=self.resource_group,
                     id=deployment.id,
-                    outputs=deployment.properties.outputs,
-                    instances=self._get_instances(deployment)
+                    outputs=outputs,
+                    instances=self._get_instances(deployment) if self.return_instances else None,
+                    template_hash=template_hash
                 )
-
-            self.results['changed'] = True
-            self.results['msg'] = 'deployment succeeded'
         else:
             try:
                 if self.get_resource_group(self.resource_group):
@@ -508,12 +607,58 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
 
         return self.results
 
-    def deploy_template(self):
+    def merge_resource_group_tags(self):
+        if self.append_tags and self.tags:
+            try:
+                # fetch the RG directly (instead of using the base helper) since we don't want to exit if it's missing
+                rg = self.rm_client.resource_groups.get(self.resource_group)
+                if rg.tags:
+                    self.tags = dict(self.tags, **rg.tags)
+            except CloudError:
+                # resource group does not exist
+                pass
+
+    def template_hash(self):
+        """
+        Hash everything that is submitted for the deployment.
+
+        :return: hex digest, or None if the template or the parameters are linked
+        """
+        if self.template_link or self.parameters_link:
+            return None
+        canonical = json.dumps(dict(template=self.template,
+                                    parameters=self.parameters,
+                                    mode=self.deployment_mode,
+                                    location=self.location,
+                                    tags=self.tags),
+                               sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get_unchanged_deployment(self, template_hash):
+        """
+        Get the deployment if its latest run succeeded with the same hash.
+
+        :param template_hash: hash of the deployment to be submitted
+        :return: deployment or None
+        """
+        try:
+            deployment = self.rm_client.deployments.get(self.resource_group, self.name)
+        except CloudError:
+            # resource group or deployment does not exist
+            return None
+        properties = deployment.properties
+        if properties is None or properties.provisioning_state != 'Succeeded' or not properties.outputs:
+            return None
+        recorded = properties.outputs.get(HASH_OUTPUT) or dict()
+        if recorded.get('value') != template_hash:
+            return None
+        self.log("Deployment {0} is unchanged since its last successful run".format(self.name))
+        return deployment
+
+    def deploy_template(self, template_hash=None):
         """
         Deploy the targeted template and parameters
-        :param module: Ansible module containing the validated configuration for the deployment template
-        :param client: resource management client for azure
-        :param conn_info: connection info needed
+        :param template_hash: hash recorded as an output of an inline template
         :return:
         """
 
@@ -526,21 +671,15 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
             )
         if not self.template_link:
             deploy_parameter.template = self.template
+            if template_hash:
+                outputs = dict(self.template.get('outputs') or dict())
+                outputs[HASH_OUTPUT] = dict(type='string', value=template_hash)
+                deploy_parameter.template = dict(self.template, outputs=outputs)
         else:
             deploy_parameter.template_link = self.rm_models.TemplateLink(
                 uri=self.template_link
             )
 
-        if self.append_tags and self.tags:
-            try:
-                # fetch the RG directly (instead of using the base helper) since we don't want to exit if it's missing
-                rg = self.rm_client.resource_groups.get(self.resource_group)
-                if rg.tags:
-                    self.tags = dict(self.tags, **rg.tags)
-            except CloudError:
-                # resource group does not exist
-                pass
-
         params = self.rm_models.ResourceGroup(location=self.location, tags=self.tags)
 
         try:
@@ -555,20 +694,16 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
 
             deployment_result = None
             if self.wait_for_deployment_completion:
-                deployment_result = self.get_poller_result(result)
-                while deployment_result.properties is None or deployment_result.properties.provisioning_state not in ['Canceled', 'Failed', 'Deleted',
-                                                                                                                      'Succeeded']:
-                    time.sleep(self.wait_for_deployment_polling_period)
-                    deployment_result = self.rm_client.deployments.get(self.resource_group, self.name)
+                deployment_result = self.wait_for_deployment(result)
         except CloudError as exc:
-            failed_deployment_operations = self._get_failed_deployment_operations(self.name)
+            failed_deployment_operations = self._failed_operations or self._get_failed_deployment_operations(self.name)
             self.log("Deployment failed %s: %s" % (exc.status_code, exc.message))
             self.fail("Deployment failed with status code: %s and message: %s" % (exc.status_code, exc.message),
                       failed_deployment_operations=failed_deployment_operations)
 
         if self.wait_for_deployment_completion and deployment_result.properties.provisioning_state != 'Succeeded':
             self.log("provisioning state: %s" % deployment_result.properties.provisioning_state)
-            failed_deployment_operations = self._get_failed_deployment_operations(self.name)
+            failed_deployment_operations = self._failed_operations or self._get_failed_deployment_operations(self.name)
             self.fail('Deployment failed. Deployment id: %s' % deployment_result.id,
                       failed_deployment_operations=failed_deployment_operations)
 
@@ -588,62 +723,158 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
                 self.fail("Delete resource group and deploy failed with status code: %s and message: %s" %
                           (e.status_code, e.message))
 
-    def _get_failed_nested_operations(self, current_operations):
-        new_operations = []
-        for operation in current_operations:
-            if operation.properties.provisioning_state == 'Failed':
-                new_operations.append(operation)
-                if operation.properties.target_resource and \
-                   'Microsoft.Resources/deployments' in operation.properties.target_resource.id:
-                    nested_deployment = operation.properties.target_resource.resource_name
-                    try:
-                        nested_operations = self.rm_client.deployment_operations.list(self.resource_group,
-                                                                                      nested_deployment)
-                    except CloudError as exc:
-                        self.fail("List nested deployment operations failed with status code: %s and message: %s" %
-                                  (exc.status_code, exc.message))
-                    new_nested_operations = self._get_failed_nested_operations(nested_operations)
-                    new_operations += new_nested_operations
-        return new_operations
+    def wait_for_deployment(self, poller):
+        """
+        Wait for the deployment to reach a terminal state, following its operations as they progress.
+
+        Operations of the deployment and of every nested deployment found along the way are listed
+        on each poll. Nested deployments are listed concurrently and dropped once they finished.
+        :param poller: poller returned by deployments.create_or_update
+        :return: the deployment
+        """
+        self._tracked_deployments = [(self.resource_group, self.name)]
+        if self.progress_file:
+            try:
+                self._progress = open(self.progress_file, 'w')
+            except IOError as exc:
+                self.fail("Failed to open progress file {0}: {1}".format(self.progress_file, str(exc)))
+        try:
+            while True:
+                if not poller.done():
+                    poller.wait(timeout=self.wait_for_deployment_polling_period)
+                else:
+                    time.sleep(self.wait_for_deployment_polling_period)
+                deployment_result = self.rm_client.deployments.get(self.resource_group, self.name)
+                self._poll_deployment_operations()
+                if self.fail_fast and self._failed_operations:
+                    self.fail('Deployment operation failed. Deployment id: %s' % deployment_result.id,
+                              failed_deployment_operations=self._failed_operations)
+                if deployment_result.properties is not None and deployment_result.properties.provisioning_state in TERMINAL_STATES:
+                    return deployment_result
+        finally:
+            if self._progress:
+                self._progress.close()
+                self._progress = None
+
+    def _list_deployment_operations(self, deployment):
+        resource_group, name = deployment
+        return list(self.rm_client.deployment_operations.list(resource_group, name))
+
+    def _poll_deployment_operations(self):
+        """
+        List operations of the tracked deployments and record the ones that changed state since the last poll.
+
+        Every poll lists all operations of every tracked deployment: the API has no timestamp filter and does not
+        order operations, so listing cannot stop early. The newest operation timestamp seen is kept per deployment
+        as a high-water mark, and listed operations older than it are skipped without comparing their state.
+        """
+        deployments = list(self._tracked_deployments)
+        retiring = set(self._retiring_deployments)
+        listings = self.run_concurrently(self._list_deployment_operations, deployments)
+        for deployment, (operations, exc) in zip(deployments, listings):
+            if exc is not None:
+                # the operations of a freshly started nested deployment may not be available yet, try again on the next poll
+                self.log("List operations of deployment {0} failed: {1}".format(deployment[1], str(exc)))
+                continue
+            mark = self._high_water_marks.get(deployment)
+            for operation in operations:
+                timestamp = operation.properties.timestamp
+                if mark is not None and timestamp is not None and timestamp < mark:
+                    continue
+                if timestamp is not None and (self._high_water_marks.get(deployment) is None or timestamp > self._high_water_marks[deployment]):
+                    self._high_water_marks[deployment] = timestamp
+                key = (deployment, operation.operation_id)
+                state = operation.properties.provisioning_state
+                if self._operation_states.get(key) == state:
+                    continue
+                self._operation_states[key] = state
+                self._record_operation(deployment, operation)
+                nested = self._nested_deployment(operation)
+                if nested:
+                    if nested not in self._tracked_deployments:
+                        self._tracked_deployments.append(nested)
+                    if state in TERMINAL_STATES:
+                        self._retiring_deployments.add(nested)
+            if deployment in retiring:
+                # listed once more after its parent operation finished, nothing left to follow
+                self._tracked_deployments.remove(deployment)
+                self._retiring_deployments.discard(deployment)
+
+    def _record_operation(self, deployment, operation):
+        entry = self._operation_to_dict(operation)
+        if operation.properties.provisioning_state == 'Failed':
+            self._failed_operations.append(entry)
+        if self._progress:
+            progress = dict(entry,
+                            deployment=deployment[1],
+                            timestamp=operation.properties.timestamp.isoformat() if operation.properties.timestamp else None)
+            self._progress.write(json.dumps(progress, default=str) + '\n')
+            self._progress.flush()
+        self.log("Deployment {0} operation {1} is {2}".format(deployment[1], operation.operation_id, operation.properties.provisioning_state))
+
+    @staticmethod
+    def _nested_deployment(operation):
+        target = operation.properties.target_resource
+        if target and target.id and 'Microsoft.Resources/deployments' in target.id:
+            return (target.id.split('/')[4], target.resource_name)
+        return None
+
+    @staticmethod
+    def _operation_to_dict(op):
+        return dict(
+            id=op.id,
+            operation_id=op.operation_id,
+            status_code=op.properties.status_code,
+            status_message=op.properties.status_message,
+            target_resource=dict(
+                id=op.properties.target_resource.id,
+                resource_name=op.properties.target_resource.resource_name,
+                resource_type=op.properties.target_resource.resource_type
+            ) if op.properties.target_resource else None,
+            provisioning_state=op.properties.provisioning_state,
+        )
 
     def _get_failed_deployment_operations(self, name):
-        results = []
-        # time.sleep(15) # there is a race condition between when we ask for deployment status and when the
-        #               # status is available.
+        """
+        Collect the failed operations of a deployment and of its failed nested deployments.
 
-        try:
-            operations = self.rm_client.deployment_operations.list(self.resource_group, name)
-        except CloudError as exc:
-            self.fail("Get deployment failed with status code: %s and message: %s" %
-                      (exc.status_code, exc.message))
-        try:
-            results = [
-                dict(
-                    id=op.id,
-                    operation_id=op.operation_id,
-                    status_code=op.properties.status_code,
-                    status_message=op.properties.status_message,
-                    target_resource=dict(
-                        id=op.properties.target_resource.id,
-                        resource_name=op.properties.target_resource.resource_name,
-                        resource_type=op.properties.target_resource.resource_type
-                    ) if op.properties.target_resource else None,
-                    provisioning_state=op.properties.provisioning_state,
-                )
-                for op in self._get_failed_nested_operations(operations)
-            ]
-        except Exception:
-            # If we fail here, the original error gets lost and user receives wrong error message/stacktrace
-            pass
+        Nested deployments are walked one level at a time, listing all deployments of a level concurrently.
+        """
+        results = []
+        level = [(self.resource_group, name)]
+        while level:
+            listings = self.run_concurrently(self._list_deployment_operations, level)
+            next_level = []
+            for deployment, (operations, exc) in zip(level, listings):
+                if exc is not None:
+                    if isinstance(exc, CloudError):
+                        self.fail("List deployment operations of %s failed with status code: %s and message: %s" %
+                                  (deployment[1], exc.status_code, exc.message))
+                    self.fail("List deployment operations of %s failed: %s" % (deployment[1], str(exc)))
+                for operation in operations:
+                    if operation.properties.provisioning_state != 'Failed':
+                        continue
+                    try:
+                        results.append(self._operation_to_dict(operation))
+                    except Exception:
+                        # If we fail here, the original error gets lost and user receives wrong error message/stacktrace
+                        continue
+                    nested = self._nested_deployment(operation)
+                    if nested:
+                        next_level.append(nested)
+            level = next_level
         self.log(dict(failed_deployment_operations=results), pretty_print=True)
         return results
 
     def _get_instances(self, deployment):
         dep_tree = self._build_hierarchy(deployment.properties.dependencies)
         vms = self._get_dependencies(dep_tree, resource_type="Microsoft.Compute/virtualMachines")
+        if not vms:
+            return []
         vms_and_nics = [(vm, self._get_dependencies(vm['children'], "Microsoft.Network/networkInterfaces"))
                         for vm in vms]
-        vms_and_ips = [(vm['dep'], self._nic_to_public_ips_instance(nics))
+        nic_index, ip_index = self._list_network_resources()
+        vms_and_ips = [(vm['dep'], self._nic_to_public_ips_instance(nics, nic_index, ip_index))
                        for vm, nics in vms_and_nics]
         return [dict(vm_name=vm.resource_name, ips=[self._get_ip_dict(ip)
                                                     for ip in ips]) for vm, ips in vms_and_ips if len(ips) > 0]
@@ -685,13 +916,34 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
             }
         return ip_dict
 
-    def _nic_to_public_ips_instance(self, nics):
-        return [self.network_client.public_ip_addresses.get(public_ip_id.split('/')[4], public_ip_id.split('/')[-1])
-                for nic_obj in (self.network_client.network_interfaces.get(self.resource_group,
-                                                                           nic['dep'].resource_name) for nic in nics)
-                for public_ip_id in [ip_conf_instance.public_ip_address.id
-                                     for ip_conf_instance in nic_obj.ip_configurations
-                                     if ip_conf_instance.public_ip_address]]
+    def _list_network_resources(self):
+        """
+        List the network interfaces and public IP addresses of the resource group once.
+
+        :return: network interfaces indexed by lower case name and public IP addresses indexed by lower case id
+        """
+        nic_index = dict((nic.name.lower(), nic) for nic in self.network_client.network_interfaces.list(self.resource_group))
+        ip_index = dict((ip.id.lower(), ip) for ip in self.network_client.public_ip_addresses.list(self.resource_group))
+        return nic_index, ip_index
+
+    def _nic_to_public_ips_instance(self, nics, nic_index, ip_index):
+        public_ips = []
+        for nic in nics:
+            name = nic['dep'].resource_name
+            nic_obj = nic_index.get(name.lower())
+            if nic_obj is None:
+                nic_obj = self.network_client.network_interfaces.get(self.resource_group, name)
+            for ip_conf_instance in nic_obj.ip_configurations or []:
+                if not ip_conf_instance.public_ip_address:
+                    continue
+                public_ip_id = ip_conf_instance.public_ip_address.id
+                public_ip = ip_index.get(public_ip_id.lower())
+                if public_ip is None:
+                    # public IP address in another resource group
+                    public_ip = self.network_client.public_ip_addresses.get(public_ip_id.split('/')[4], public_ip_id.split('/')[-1])
+                    ip_index[public_ip_id.lower()] = public_ip
+                public_ips.append(public_ip)
+        return public_ips
 
 
 def main():
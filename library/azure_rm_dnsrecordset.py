@@ -35,10 +35,11 @@ options:
     relative_name:
         description:
             - Relative name of the record set.
-        required: true
+            - Required unless I(record_sets) is used.
     record_type:
         description:
             - The type of record set to create or delete.
+            - Required unless I(record_sets) is used.
         choices:
             - A
             - AAAA
@@ -50,7 +51,6 @@ options:
             - PTR
             - CAA
             - SOA
-        required: true
     record_mode:
         description:
             - Whether existing record values not sent to the module should be purged.
@@ -88,6 +88,55 @@ options:
             entry:
                 description:
                     - Primary data value for all record types.
+    record_sets:
+        description:
+            - List of record sets to manage in a single task, instead of I(relative_name), I(record_type) and I(records).
+            - The zone is listed once, the differences are computed locally and only the changed record sets are
+              written, concurrently and guarded by their etags.
+            - I(time_to_live) and I(record_mode) are used for items that do not set them.
+        type: list
+        version_added: "2.10"
+        suboptions:
+            relative_name:
+                description:
+                    - Relative name of the record set.
+                required: true
+            record_type:
+                description:
+                    - The type of the record set, one of the I(record_type) choices.
+                required: true
+            state:
+                description:
+                    - Assert the state of the record set.
+                default: present
+                choices:
+                    - absent
+                    - present
+            time_to_live:
+                description:
+                    - Time to live of the record set in seconds.
+            record_mode:
+                description:
+                    - Whether existing record values not listed should be purged.
+                choices:
+                    - append
+                    - purge
+            records:
+                description:
+                    - List of records, same format as I(records).
+    purge_record_sets:
+        description:
+            - With I(record_sets), delete the record sets of the zone that are not listed.
+            - The SOA record set and the NS record set of the zone apex are never deleted.
+        type: bool
+        default: no
+        version_added: "2.10"
+    max_workers:
+        description:
+            - With I(record_sets), maximum number of record sets written concurrently.
+        type: int
+        default: 8
+        version_added: "2.10"
 
 extends_documentation_fragment:
     - azure
@@ -131,6 +180,23 @@ EXAMPLES = '''
     - { name: 'serverb', type: 'A', records: [ { entry: '10.10.10.30' }, { entry: '10.10.10.41' }] }
     - { name: 'serverc', type: 'A', records: [ { entry: '10.10.10.40' }, { entry: '10.10.10.41' }] }
 
+- name: manage many record sets of a zone in one task, deleting the unlisted ones
+  azure_rm_dnsrecordset:
+    resource_group: myResourceGroup
+    zone_name: testing.com
+    purge_record_sets: yes
+    record_sets:
+      - relative_name: servera
+        record_type: A
+        records:
+          - entry: 10.10.10.20
+      - relative_name: mail
+        record_type: MX
+        time_to_live: 600
+        records:
+          - entry: mail.testing.com
+            preference: 10
+
 - name: create SRV records in a new record set
   azure_rm_dnsrecordset:
     resource_group: myResourceGroup
@@ -166,6 +232,18 @@ EXAMPLES = '''
 '''
 
 RETURN = '''
+counts:
+    description:
+        - Number of record sets created, updated, deleted and left unchanged when I(record_sets) is used.
+    returned: when record_sets is set
+    type: dict
+    sample: { "created": 2, "updated": 1, "deleted": 0, "unchanged": 5997 }
+record_sets:
+    description:
+        - Record sets changed when I(record_sets) is used.
+    returned: when record_sets is set
+    type: list
+    sample: [ { "relative_name": "servera", "record_type": "A", "action": "updated" } ]
 state:
     description:
         - Current state of the DNS record set.
@@ -243,7 +321,7 @@ import sys
 
 from ansible.module_utils.basic import _load_params
 from ansible.module_utils.six import iteritems
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase, HAS_AZURE
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, HAS_AZURE, dns_record_set_type
 
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -322,17 +400,37 @@ class AzureRMRecordSet(AzureRMModuleBase):
 
         self.module_arg_spec = dict(
             resource_group=dict(type='str', required=True),
-            relative_name=dict(type='str', required=True),
+            relative_name=dict(type='str'),
             zone_name=dict(type='str', required=True),
-            record_type=dict(choices=RECORD_ARGSPECS.keys(), required=True, type='str'),
+            record_type=dict(choices=RECORD_ARGSPECS.keys(), type='str'),
             record_mode=dict(choices=['append', 'purge'], default='purge'),
             state=dict(choices=['present', 'absent'], default='present', type='str'),
             time_to_live=dict(type='int', default=3600),
-            records=dict(type='list', elements='dict')
+            records=dict(type='list', elements='dict'),
+            record_sets=dict(type='list', elements='dict', options=dict(
+                relative_name=dict(type='str', required=True),
+                record_type=dict(choices=RECORD_ARGSPECS.keys(), required=True, type='str'),
+                state=dict(choices=['present', 'absent'], default='present', type='str'),
+                time_to_live=dict(type='int'),
+                record_mode=dict(choices=['append', 'purge'], type='str'),
+                records=dict(type='list', elements='dict')
+            )),
+            purge_record_sets=dict(type='bool', default=False),
+            max_workers=dict(type='int', default=8)
         )
 
         required_if = [
-            ('state', 'present', ['records'])
+            ('state', 'present', ['records', 'record_sets'], True)
+        ]
+        mutually_exclusive = [
+            ('relative_name', 'record_sets'),
+            ('records', 'record_sets')
+        ]
+        required_one_of = [
+            ('relative_name', 'record_sets')
+        ]
+        required_together = [
+            ('relative_name', 'record_type')
         ]
 
         self.results = dict(
@@ -340,7 +438,9 @@ class AzureRMRecordSet(AzureRMModuleBase):
         )
 
         # first-pass arg validation so we can get the record type- skip exec_module
-        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True, skip_exec=True)
+        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, mutually_exclusive=mutually_exclusive,
+                                               required_one_of=required_one_of, required_together=required_together,
+                                               supports_check_mode=True, skip_exec=True)
 
         # look up the right subspec and metadata
         record_subspec = RECORD_ARGSPECS.get(self.module.params['record_type'])
@@ -356,9 +456,14 @@ class AzureRMRecordSet(AzureRMModuleBase):
         self.state = None
         self.time_to_live = None
         self.records = None
+        self.record_sets = None
+        self.purge_record_sets = None
+        self.max_workers = None
 
         # rerun validation and actually run the module this time
-        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True)
+        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, mutually_exclusive=mutually_exclusive,
+                                               required_one_of=required_one_of, required_together=required_together,
+                                               supports_check_mode=True)
 
     def exec_module(self, **kwargs):
         for key in self.module_arg_spec.keys():
@@ -368,6 +473,9 @@ class AzureRMRecordSet(AzureRMModuleBase):
         if not zone:
             self.fail('The zone {0} does not exist in the resource group {1}'.format(self.zone_name, self.resource_group))
 
+        if self.record_sets is not None:
+            return self.exec_record_sets()
+
         try:
             self.log('Fetching Record Set {0}'.format(self.relative_name))
             record_set = self.dns_client.record_sets.get(self.resource_group, self.zone_name, self.relative_name, self.record_type)
@@ -425,6 +533,90 @@ class AzureRMRecordSet(AzureRMModuleBase):
 
         return self.results
 
+    def exec_record_sets(self):
+        '''
+        Bulk mode: diff all listed record sets against a single listing of the zone and apply the changes concurrently.
+        '''
+        self.log('Listing record sets of zone {0}'.format(self.zone_name))
+        server_record_sets = dict()
+        try:
+            for record_set in self.dns_client.record_sets.list_by_dns_zone(self.resource_group, self.zone_name):
+                server_record_sets[(record_set.name.lower(), dns_record_set_type(record_set))] = record_set
+        except CloudError as exc:
+            self.fail("Error listing record sets of zone {0} - {1}".format(self.zone_name, exc.message or str(exc)))
+
+        changes = []
+        wanted = set()
+        unchanged = 0
+        for item in self.record_sets:
+            key = (item['relative_name'].lower(), item['record_type'])
+            wanted.add(key)
+            server_record_set = server_record_sets.get(key)
+            if item['state'] == 'absent':
+                if server_record_set:
+                    changes.append(dict(action='deleted', item=item, etag=server_record_set.etag))
+                continue
+
+            if item['records'] is None:
+                self.fail("records are required for record set {0} {1}".format(item['relative_name'], item['record_type']))
+            time_to_live = item['time_to_live'] if item['time_to_live'] is not None else self.time_to_live
+            records = [self.normalize_record(item['record_type'], x) for x in item['records']]
+            input_sdk_records = self.create_sdk_records(records, item['record_type'])
+            if not server_record_set:
+                changes.append(dict(action='created', item=item, etag=None,
+                                    record_set=self.create_record_set(item['record_type'], time_to_live, input_sdk_records)))
+                continue
+
+            server_records = getattr(server_record_set, RECORDSET_VALUE_MAP[item['record_type']]['attrname'])
+            input_sdk_records, changed = self.records_changed(input_sdk_records, server_records,
+                                                             record_type=item['record_type'],
+                                                             record_mode=item['record_mode'] or self.record_mode)
+            changed |= server_record_set.ttl != time_to_live
+            if changed:
+                changes.append(dict(action='updated', item=item, etag=server_record_set.etag,
+                                    record_set=self.create_record_set(item['record_type'], time_to_live, input_sdk_records)))
+            else:
+                unchanged += 1
+
+        if self.purge_record_sets:
+            for key, server_record_set in server_record_sets.items():
+                # never purge the zone's own SOA and NS record sets
+                if key in wanted or key[1] == 'SOA' or (key[1] == 'NS' and key[0] == '@'):
+                    continue
+                changes.append(dict(action='deleted', etag=server_record_set.etag,
+                                    item=dict(relative_name=server_record_set.name, record_type=key[1])))
+
+        self.results.update(self.apply_dns_record_set_changes(self.resource_group, self.zone_name, changes, unchanged,
+                                                              self.max_workers))
+        return self.results
+
+    def create_record_set(self, record_type, time_to_live, sdk_records):
+        record_type_metadata = RECORDSET_VALUE_MAP.get(record_type)
+        record_set_args = dict(ttl=time_to_live)
+        record_set_args[record_type_metadata['attrname']] = sdk_records if record_type_metadata['is_list'] else sdk_records[0]
+        return self.dns_models.RecordSet(**record_set_args)
+
+    def normalize_record(self, record_type, record):
+        '''
+        Validate a record of a record_sets item against its record type, the way suboptions validate records.
+        '''
+        result = dict()
+        for name, spec in RECORD_ARGSPECS[record_type].items():
+            value = record.get(name)
+            for alias in spec.get('aliases', []):
+                if value is None:
+                    value = record.get(alias)
+            if value is None:
+                if spec.get('required'):
+                    self.fail("missing required argument {0} in {1} record {2}".format(name, record_type, record))
+                continue
+            if spec['type'] in ('int', 'long'):
+                value = int(value)
+            elif spec['type'] == 'list' and not isinstance(value, list):
+                value = [value]
+            result[name] = value
+        return result
+
     def create_or_update(self, record_set):
         try:
             record_set = self.dns_client.record_sets.create_or_update(resource_group_name=self.resource_group,
@@ -454,22 +646,25 @@ class AzureRMRecordSet(AzureRMModuleBase):
         record_sdk_class = getattr(self.dns_models, record.get('classobj'))
         return [record_sdk_class(**x) for x in input_records]
 
-    def records_changed(self, input_records, server_records):
+    def records_changed(self, input_records, server_records, record_type=None, record_mode=None):
+        record_type = record_type or self.record_type
+        record_mode = record_mode or self.record_mode
+
         # ensure we're always comparing a list, even for the single-valued types
         if not isinstance(server_records, list):
-            server_records = [server_records]
+            server_records = [server_records] if server_records is not None else []
 
         input_set = set([self.module.jsonify(x.as_dict()) for x in input_records])
         server_set = set([self.module.jsonify(x.as_dict()) for x in server_records])
 
-        if self.record_mode == 'append':  # only a difference if the server set is missing something from the input set
+        if record_mode == 'append':  # only a difference if the server set is missing something from the input set
             input_set = server_set.union(input_set)
 
         # non-append mode; any difference in the sets is a change
         changed = input_set != server_set
 
         records = [self.module.from_json(x) for x in input_set]
-        return self.create_sdk_records(records, self.record_type), changed
+        return self.create_sdk_records(records, record_type), changed
 
     def recordset_to_dict(self, recordset):
         result = recordset.as_dict()
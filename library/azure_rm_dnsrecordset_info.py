@@ -38,7 +38,37 @@ options:
     top:
         description:
             - Limit the maximum number of record sets to return.
+            - Sent to the service as the page size, combine with I(max_pages) to read a zone in slices.
         type: int
+    fields:
+        description:
+            - Only return these fields of each record set, for example C(relative_name), C(record_type) and C(time_to_live).
+            - Records are only serialized when C(records) is one of the fields.
+        type: list
+        choices:
+            - id
+            - relative_name
+            - record_type
+            - records
+            - time_to_live
+            - fqdn
+            - provisioning_state
+        version_added: "2.10"
+    max_pages:
+        description:
+            - Stop listing after this many pages and return I(next_link) to continue from.
+        type: int
+        version_added: "2.10"
+    next_link:
+        description:
+            - Continue a listing from the I(next_link) returned by a previous run with I(max_pages).
+        type: str
+        version_added: "2.10"
+    dest:
+        description:
+            - Write the record sets to this file as JSON lines instead of returning them in I(dnsrecordsets).
+        type: path
+        version_added: "2.10"
 
 extends_documentation_fragment:
     - azure
@@ -65,9 +95,29 @@ EXAMPLES = '''
   azure_rm_dnsrecordset_info:
     resource_group: myResourceGroup
     zone_name: example.com
+- name: Get names and types of a large zone, 10 pages of 100 record sets at a time
+  azure_rm_dnsrecordset_info:
+    resource_group: myResourceGroup
+    zone_name: example.com
+    fields: [relative_name, record_type, time_to_live]
+    top: 100
+    max_pages: 10
+    next_link: "{{ previous_slice.next_link | default(omit) }}"
+  register: previous_slice
 '''
 
 RETURN = '''
+next_link:
+    description:
+        - Link to continue the listing from with I(next_link), when I(max_pages) stopped it before the last page.
+    returned: when max_pages is set
+    type: str
+count:
+    description:
+        - Number of record sets written to I(dest).
+    returned: when dest is set
+    type: int
+    sample: 6000
 azure_dnsrecordset:
     description:
         - List of record set dicts.
@@ -136,6 +186,8 @@ dnsrecordsets:
             sample: www.newzone.com
 '''
 
+import json
+
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -147,6 +199,8 @@ except Exception:
 
 AZURE_OBJECT_CLASS = 'RecordSet'
 
+RECORDSET_FIELDS = ['id', 'relative_name', 'record_type', 'records', 'time_to_live', 'fqdn', 'provisioning_state']
+
 
 RECORDSET_VALUE_MAP = dict(
     A='arecords',
@@ -173,7 +227,11 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
             resource_group=dict(type='str'),
             zone_name=dict(type='str'),
             record_type=dict(type='str'),
-            top=dict(type='int')
+            top=dict(type='int'),
+            fields=dict(type='list', choices=RECORDSET_FIELDS),
+            max_pages=dict(type='int'),
+            next_link=dict(type='str'),
+            dest=dict(type='path')
         )
 
         # store the results of the module operation
@@ -186,13 +244,18 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
         self.zone_name = None
         self.record_type = None
         self.top = None
+        self.fields = None
+        self.max_pages = None
+        self.next_link = None
+        self.dest = None
+        self.is_old_facts = False
 
         super(AzureRMRecordSetInfo, self).__init__(self.module_arg_spec)
 
     def exec_module(self, **kwargs):
 
-        is_old_facts = self.module._name == 'azure_rm_dnsrecordset_facts'
-        if is_old_facts:
+        self.is_old_facts = self.module._name == 'azure_rm_dnsrecordset_facts'
+        if self.is_old_facts:
             self.module.deprecate("The 'azure_rm_dnsrecordset_facts' module has been renamed to 'azure_rm_dnsrecordset_info'", version='2.13')
 
         for key in self.module_arg_spec:
@@ -207,29 +270,43 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
         if self.relative_name and not self.zone_name:
             self.fail("Parameter error: DNS Zone required when filtering by name or record type.")
 
-        results = []
-        # list the conditions for what to return based on input
-        if self.relative_name is not None:
-            # if there is a name listed, they want only facts about that specific Record Set itself
-            results = self.get_item()
-        elif self.record_type:
-            # else, they just want all the record sets of a specific type
-            results = self.list_type()
-        elif self.zone_name:
-            # if there is a zone name listed, then they want all the record sets in a zone
-            results = self.list_zone()
-
-        if is_old_facts:
+        self.raw_results = []
+        self.curated_results = []
+        self.count = 0
+        self.dest_file = None
+        if self.dest:
+            try:
+                self.dest_file = open(self.dest, 'w')
+            except (IOError, OSError) as exc:
+                self.fail("Failed to open {0} - {1}".format(self.dest, str(exc)))
+
+        try:
+            # list the conditions for what to return based on input
+            if self.relative_name is not None:
+                # if there is a name listed, they want only facts about that specific Record Set itself
+                self.get_item()
+            elif self.record_type:
+                # else, they just want all the record sets of a specific type
+                self.list_type()
+            elif self.zone_name:
+                # if there is a zone name listed, then they want all the record sets in a zone
+                self.list_zone()
+        finally:
+            if self.dest_file:
+                self.dest_file.close()
+
+        if self.is_old_facts:
             self.results['ansible_facts'] = {
-                'azure_dnsrecordset': self.serialize_list(results)
+                'azure_dnsrecordset': self.raw_results
             }
-        self.results['dnsrecordsets'] = self.curated_list(results)
+        self.results['dnsrecordsets'] = self.curated_results
+        if self.dest:
+            self.results['count'] = self.count
         return self.results
 
     def get_item(self):
         self.log('Get properties for {0}'.format(self.relative_name))
         item = None
-        results = []
 
         # try to get information for specific Record Set
         try:
@@ -237,8 +314,8 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
         except CloudError:
             pass
 
-        results = [item]
-        return results
+        if item:
+            self.add_item(item)
 
     def list_type(self):
         self.log('Lists the record sets of a specified type in a DNS zone')
@@ -247,10 +324,7 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
         except AzureHttpError as exc:
             self.fail("Failed to list for record type {0} - {1}".format(self.record_type, str(exc)))
 
-        results = []
-        for item in response:
-            results.append(item)
-        return results
+        self.read_pages(response, "Failed to list for record type {0}".format(self.record_type))
 
     def list_zone(self):
         self.log('Lists all record sets in a DNS zone')
@@ -259,31 +333,60 @@ class AzureRMRecordSetInfo(AzureRMModuleBase):
         except AzureHttpError as exc:
             self.fail("Failed to list for zone {0} - {1}".format(self.zone_name, str(exc)))
 
-        results = []
-        for item in response:
-            results.append(item)
-        return results
-
-    def serialize_list(self, raws):
-        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in raws] if raws else []
-
-    def curated_list(self, raws):
-        return [self.record_to_dict(item) for item in raws] if raws else []
+        self.read_pages(response, "Failed to list for zone {0}".format(self.zone_name))
+
+    def read_pages(self, response, error_msg):
+        '''
+        Walk a paged response page by page, curating each record set once as it arrives.
+        Stops after max_pages pages and returns the link of the next page in the results.
+        '''
+        if self.next_link:
+            # the paged response fetches its next page from next_link
+            response.next_link = self.next_link
+        pages = 0
+        try:
+            while not self.max_pages or pages < self.max_pages:
+                try:
+                    page = response.advance_page()
+                except StopIteration:
+                    break
+                pages += 1
+                for item in page:
+                    self.add_item(item)
+        except (CloudError, AzureHttpError) as exc:
+            self.fail("{0} - {1}".format(error_msg, str(exc)))
+        if self.max_pages:
+            self.results['next_link'] = response.next_link or None
+
+    def add_item(self, item):
+        if self.is_old_facts:
+            self.raw_results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
+        curated = self.record_to_dict(item)
+        if self.dest_file:
+            self.dest_file.write(json.dumps(curated) + '\n')
+        else:
+            self.curated_results.append(curated)
+        self.count += 1
 
     def record_to_dict(self, record):
         record_type = record.type[len('Microsoft.Network/dnszones/'):]
-        records = getattr(record, RECORDSET_VALUE_MAP.get(record_type))
-        if not isinstance(records, list):
-            records = [records]
-        return dict(
+        fields = self.fields or RECORDSET_FIELDS
+        result = dict(
             id=record.id,
             relative_name=record.name,
             record_type=record_type,
-            records=[x.as_dict() for x in records],
             time_to_live=record.ttl,
             fqdn=record.fqdn,
             provisioning_state=record.provisioning_state
         )
+        if 'records' in fields:
+            records = getattr(record, RECORDSET_VALUE_MAP.get(record_type))
+            if not isinstance(records, list):
+                records = [records]
+            result['records'] = [x.as_dict() for x in records]
+        if self.fields:
+            result = dict((key, result[key]) for key in self.fields)
+        return result
 
 
 def main():
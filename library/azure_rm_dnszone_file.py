@@ -0,0 +1,501 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: azure_rm_dnszone_file
+
+version_added: "2.10"
+
+short_description: Export and import Azure DNS zones as BIND zone files
+
+description:
+    - Export an Azure DNS zone to an RFC 1035 zone file, or import a zone file into an existing Azure DNS zone.
+    - Exports are written page by page while the zone is listed, so large zones are exported in constant memory.
+    - Imports diff the zone file against the live zone and only write the record sets that changed, on a bounded pool of workers.
+
+options:
+    resource_group:
+        description:
+            - Name of resource group.
+        required: true
+    zone_name:
+        description:
+            - Name of the existing DNS zone.
+        required: true
+        aliases:
+            - name
+    path:
+        description:
+            - Path of the zone file to write with I(operation=export) or to read with I(operation=import).
+        required: true
+        type: path
+    operation:
+        description:
+            - C(export) writes the zone to I(path). The file is only replaced when its content changes.
+            - C(import) applies the record sets of I(path) to the zone.
+        default: export
+        choices:
+            - export
+            - import
+    purge:
+        description:
+            - With I(operation=import), delete the record sets of the zone that are not in the zone file.
+        type: bool
+        default: no
+    time_to_live:
+        description:
+            - TTL used for imported records without a TTL when the zone file has no C($TTL) directive.
+        type: int
+        default: 3600
+    max_workers:
+        description:
+            - Maximum number of record sets written concurrently during import.
+        type: int
+        default: 8
+
+notes:
+    - Supported record types are A, AAAA, CAA, CNAME, MX, NS, PTR, SOA, SRV and TXT.
+    - The SOA record set and the NS record set of the zone apex are exported, but never imported or purged
+      because Azure DNS manages them.
+    - C($INCLUDE) directives are not supported.
+    - All records of a record set must have the same TTL, Azure DNS keeps one TTL per record set.
+
+extends_documentation_fragment:
+    - azure
+
+author:
+    - Ansible Project
+'''
+
+EXAMPLES = '''
+- name: Back up a zone to a zone file
+  azure_rm_dnszone_file:
+    resource_group: myResourceGroup
+    zone_name: contoso.com
+    path: /backup/contoso.com.zone
+
+- name: Restore a zone from a zone file, deleting record sets that are not in the file
+  azure_rm_dnszone_file:
+    resource_group: myResourceGroup
+    zone_name: contoso.com
+    path: /backup/contoso.com.zone
+    operation: import
+    purge: yes
+'''
+
+RETURN = '''
+path:
+    description:
+        - Path of the zone file.
+    returned: always
+    type: str
+    sample: /backup/contoso.com.zone
+record_set_count:
+    description:
+        - Number of record sets exported.
+    returned: when operation is export
+    type: int
+    sample: 6000
+counts:
+    description:
+        - Number of record sets created, updated, deleted and left unchanged by the import.
+    returned: when operation is import
+    type: dict
+    sample: { "created": 2, "updated": 1, "deleted": 0, "unchanged": 5997 }
+record_sets:
+    description:
+        - Record sets changed by the import.
+    returned: when operation is import
+    type: list
+    sample: [ { "relative_name": "www", "record_type": "A", "action": "updated" } ]
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.six import text_type
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, dns_record_set_type
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+
+# record type -> (record set attribute, SDK class, record fields in zone file order)
+RECORD_TYPES = dict(
+    A=('arecords', 'ARecord', ['ipv4_address']),
+    AAAA=('aaaa_records', 'AaaaRecord', ['ipv6_address']),
+    CAA=('caa_records', 'CaaRecord', ['flags', 'tag', 'value']),
+    CNAME=('cname_record', 'CnameRecord', ['cname']),
+    MX=('mx_records', 'MxRecord', ['preference', 'exchange']),
+    NS=('ns_records', 'NsRecord', ['nsdname']),
+    PTR=('ptr_records', 'PtrRecord', ['ptrdname']),
+    SOA=('soa_record', 'SoaRecord', ['host', 'email', 'serial_number', 'refresh_time', 'retry_time', 'expire_time', 'minimum_ttl']),
+    SRV=('srv_records', 'SrvRecord', ['priority', 'weight', 'port', 'target']),
+    TXT=('txt_records', 'TxtRecord', ['value'])
+)
+
+# fields holding domain names, written as absolute names in zone files
+NAME_FIELDS = ('cname', 'exchange', 'nsdname', 'ptrdname', 'target', 'host', 'email')
+INT_FIELDS = ('flags', 'preference', 'priority', 'weight', 'port', 'serial_number', 'refresh_time', 'retry_time',
+              'expire_time', 'minimum_ttl')
+
+TTL_UNITS = dict(s=1, m=60, h=3600, d=86400, w=604800)
+
+
+class QuotedString(text_type):
+    '''Zone file token that was written between double quotes.'''
+    pass
+
+
+def tokenize_zone_file(lines):
+    '''
+    Split zone file lines into logical records, joining parenthesized continuations and dropping comments.
+
+    :return: generator of (owner_omitted, tokens) tuples
+    '''
+    tokens = []
+    depth = 0
+    owner_omitted = False
+    for line in lines:
+        line = to_text(line).rstrip('\r\n')
+        if depth == 0:
+            tokens = []
+            owner_omitted = line[:1] in (' ', '\t')
+        i = 0
+        length = len(line)
+        while i < length:
+            char = line[i]
+            if char == ';':
+                break
+            elif char in ' \t':
+                i += 1
+            elif char == '(':
+                depth += 1
+                i += 1
+            elif char == ')':
+                depth -= 1
+                i += 1
+            elif char == '"':
+                i += 1
+                buf = []
+                while i < length and line[i] != '"':
+                    if line[i] == '\\' and i + 1 < length:
+                        i += 1
+                    buf.append(line[i])
+                    i += 1
+                tokens.append(QuotedString(''.join(buf)))
+                i += 1
+            else:
+                start = i
+                while i < length and line[i] not in ' \t;()"':
+                    i += 1
+                tokens.append(line[start:i])
+        if depth < 0:
+            raise ValueError('unbalanced parentheses in zone file')
+        if depth == 0 and tokens:
+            yield owner_omitted, tokens
+    if depth != 0:
+        raise ValueError('unbalanced parentheses in zone file')
+
+
+def is_ttl(token):
+    return not isinstance(token, QuotedString) and token[:1].isdigit()
+
+
+def parse_ttl(token):
+    if token.isdigit():
+        return int(token)
+    total = 0
+    number = ''
+    for char in token.lower():
+        if char.isdigit():
+            number += char
+        elif char in TTL_UNITS and number:
+            total += int(number) * TTL_UNITS[char]
+            number = ''
+        else:
+            raise ValueError('invalid TTL {0}'.format(token))
+    return total + int(number or 0)
+
+
+def absolute_name(name, origin):
+    if name == '@':
+        return origin
+    if name.endswith('.'):
+        return name
+    return name + '.' + origin
+
+
+def relative_name(name, origin, apex):
+    fqdn = absolute_name(name, origin).lower()
+    if fqdn == apex:
+        return '@'
+    if not fqdn.endswith('.' + apex):
+        raise ValueError('{0} is outside of zone {1}'.format(name, apex))
+    return absolute_name(name, origin)[:-len(apex) - 1]
+
+
+def parse_zone_file(lines, zone_name, default_ttl):
+    '''
+    Parse a zone file into record sets keyed by (lower case relative name, record type).
+    Record values use the field names of the Azure DNS SDK record classes.
+    '''
+    apex = zone_name.rstrip('.').lower() + '.'
+    origin = apex
+    ttl = default_ttl
+    owner = '@'
+    record_sets = OrderedDict()
+    for owner_omitted, tokens in tokenize_zone_file(lines):
+        directive = tokens[0].upper()
+        if directive == '$ORIGIN':
+            origin = absolute_name(tokens[1], origin)
+            continue
+        if directive == '$TTL':
+            ttl = parse_ttl(tokens[1])
+            continue
+        if directive.startswith('$'):
+            raise ValueError('unsupported zone file directive {0}'.format(tokens[0]))
+
+        if not owner_omitted:
+            owner = relative_name(tokens.pop(0), origin, apex)
+        record_ttl = ttl
+        # TTL and class may come in either order
+        while tokens and (is_ttl(tokens[0]) or tokens[0].upper() in ('IN', 'CH', 'HS')):
+            token = tokens.pop(0)
+            if is_ttl(token):
+                record_ttl = parse_ttl(token)
+        if not tokens:
+            raise ValueError('missing record type for {0}'.format(owner))
+        record_type = tokens.pop(0).upper()
+        if record_type not in RECORD_TYPES:
+            raise ValueError('unsupported record type {0} for {1}'.format(record_type, owner))
+
+        record = parse_rdata(record_type, tokens, origin)
+        record_set = record_sets.setdefault((owner.lower(), record_type),
+                                            dict(relative_name=owner, record_type=record_type, ttl=record_ttl, records=[]))
+        # Azure DNS keeps one TTL per record set
+        if record_set['ttl'] != record_ttl:
+            raise ValueError('conflicting TTLs {0} and {1} for the {2} records of {3}'.format(record_set['ttl'], record_ttl,
+                                                                                          record_type, owner))
+        record_set['records'].append(record)
+    return record_sets
+
+
+def parse_rdata(record_type, tokens, origin):
+    fields = RECORD_TYPES[record_type][2]
+    if record_type == 'TXT':
+        return dict(value=[to_text(token) for token in tokens])
+    if len(tokens) != len(fields):
+        raise ValueError('invalid {0} record data {1}'.format(record_type, ' '.join(tokens)))
+    record = dict()
+    for field, token in zip(fields, tokens):
+        if field in NAME_FIELDS:
+            # Azure DNS stores absolute names without the trailing dot
+            record[field] = to_text(absolute_name(token, origin).rstrip('.'))
+        elif field in INT_FIELDS:
+            # SOA timers accept TTL style units
+            record[field] = parse_ttl(token)
+        else:
+            record[field] = to_text(token)
+    return record
+
+
+def quote(value):
+    return u'"' + value.replace(u'\\', u'\\\\').replace(u'"', u'\\"') + u'"'
+
+
+def format_rdata(record_type, record):
+    fields = RECORD_TYPES[record_type][2]
+    if record_type == 'TXT':
+        return u' '.join(quote(value) for value in record.value or [])
+    values = []
+    for field in fields:
+        value = getattr(record, field)
+        if field in NAME_FIELDS:
+            value = value if value.endswith('.') else value + '.'
+        elif record_type == 'CAA' and field == 'value':
+            value = quote(value)
+        values.append(to_text(value))
+    return u' '.join(values)
+
+
+def record_set_records(record_set, record_type):
+    records = getattr(record_set, RECORD_TYPES[record_type][0])
+    if records is None:
+        return []
+    return records if isinstance(records, list) else [records]
+
+
+def is_managed_record_set(name, record_type):
+    # SOA and apex NS record sets are owned by Azure DNS
+    return record_type == 'SOA' or (record_type == 'NS' and name == '@')
+
+
+class AzureRMDnsZoneFile(AzureRMModuleBase):
+
+    def __init__(self):
+
+        self.module_arg_spec = dict(
+            resource_group=dict(type='str', required=True),
+            zone_name=dict(type='str', required=True, aliases=['name']),
+            path=dict(type='path', required=True),
+            operation=dict(type='str', default='export', choices=['export', 'import']),
+            purge=dict(type='bool', default=False),
+            time_to_live=dict(type='int', default=3600),
+            max_workers=dict(type='int', default=8)
+        )
+
+        self.resource_group = None
+        self.zone_name = None
+        self.path = None
+        self.operation = None
+        self.purge = None
+        self.time_to_live = None
+        self.max_workers = None
+
+        self.results = dict(
+            changed=False
+        )
+
+        super(AzureRMDnsZoneFile, self).__init__(self.module_arg_spec,
+                                                 supports_check_mode=True,
+                                                 supports_tags=False)
+
+    def exec_module(self, **kwargs):
+        for key in self.module_arg_spec.keys():
+            setattr(self, key, kwargs[key])
+
+        self.results['path'] = self.path
+
+        try:
+            self.dns_client.zones.get(self.resource_group, self.zone_name)
+        except CloudError:
+            self.fail('The zone {0} does not exist in the resource group {1}'.format(self.zone_name, self.resource_group))
+
+        if self.operation == 'export':
+            self.export_zone()
+        else:
+            self.import_zone()
+        return self.results
+
+    def list_record_sets(self):
+        try:
+            for record_set in self.dns_client.record_sets.list_by_dns_zone(self.resource_group, self.zone_name):
+                yield record_set
+        except CloudError as exc:
+            self.fail("Error listing record sets of zone {0} - {1}".format(self.zone_name, exc.message or str(exc)))
+
+    def export_zone(self):
+        '''
+        Write the zone to a temporary file while the record sets are paged in, then move it over path if it changed.
+        '''
+        dest_dir = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix='.azure_rm_dnszone_file')
+        digest = hashlib.sha1()
+        count = 0
+        try:
+            with os.fdopen(fd, 'wb') as zone_file:
+                def write(line):
+                    data = to_bytes(line + u'\n')
+                    digest.update(data)
+                    zone_file.write(data)
+
+                write(u'$ORIGIN {0}.'.format(to_text(self.zone_name).rstrip('.')))
+                for record_set in self.list_record_sets():
+                    record_type = dns_record_set_type(record_set)
+                    if record_type not in RECORD_TYPES:
+                        self.module.warn('Skipping unsupported record set {0} {1}'.format(record_set.name, record_type))
+                        continue
+                    for record in record_set_records(record_set, record_type):
+                        write(u'{0}\t{1}\tIN\t{2}\t{3}'.format(to_text(record_set.name), record_set.ttl, record_type,
+                                                              format_rdata(record_type, record)))
+                    count += 1
+
+            self.results['record_set_count'] = count
+            if not os.path.exists(self.path) or self.module.sha1(self.path) != digest.hexdigest():
+                self.results['changed'] = True
+                if not self.check_mode:
+                    self.module.atomic_move(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def import_zone(self):
+        try:
+            with open(self.path, 'rb') as zone_file:
+                wanted = parse_zone_file(zone_file, self.zone_name, self.time_to_live)
+        except (IOError, OSError) as exc:
+            self.fail("Failed to read zone file {0}: {1}".format(self.path, str(exc)))
+        except ValueError as exc:
+            self.fail("Failed to parse zone file {0}: {1}".format(self.path, str(exc)))
+
+        changes = []
+        unchanged = 0
+        for record_set in self.list_record_sets():
+            record_type = dns_record_set_type(record_set)
+            key = (record_set.name.lower(), record_type)
+            if is_managed_record_set(key[0], record_type) or record_type not in RECORD_TYPES:
+                wanted.pop(key, None)
+                continue
+            item = wanted.pop(key, None)
+            if item is None:
+                if self.purge:
+                    changes.append(dict(action='deleted', etag=record_set.etag,
+                                        item=dict(relative_name=record_set.name, record_type=record_type)))
+                continue
+            if self.record_set_changed(record_set, item):
+                changes.append(dict(action='updated', etag=record_set.etag, item=item, record_set=self.create_record_set(item)))
+            else:
+                unchanged += 1
+
+        # whatever is left does not exist in the zone yet
+        for key, item in wanted.items():
+            if not is_managed_record_set(key[0], key[1]):
+                changes.append(dict(action='created', etag=None, item=item, record_set=self.create_record_set(item)))
+
+        self.results.update(self.apply_dns_record_set_changes(self.resource_group, self.zone_name, changes, unchanged,
+                                                              self.max_workers))
+
+    def create_sdk_records(self, item):
+        record_class = getattr(self.dns_models, RECORD_TYPES[item['record_type']][1])
+        return [record_class(**record) for record in item['records']]
+
+    def record_set_changed(self, record_set, item):
+        if record_set.ttl != item['ttl']:
+            return True
+        input_set = set(json.dumps(x.as_dict(), sort_keys=True) for x in self.create_sdk_records(item))
+        server_set = set(json.dumps(x.as_dict(), sort_keys=True) for x in record_set_records(record_set, item['record_type']))
+        return input_set != server_set
+
+    def create_record_set(self, item):
+        attrname = RECORD_TYPES[item['record_type']][0]
+        records = self.create_sdk_records(item)
+        record_set_args = dict(ttl=item['ttl'])
+        record_set_args[attrname] = records if attrname.endswith('records') else records[0]
+        return self.dns_models.RecordSet(**record_set_args)
+
+
+def main():
+    AzureRMDnsZoneFile()
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Thomas Stringer (@trstringer)
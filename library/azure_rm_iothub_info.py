@@ -67,6 +67,7 @@ options:
         type: bool
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
@@ -44,6 +44,33 @@ options:
             - Set to true to show deleted keys. Set to False to show not deleted keys.
         type: bool
         default: false
+    max_versions:
+        description:
+            - Maximum number of key versions to return when I(version=all).
+            - When set, the newest versions are returned first and only that many versions are kept in memory.
+            - Key Vault does not return versions in order, so all versions are still listed.
+            - Must be a positive integer.
+        type: int
+        version_added: "2.10"
+    max_items:
+        description:
+            - Maximum number of keys to return when listing the keys of a vault.
+            - Listing stops as soon as this many matching keys have been read.
+            - Must be a positive integer.
+        type: int
+        version_added: "2.10"
+    max_results:
+        description:
+            - Page size requested from Key Vault when listing keys or key versions, at most 25.
+            - Must be a positive integer.
+        type: int
+        version_added: "2.10"
+    dest:
+        description:
+            - Write the keys to this file as JSON lines instead of returning them in I(keys).
+            - Use it to audit large vaults in constant memory.
+        type: path
+        version_added: "2.10"
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
@@ -79,6 +106,14 @@ EXAMPLES = '''
     azure_rm_keyvaultkey_info:
         vault_uri: "https://myVault.vault.azure.net"
 
+  - name: Stream the 100 newest versions of a key to a file
+    azure_rm_keyvaultkey_info:
+      vault_uri: "https://myVault.vault.azure.net"
+      name: myKey
+      version: all
+      max_versions: 100
+      dest: /tmp/myKey_versions.jsonl
+
   - name: List deleted keys in specific key vault
     azure_rm_keyvaultkey_info:
         vault_uri: "https://myVault.vault.azure.net"
@@ -86,6 +121,16 @@ EXAMPLES = '''
 '''
 
 RETURN = '''
+count:
+    description: Number of keys written to I(dest).
+    returned: when dest is set
+    type: int
+    sample: 120
+dest:
+    description: File the keys were written to.
+    returned: when dest is set
+    type: str
+    sample: /tmp/myKey_versions.jsonl
 keyvaults:
     description: List of keys in Azure Key Vault.
     returned: always
@@ -184,14 +229,12 @@ keyvaults:
 '''
 
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, select_keyvault_items
 
 try:
-    from azure.keyvault import KeyVaultClient, KeyVaultId, KeyVaultAuthentication, KeyId
+    from azure.keyvault import KeyVaultId, KeyId
     from azure.keyvault.models import KeyAttributes, JsonWebKey
-    from azure.common.credentials import ServicePrincipalCredentials
     from azure.keyvault.models.key_vault_error import KeyVaultErrorException
-    from msrestazure.azure_active_directory import MSIAuthentication
 except ImportError:
     # This is handled in azure_rm_common
     pass
@@ -264,7 +307,11 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
             name=dict(type='str'),
             vault_uri=dict(type='str', required=True),
             show_deleted_key=dict(type='bool', default=False),
-            tags=dict(type='list')
+            tags=dict(type='list'),
+            max_versions=dict(type='int'),
+            max_items=dict(type='int'),
+            max_results=dict(type='int'),
+            dest=dict(type='path')
         )
 
         self.vault_uri = None
@@ -272,6 +319,10 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
         self.version = None
         self.show_deleted_key = False
         self.tags = None
+        self.max_versions = None
+        self.max_items = None
+        self.max_results = None
+        self.dest = None
 
         self.results = dict(changed=False)
         self._client = None
@@ -287,6 +338,7 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
             if hasattr(self, key):
                 setattr(self, key, kwargs[key])
 
+        self.validate_positive(max_versions=self.max_versions, max_items=self.max_items, max_results=self.max_results)
         self._client = self.get_keyvault_client()
 
         if self.name:
@@ -305,35 +357,6 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
 
         return self.results
 
-    def get_keyvault_client(self):
-        try:
-            self.log("Get KeyVaultClient from MSI")
-            credentials = MSIAuthentication(resource='https://vault.azure.net')
-            return KeyVaultClient(credentials)
-        except Exception:
-            self.log("Get KeyVaultClient from service principal")
-
-        # Create KeyVault Client using KeyVault auth class and auth_callback
-        def auth_callback(server, resource, scope):
-            if self.credentials['client_id'] is None or self.credentials['secret'] is None:
-                self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
-
-            tenant = self.credentials.get('tenant')
-            if not self.credentials['tenant']:
-                tenant = "common"
-
-            authcredential = ServicePrincipalCredentials(
-                client_id=self.credentials['client_id'],
-                secret=self.credentials['secret'],
-                tenant=tenant,
-                cloud_environment=self._cloud_environment,
-                resource="https://vault.azure.net")
-
-            token = authcredential.token
-            return token['token_type'], token['access_token']
-
-        return KeyVaultClient(KeyVaultAuthentication(auth_callback))
-
     def get_key(self):
         '''
         Gets the properties of the specified key in key vault.
@@ -372,13 +395,13 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
         results = []
         try:
             response = self._client.get_key_versions(vault_base_url=self.vault_uri,
-                                                     key_name=self.name)
+                                                     key_name=self.name,
+                                                     maxresults=self.max_results)
             self.log("Response : {0}".format(response))
 
             if response:
-                for item in response:
-                    if self.has_tags(item.tags, self.tags):
-                        results.append(keyitem_to_dict(item))
+                items = (item for item in response if self.has_tags(item.tags, self.tags))
+                results = self.format_items(select_keyvault_items(items, max_versions=self.max_versions), keyitem_to_dict)
         except KeyVaultErrorException as e:
             self.log("Did not find key versions {0} : {1}.".format(self.name, str(e)))
         return results
@@ -393,17 +416,29 @@ class AzureRMKeyVaultKeyInfo(AzureRMModuleBase):
 
         results = []
         try:
-            response = self._client.get_keys(vault_base_url=self.vault_uri)
+            response = self._client.get_keys(vault_base_url=self.vault_uri, maxresults=self.max_results)
             self.log("Response : {0}".format(response))
 
             if response:
-                for item in response:
-                    if self.has_tags(item.tags, self.tags):
-                        results.append(keyitem_to_dict(item))
+                items = (item for item in response if self.has_tags(item.tags, self.tags))
+                # stops paging once max_items keys have been read
+                results = self.format_items(select_keyvault_items(items, max_items=self.max_items), keyitem_to_dict)
         except KeyVaultErrorException as e:
             self.log("Did not find key vault in current subscription {0}.".format(str(e)))
         return results
 
+    def format_items(self, items, to_dict):
+        '''
+        Converts key items to dictionaries, or streams them to dest as JSON lines.
+
+        :return: list of key dictionaries, empty when written to dest
+        '''
+        if not self.dest:
+            return [to_dict(item) for item in items]
+        self.results['count'] = self.write_json_lines(self.dest, items, to_dict)
+        self.results['dest'] = self.dest
+        return []
+
     def get_deleted_key(self):
         '''
         Gets the properties of the specified deleted key in key vault.
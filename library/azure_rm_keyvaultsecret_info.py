@@ -32,10 +32,33 @@ options:
         type: str
     version:
         description:
-            - secret version.       
+            - secret version.
+            - Set it to C(all) to list the versions of the secret, without their values.
         default: current (latest)
         type: str
-
+    tags:
+        description:
+            - Limit listed versions by providing a list of tags. Format tags as 'key' or 'key:value'.
+        type: list
+    max_versions:
+        description:
+            - Maximum number of secret versions to return when I(version=all).
+            - When set, the newest versions are returned first and only that many versions are kept in memory.
+            - Key Vault does not return versions in order, so all versions are still listed.
+            - Must be a positive integer.
+        type: int
+        version_added: "2.10"
+    max_results:
+        description:
+            - Page size requested from Key Vault when listing secret versions, at most 25.
+            - Must be a positive integer.
+        type: int
+        version_added: "2.10"
+    dest:
+        description:
+            - Write the versions listed with I(version=all) to this file as JSON lines instead of returning them.
+        type: path
+        version_added: "2.10"
 
 extends_documentation_fragment:
     - azure
@@ -53,16 +76,53 @@ EXAMPLES = '''
       vault_uri: "https://myVault.vault.azure.net"
       name: mysecret
       version: 12345
+
+  - name: List the 10 newest versions of specific secret
+    azure_rm_keyvaultsecret_info:
+      vault_uri: "https://myVault.vault.azure.net"
+      name: mysecret
+      version: all
+      max_versions: 10
+
+  - name: Write all versions of specific secret to a file
+    azure_rm_keyvaultsecret_info:
+      vault_uri: "https://myVault.vault.azure.net"
+      name: mysecret
+      version: all
+      dest: /tmp/mysecret_versions.jsonl
+'''
+
+RETURN = '''
+count:
+    description: Number of secret versions written to I(dest).
+    returned: when dest is set
+    type: int
+    sample: 120
+dest:
+    description: File the secret versions were written to.
+    returned: when dest is set
+    type: str
+    sample: /tmp/mysecret_versions.jsonl
+versions:
+    description:
+        - Versions of the secret, without their values, newest first when I(max_versions) is set.
+        - Empty when I(dest) is set.
+    returned: when version is all
+    type: list
+    sample: [{"id": "https://myVault.vault.azure.net/secrets/mysecret/12345", "version": "12345", "tags": {}}]
+secret:
+    description: The secret, with its value.
+    returned: when version is not all
+    type: dict
+    sample: {"id": "https://myVault.vault.azure.net/secrets/mysecret/12345", "version": "12345", "value": "mysecretvalue"}
 '''
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, select_keyvault_items
 
 try:
-    from azure.keyvault import KeyVaultClient, KeyVaultId, KeyVaultAuthentication, KeyId
+    from azure.keyvault import KeyVaultId, KeyId
     from azure.keyvault.models import KeyAttributes, JsonWebKey
-    from azure.common.credentials import ServicePrincipalCredentials
     from azure.keyvault.models.key_vault_error import KeyVaultErrorException
-    from msrestazure.azure_active_directory import MSIAuthentication
 except ImportError:
     # This is handled in azure_rm_common
     pass
@@ -85,6 +145,24 @@ def keyitem_to_dict(keyitem):
     )
 
 
+def secretitem_to_dict(secretitem):
+    return dict(
+        id=secretitem.id,
+        version=KeyVaultId.parse_secret_id(secretitem.id).version,
+        tags=secretitem.tags,
+        content_type=secretitem.content_type,
+        managed=secretitem.managed,
+        attributes=dict(
+            enabled=secretitem.attributes.enabled,
+            not_before=secretitem.attributes.not_before,
+            expires=secretitem.attributes.expires,
+            created=secretitem.attributes.created,
+            updated=secretitem.attributes.updated,
+            recovery_level=secretitem.attributes.recovery_level
+        )
+    )
+
+
 class AzureRMKeyVaultSecretInfo(AzureRMModuleBase):
 
     def __init__(self):
@@ -92,13 +170,19 @@ class AzureRMKeyVaultSecretInfo(AzureRMModuleBase):
             version=dict(type='str', default='current'),
             name=dict(type='str', required=True),
             vault_uri=dict(type='str', required=True),
-            tags=dict(type='list')
+            tags=dict(type='list'),
+            max_versions=dict(type='int'),
+            max_results=dict(type='int'),
+            dest=dict(type='path')
         )
 
         self.vault_uri = None
         self.name = None
         self.version = None
         self.tags = None
+        self.max_versions = None
+        self.max_results = None
+        self.dest = None
 
         self.results = dict(changed=False)
         self._client = None
@@ -114,47 +198,21 @@ class AzureRMKeyVaultSecretInfo(AzureRMModuleBase):
             if hasattr(self, key):
                 setattr(self, key, kwargs[key])
 
+        self.validate_positive(max_versions=self.max_versions, max_results=self.max_results)
         self._client = self.get_keyvault_client()
 
-        versions = self.get_secret_versions()
-        # self.results['versions'] = versions
+        if self.version == 'all':
+            self.results['versions'] = self.get_secret_versions()
+            return self.results
 
         if self.version == 'current':
-            self.version = versions[-1]
+            # an empty version reads the latest one, no need to walk the version history
+            self.version = ''
 
         secret = self.get_secret()
         self.results['secret'] = keyitem_to_dict(secret)
         return self.results
 
-    def get_keyvault_client(self):
-        try:
-            self.log("Get KeyVaultClient from MSI")
-            credentials = MSIAuthentication(resource='https://vault.azure.net')
-            return KeyVaultClient(credentials)
-        except Exception:
-            self.log("Get KeyVaultClient from service principal")
-
-        # Create KeyVault Client using KeyVault auth class and auth_callback
-        def auth_callback(server, resource, scope):
-            if self.credentials['client_id'] is None or self.credentials['secret'] is None:
-                self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
-
-            tenant = self.credentials.get('tenant')
-            if not self.credentials['tenant']:
-                tenant = "common"
-
-            authcredential = ServicePrincipalCredentials(
-                client_id=self.credentials['client_id'],
-                secret=self.credentials['secret'],
-                tenant=tenant,
-                cloud_environment=self._cloud_environment,
-                resource="https://vault.azure.net")
-
-            token = authcredential.token
-            return token['token_type'], token['access_token']
-
-        return KeyVaultClient(KeyVaultAuthentication(auth_callback))
-
     def get_secret(self):
         '''
         Gets the properties of the specified key in key vault.
@@ -175,24 +233,36 @@ class AzureRMKeyVaultSecretInfo(AzureRMModuleBase):
         '''
         Lists secret versions.
 
-        :return: deserialized versions of secrets, includes key identifier, attributes and tags
+        :return: deserialized versions of secrets, includes secret identifier, attributes and tags
         '''
         self.log("Get the secret versions {0}".format(self.name))
 
         versions = []
         try:
-            response = self._client.get_secret_versions(vault_base_url=self.vault_uri, secret_name=self.name)
+            response = self._client.get_secret_versions(vault_base_url=self.vault_uri, secret_name=self.name,
+                                                        maxresults=self.max_results)
 
             self.log("Response : {0}".format(response))
 
             if response:
-                for item in response:
-                    version = KeyVaultId.parse_secret_id(item.id).version
-                    versions.append(version)
+                items = (item for item in response if self.has_tags(item.tags, self.tags))
+                versions = self.format_items(select_keyvault_items(items, max_versions=self.max_versions))
         except KeyVaultErrorException as e:
             self.log("Did not find secret versions {0} : {1}.".format(self.name, str(e)))
         return versions
 
+    def format_items(self, items):
+        '''
+        Converts secret items to dictionaries, or streams them to dest as JSON lines.
+
+        :return: list of secret version dictionaries, empty when written to dest
+        '''
+        if not self.dest:
+            return [secretitem_to_dict(item) for item in items]
+        self.results['count'] = self.write_json_lines(self.dest, items, secretitem_to_dict)
+        self.results['dest'] = self.dest
+        return []
+
 
 def main():
     """Main execution"""
@@ -910,7 +910,7 @@ class AzureRMLoadBalancer(AzureRMModuleBase):
         self.results['changed'] = changed
 
         if self.state == 'present' and changed:
-            self.results['state'] = self.create_or_update_load_balancer(self.new_load_balancer).as_dict()
+            self.results['state'] = self.create_or_update_load_balancer(self.new_load_balancer, load_balancer).as_dict()
         elif self.state == 'absent' and changed:
             self.delete_load_balancer()
             self.results['state'] = None
@@ -940,12 +940,13 @@ class AzureRMLoadBalancer(AzureRMModuleBase):
         except CloudError as exc:
             self.fail("Error deleting loadbalancer {0} - {1}".format(self.name, str(exc)))
 
-    def create_or_update_load_balancer(self, param):
+    def create_or_update_load_balancer(self, param, existing=None):
         try:
-            poller = self.network_client.load_balancers.create_or_update(self.resource_group, self.name, param)
-            new_lb = self.get_poller_result(poller)
-            return new_lb
+            poller = self.network_client.load_balancers.create_or_update(self.resource_group, self.name, param,
+                                                                         custom_headers=self.if_match(existing))
+            return self.get_poller_result(poller)
         except CloudError as exc:
+            self.check_etag_conflict(exc)
             self.fail("Error creating or updating load balancer {0} - {1}".format(self.name, str(exc)))
 
     def object_assign(self, patch, origin):
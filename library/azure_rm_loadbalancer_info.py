@@ -37,6 +37,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Thomas Stringer (@trstringer)
@@ -48,6 +48,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
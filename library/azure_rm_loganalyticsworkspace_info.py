@@ -49,6 +49,7 @@ options:
             - Note this will cost one more network overhead for each workspace, expected slow response.
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
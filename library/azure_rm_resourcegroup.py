@@ -37,7 +37,38 @@ options:
     name:
         description:
             - Name of the resource group.
-        required: true
+            - Required unless I(names) or I(name_pattern) is set.
+    names:
+        description:
+            - Names of resource groups to delete.
+            - Only valid with I(state=absent). Names of resource groups that do not exist are ignored.
+            - All deletes are started at once and tracked together, see I(wait_timeout).
+        type: list
+        version_added: "2.10"
+    name_pattern:
+        description:
+            - Shell style pattern, for example C(ci-*), matched against the names of all resource groups of the subscription.
+            - The match ignores case, as resource group names do.
+            - Every matching resource group is deleted as with I(names).
+            - Only valid with I(state=absent).
+        version_added: "2.10"
+    force_deletion_types:
+        description:
+            - Resource types to force delete when deleting resource groups. Virtual machines and virtual machine scale sets
+              are then deleted without waiting for a graceful shutdown.
+            - Only used with I(state=absent).
+        type: list
+        choices:
+            - Microsoft.Compute/virtualMachines
+            - Microsoft.Compute/virtualMachineScaleSets
+        version_added: "2.10"
+    wait_timeout:
+        description:
+            - Time in seconds to wait for the deletes started for I(names) or I(name_pattern) to finish.
+            - Resource groups still being deleted when the time is up are reported with C(status=Deleting).
+        type: int
+        default: 3600
+        version_added: "2.10"
     state:
         description:
             - Assert the state of the resource group. Use C(present) to create or update and C(absent) to delete.
@@ -75,6 +106,15 @@ EXAMPLES = '''
         name: myResourceGroup
         force_delete_nonempty: yes
         state: absent
+
+    - name: Delete all CI resource groups at once, force deleting their virtual machines
+      azure_rm_resourcegroup:
+        name_pattern: ci-*
+        force_delete_nonempty: yes
+        force_deletion_types:
+          - Microsoft.Compute/virtualMachines
+          - Microsoft.Compute/virtualMachineScaleSets
+        state: absent
 '''
 RETURN = '''
 contains_resources:
@@ -122,14 +162,53 @@ state:
                     "delete": "on-exit",
                     "testing": "no"
                     }
+resource_groups:
+    description:
+        - Outcome of deleting the resource groups selected by I(names) or I(name_pattern).
+    returned: when I(names) or I(name_pattern) is set
+    type: complex
+    version_added: "2.10"
+    contains:
+        name:
+            description:
+                - The resource group name.
+            returned: always
+            type: str
+            sample: ci-1234
+        status:
+            description:
+                - C(Deleted), C(Failed), or C(Deleting) if the delete did not finish within I(wait_timeout).
+                - C(Absent) for resource groups of I(names) which do not exist.
+                - In check mode, C(Deleted) for the resource groups which would be deleted.
+            returned: always
+            type: str
+            sample: Deleted
+        duration:
+            description:
+                - Seconds between starting the delete and seeing it finish.
+            returned: when the delete finished
+            type: float
+            sample: 312.4
+        error:
+            description:
+                - Error message of a failed delete.
+            returned: when I(status=Failed)
+            type: str
 '''
 
+import fnmatch
+import time
+
 try:
     from msrestazure.azure_exceptions import CloudError
 except ImportError:
     pass
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase, normalize_location_name
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+
+# first api-version of resource group delete accepting forceDeletionTypes
+DELETE_API_VERSION = '2021-04-01'
 
 
 def resource_group_to_dict(rg):
@@ -146,17 +225,29 @@ class AzureRMResourceGroup(AzureRMModuleBase):
 
     def __init__(self):
         self.module_arg_spec = dict(
-            name=dict(type='str', required=True),
+            name=dict(type='str'),
+            names=dict(type='list'),
+            name_pattern=dict(type='str'),
             state=dict(type='str', default='present', choices=['present', 'absent']),
             location=dict(type='str'),
-            force_delete_nonempty=dict(type='bool', default=False, aliases=['force'])
+            force_delete_nonempty=dict(type='bool', default=False, aliases=['force']),
+            force_deletion_types=dict(type='list', choices=['Microsoft.Compute/virtualMachines', 'Microsoft.Compute/virtualMachineScaleSets']),
+            wait_timeout=dict(type='int', default=3600)
         )
 
+        mutually_exclusive = [('name', 'names', 'name_pattern')]
+        required_one_of = [('name', 'names', 'name_pattern')]
+
         self.name = None
+        self.names = None
+        self.name_pattern = None
+        self.force_deletion_types = None
+        self.wait_timeout = None
         self.state = None
         self.location = None
         self.tags = None
         self.force_delete_nonempty = None
+        self._rest_client = None
 
         self.results = dict(
             changed=False,
@@ -165,6 +256,8 @@ class AzureRMResourceGroup(AzureRMModuleBase):
         )
 
         super(AzureRMResourceGroup, self).__init__(self.module_arg_spec,
+                                                   mutually_exclusive=mutually_exclusive,
+                                                   required_one_of=required_one_of,
                                                    supports_check_mode=True,
                                                    supports_tags=True)
 
@@ -173,6 +266,11 @@ class AzureRMResourceGroup(AzureRMModuleBase):
         for key in list(self.module_arg_spec.keys()) + ['tags']:
             setattr(self, key, kwargs[key])
 
+        if self.names is not None or self.name_pattern:
+            if self.state != 'absent':
+                self.fail("Parameter error: names and name_pattern can only be used with state=absent.")
+            return self.delete_resource_groups()
+
         results = dict()
         changed = False
         rg = None
@@ -250,17 +348,104 @@ class AzureRMResourceGroup(AzureRMModuleBase):
         return resource_group_to_dict(result)
 
     def delete_resource_group(self):
-        try:
-            poller = self.rm_client.resource_groups.delete(self.name)
-            self.get_poller_result(poller)
-        except Exception as exc:
-            self.fail("Error delete resource group {0} - {1}".format(self.name, str(exc)))
+        if self.force_deletion_types:
+            operation = None
+            try:
+                operation = self.start_delete(self.name)
+                for operation in self.rest_client.wait_all([operation], self.wait_timeout):
+                    pass
+            except Exception as exc:
+                self.fail("Error delete resource group {0} - {1}".format(self.name, str(exc)))
+            if not operation.done or operation.error:
+                self.fail("Error delete resource group {0} - {1}".format(self.name, str(operation.error or 'timed out')))
+        else:
+            try:
+                poller = self.rm_client.resource_groups.delete(self.name)
+                self.get_poller_result(poller)
+            except Exception as exc:
+                self.fail("Error delete resource group {0} - {1}".format(self.name, str(exc)))
 
         # The delete operation doesn't return anything.
         # If we got here, assume all is good
         self.results['state']['status'] = 'Deleted'
         return True
 
+    def delete_resource_groups(self):
+        '''
+        Delete the resource groups selected by names or name_pattern, starting all deletes before waiting on any.
+        '''
+        try:
+            existing = [rg.name for rg in self.rm_client.resource_groups.list()]
+        except Exception as exc:
+            self.fail("Error listing resource groups - {0}".format(str(exc)))
+        absent = []
+        if self.name_pattern:
+            # resource group names are case insensitive, whatever the platform
+            names = [name for name in existing if fnmatch.fnmatchcase(name.lower(), self.name_pattern.lower())]
+        else:
+            existing = dict((name.lower(), name) for name in existing)
+            names = [existing[name.lower()] for name in self.names if name.lower() in existing]
+            absent = [name for name in self.names if name.lower() not in existing]
+
+        self.results['changed'] = len(names) > 0
+        self.results['resource_groups'] = [dict(name=name, status='Deleted') for name in names] + \
+            [dict(name=name, status='Absent') for name in absent]
+        if self.check_mode or not names:
+            return self.results
+
+        if not self.force_delete_nonempty:
+            listings = self.run_concurrently(self.first_resource, names)
+            errors = ["{0} - {1}".format(name, str(exc)) for name, (resource, exc) in zip(names, listings) if exc is not None]
+            if errors:
+                self.fail("Error checking for resources in resource groups {0}".format('; '.join(errors)))
+            nonempty = [name for name, (resource, exc) in zip(names, listings) if resource is not None]
+            if nonempty:
+                self.fail("Error removing resource groups {0}. Resources exist within the groups. "
+                          "Use `force_delete_nonempty` to force delete.".format(', '.join(nonempty)))
+
+        results = dict()
+        operations = []
+        for name in names:
+            results[name] = dict(name=name, status='Deleting')
+            try:
+                operations.append((name, time.time(), self.start_delete(name)))
+            except Exception as exc:
+                results[name].update(status='Failed', error=str(exc))
+
+        started = dict((id(operation), (name, start)) for name, start, operation in operations)
+        for operation in self.rest_client.wait_all([operation for name, start, operation in operations], self.wait_timeout):
+            name, start = started[id(operation)]
+            results[name]['duration'] = round(time.time() - start, 1)
+            if operation.error:
+                results[name].update(status='Failed', error=str(operation.error))
+            else:
+                results[name]['status'] = 'Deleted'
+            self.log("Resource group {0} {1} after {2}s".format(name, results[name]['status'], results[name]['duration']))
+
+        self.results['resource_groups'] = [results[name] for name in names] + [dict(name=name, status='Absent') for name in absent]
+        failed = [name for name in names if results[name]['status'] != 'Deleted']
+        if failed:
+            self.fail("Error deleting resource groups {0}".format(', '.join(failed)), **self.results)
+        return self.results
+
+    @property
+    def rest_client(self):
+        if not self._rest_client:
+            self._rest_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                         base_url=self._cloud_environment.endpoints.resource_manager)
+        return self._rest_client
+
+    def start_delete(self, name):
+        query_parameters = {'api-version': DELETE_API_VERSION}
+        if self.force_deletion_types:
+            query_parameters['forceDeletionTypes'] = ','.join(self.force_deletion_types)
+        url = '/subscriptions/{0}/resourcegroups/{1}'.format(self.subscription_id, name)
+        return self.rest_client.submit(url, 'DELETE', query_parameters, None, None, [200, 202, 204, 404])
+
+    def first_resource(self, name):
+        # runs on worker threads, errors are handled by the caller
+        return next(iter(self.rm_client.resources.list_by_resource_group(name, top=1)), None)
+
     def resources_exist(self):
         found = False
         try:
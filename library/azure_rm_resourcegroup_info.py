@@ -35,11 +35,35 @@ options:
     list_resources:
         description:
             - List all resources under the resource group.
-            - Note this will cost network overhead for each resource group. Suggest use this when I(name) set.
+            - Resource groups are listed concurrently, see I(max_workers). When more than 20 resource groups are returned,
+              the resources of the whole subscription are listed once instead and grouped by resource group.
         version_added: "2.8"
+    resource_filter:
+        description:
+            - OData filter passed as C($filter) when listing resources, for example C(resourceType eq 'Microsoft.Compute/virtualMachines').
+            - Only used with I(list_resources=yes).
+        version_added: "2.10"
+    expand:
+        description:
+            - Comma separated list of additional properties passed as C($expand) when listing resources, for example C(createdTime,changedTime).
+            - Only used with I(list_resources=yes).
+        version_added: "2.10"
+    top:
+        description:
+            - Maximum number of resources returned per resource group.
+            - Only used with I(list_resources=yes).
+        type: int
+        version_added: "2.10"
+    max_workers:
+        description:
+            - Maximum number of resource groups whose resources are listed concurrently.
+        type: int
+        default: 8
+        version_added: "2.10"
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Chris Houseknecht (@chouseknecht)
@@ -65,6 +89,14 @@ EXAMPLES = '''
       azure_rm_resourcegroup_info:
         name: myResourceGroup
         list_resources: yes
+
+    - name: Get the virtual machines of all resource groups tagged for testing
+      azure_rm_resourcegroup_info:
+        tags:
+          - testing
+        list_resources: yes
+        resource_filter: "resourceType eq 'Microsoft.Compute/virtualMachines'"
+        expand: createdTime
 '''
 RETURN = '''
 azure_resourcegroups:
@@ -130,6 +162,8 @@ azure_resourcegroups:
                     sample: { "tag": "value" }
 '''
 
+from itertools import islice
+
 try:
     from msrestazure.azure_exceptions import CloudError
 except Exception:
@@ -141,6 +175,9 @@ from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 AZURE_OBJECT_CLASS = 'ResourceGroup'
 
+# above this many resource groups, list the resources of the subscription once rather than per group
+SUBSCRIPTION_LIST_THRESHOLD = 20
+
 
 class AzureRMResourceGroupInfo(AzureRMModuleBase):
 
@@ -149,7 +186,11 @@ class AzureRMResourceGroupInfo(AzureRMModuleBase):
         self.module_arg_spec = dict(
             name=dict(type='str'),
             tags=dict(type='list'),
-            list_resources=dict(type='bool')
+            list_resources=dict(type='bool'),
+            resource_filter=dict(type='str'),
+            expand=dict(type='str'),
+            top=dict(type='int'),
+            max_workers=dict(type='int', default=8)
         )
 
         self.results = dict(
@@ -160,6 +201,10 @@ class AzureRMResourceGroupInfo(AzureRMModuleBase):
         self.name = None
         self.tags = None
         self.list_resources = None
+        self.resource_filter = None
+        self.expand = None
+        self.top = None
+        self.max_workers = None
 
         super(AzureRMResourceGroupInfo, self).__init__(self.module_arg_spec,
                                                        supports_tags=False,
@@ -179,8 +224,7 @@ class AzureRMResourceGroupInfo(AzureRMModuleBase):
             result = self.list_items()
 
         if self.list_resources:
-            for item in result:
-                item['resources'] = self.list_by_rg(item['name'])
+            self.add_resources(result)
 
         if is_old_facts:
             self.results['ansible_facts']['azure_resourcegroups'] = result
@@ -216,17 +260,38 @@ class AzureRMResourceGroupInfo(AzureRMModuleBase):
                 results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
         return results
 
+    def add_resources(self, groups):
+        if len(groups) > SUBSCRIPTION_LIST_THRESHOLD:
+            resources = self.list_all_resources(set(item['name'].lower() for item in groups))
+            for item in groups:
+                item['resources'] = resources.get(item['name'].lower(), [])
+            return
+
+        listings = self.run_concurrently(self.list_by_rg, [item['name'] for item in groups], self.max_workers)
+        for item, (resources, exc) in zip(groups, listings):
+            if exc is not None:
+                self.fail('Error when listing resources under resource group {0}: {1}'.format(item['name'], getattr(exc, 'message', None) or str(exc)))
+            item['resources'] = resources
+
     def list_by_rg(self, name):
-        self.log('List resources under resource group')
-        results = []
+        # runs on worker threads, errors are handled by the caller
+        self.log('List resources under resource group {0}'.format(name))
+        response = self.rm_client.resources.list_by_resource_group(name, filter=self.resource_filter, expand=self.expand, top=self.top)
+        return [item.as_dict() for item in islice(response, self.top)]
+
+    def list_all_resources(self, names):
+        self.log('List resources of the subscription')
+        results = dict()
         try:
-            response = self.rm_client.resources.list_by_resource_group(name)
-            while True:
-                results.append(response.next().as_dict())
-        except StopIteration:
-            pass
+            for item in self.rm_client.resources.list(filter=self.resource_filter, expand=self.expand):
+                name = item.id.split('/')[4].lower()
+                if name not in names:
+                    continue
+                resources = results.setdefault(name, [])
+                if self.top is None or len(resources) < self.top:
+                    resources.append(item.as_dict())
         except CloudError as exc:
-            self.fail('Error when listing resources under resource group {0}: {1}'.format(name, exc.message or str(exc)))
+            self.fail('Error when listing resources: {0}'.format(exc.message or str(exc)))
         return results
 
 
@@ -155,6 +155,7 @@ class AzureRMRoute(AzureRMModuleBase):
         self.next_hop_type = _snake_to_camel(self.next_hop_type, capitalize_first=True)
 
         result = self.get_route()
+        existing = result
         if self.state == 'absent' and result:
             changed = True
             if not self.check_mode:
@@ -178,17 +179,19 @@ class AzureRMRoute(AzureRMModuleBase):
                                                    next_hop_type=self.next_hop_type,
                                                    next_hop_ip_address=self.next_hop_ip_address)
                 if not self.check_mode:
-                    result = self.create_or_update_route(result)
+                    result = self.create_or_update_route(result, existing)
 
         self.results['id'] = result.id if result else None
         self.results['changed'] = changed
         return self.results
 
-    def create_or_update_route(self, param):
+    def create_or_update_route(self, param, existing=None):
         try:
-            poller = self.network_client.routes.create_or_update(self.resource_group, self.route_table_name, self.name, param)
+            poller = self.network_client.routes.create_or_update(self.resource_group, self.route_table_name, self.name, param,
+                                                                 custom_headers=self.if_match(existing))
             return self.get_poller_result(poller)
         except Exception as exc:
+            self.check_etag_conflict(exc)
             self.fail("Error creating or updating route {0} - {1}".format(self.name, str(exc)))
 
     def delete_route(self):
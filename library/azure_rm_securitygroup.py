@@ -51,6 +51,25 @@ options:
         description:
             - Name of the resource group the security group belongs to.
         required: true
+    rule_update_mode:
+        description:
+            - How rule changes are applied to an existing security group.
+            - C(full) updates the whole security group with all of its rules.
+            - C(incremental) only creates, updates or deletes the changed rules through the security rules API,
+              concurrently. Removed rules are deleted before the other rules are written.
+            - The whole security group is still updated when default rules or tags change, or when a changed rule
+              takes the priority of another changed rule, e.g. when two rules swap priorities.
+        default: full
+        choices:
+            - full
+            - incremental
+        version_added: "2.10"
+    max_workers:
+        description:
+            - Maximum number of rules written concurrently when I(rule_update_mode=incremental).
+        type: int
+        default: 4
+        version_added: "2.10"
     rules:
         description:
             - Set of rules shaping traffic flow to or from a subnet or NIC. Each rule is a dictionary.
@@ -204,6 +223,19 @@ EXAMPLES = '''
           testing: testing
           delete: on-exit
 
+# Update a single rule through the security rules sub-resource
+- azure_rm_securitygroup:
+      resource_group: myResourceGroup
+      name: mysecgroup
+      rule_update_mode: incremental
+      rules:
+          - name: DenySSH
+            protocol: Tcp
+            destination_port_range: 22-24
+            access: Deny
+            priority: 100
+            direction: Inbound
+
 # Delete security group
 - azure_rm_securitygroup:
       resource_group: myResourceGroup
@@ -442,25 +474,57 @@ def validate_rule(self, rule, rule_type=None):
         rule['destination_address_prefix'] = None
 
 
-def compare_rules_change(old_list, new_list, purge_list):
+def diff_rules(old_list, new_list, purge_list):
+    '''
+    Diff rules by name.
+
+    :return: tuple of the complete new rule list, the rules to create or update and the names of the rules to delete
+    '''
     old_list = old_list or []
     new_list = new_list or []
-    changed = False
+    new_by_name = dict()
+    for rule in new_list:
+        new_by_name.setdefault(to_native(rule['name']), rule)
 
+    old_names = set()
+    updated = []
+    removed = []
     for old_rule in old_list:
-        matched = next((x for x in new_list if x['name'] == old_rule['name']), [])
+        name = to_native(old_rule['name'])
+        old_names.add(name)
+        matched = new_by_name.get(name)
         if matched:  # if the new one is in the old list, check whether it is updated
-            changed = changed or compare_rules(old_rule, matched)
+            if compare_rules(old_rule, matched):
+                updated.append(matched)
         elif not purge_list:  # keep this rule
             new_list.append(old_rule)
         else:  # one rule is removed
-            changed = True
-    # Compare new list and old list is the same? here only compare names
-    if not changed:
-        new_names = [to_native(x['name']) for x in new_list]
-        old_names = [to_native(x['name']) for x in old_list]
-        changed = (set(new_names) != set(old_names))
-    return changed, new_list
+            removed.append(old_rule['name'])
+    # rules only in the new list are added
+    updated.extend(rule for name, rule in new_by_name.items() if name not in old_names)
+    return new_list, updated, removed
+
+
+def rule_priorities_conflict(old_list, updated):
+    '''
+    Whether a changed rule takes the priority another changed rule holds, e.g. two rules swapping priorities.
+    Such changes cannot be applied rule by rule, only by updating the whole security group.
+    '''
+    updated_names = set(to_native(rule['name']) for rule in updated)
+    held = dict()
+    for rule in old_list or []:
+        if to_native(rule['name']) in updated_names:
+            held[(str(rule.get('direction')).lower(), rule.get('priority'))] = to_native(rule['name'])
+    for rule in updated:
+        holder = held.get((str(rule.get('direction')).lower(), rule.get('priority')))
+        if holder is not None and holder != to_native(rule['name']):
+            return True
+    return False
+
+
+def compare_rules_change(old_list, new_list, purge_list):
+    new_list, updated, removed = diff_rules(old_list, new_list, purge_list)
+    return bool(updated or removed), new_list
 
 
 def compare_rules(old_rule, rule):
@@ -623,6 +687,8 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
             purge_rules=dict(type='bool', default=False),
             resource_group=dict(required=True, type='str'),
             rules=dict(type='list', elements='dict', options=rule_spec),
+            rule_update_mode=dict(type='str', default='full', choices=['full', 'incremental']),
+            max_workers=dict(type='int', default=4),
             state=dict(type='str', default='present', choices=['present', 'absent']),
         )
 
@@ -633,6 +699,8 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
         self.purge_rules = None
         self.resource_group = None
         self.rules = None
+        self.rule_update_mode = None
+        self.max_workers = None
         self.state = None
         self.tags = None
         self.nsg_models = None  # type: azure.mgmt.network.models
@@ -708,19 +776,24 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
             if update_tags:
                 changed = True
 
-            rule_changed, new_rule = compare_rules_change(results['rules'], self.rules, self.purge_rules)
-            if rule_changed:
-                changed = True
+            old_rules = results['rules']
+            new_rule, updated_rules, removed_rules = diff_rules(old_rules, self.rules, self.purge_rules)
+            rules_changed = bool(updated_rules or removed_rules)
+            if rules_changed:
                 results['rules'] = new_rule
-            rule_changed, new_rule = compare_rules_change(results['default_rules'], self.default_rules, self.purge_default_rules)
-            if rule_changed:
-                changed = True
+            default_rule_changed, new_rule = compare_rules_change(results['default_rules'], self.default_rules, self.purge_default_rules)
+            if default_rule_changed:
                 results['default_rules'] = new_rule
+            changed = update_tags or rules_changed or default_rule_changed
 
             self.results['changed'] = changed
             self.results['state'] = results
             if not self.check_mode and changed:
-                self.results['state'] = self.create_or_update(results)
+                if self.rule_update_mode == 'incremental' and not update_tags and not default_rule_changed \
+                        and not rule_priorities_conflict(old_rules, updated_rules):
+                    self.results['state'] = self.update_rules(updated_rules, removed_rules)
+                else:
+                    self.results['state'] = self.create_or_update(results)
 
         elif self.state == 'present' and changed:
             # create the security group
@@ -781,6 +854,40 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
             self.fail("Error creating/updating security group {0} - {1}".format(self.name, str(exc)))
         return create_network_security_group_dict(result)
 
+    def update_rules(self, updated_rules, removed_rules):
+        '''
+        Apply only the changed rules through the security rules sub-resource, instead of updating the whole group.
+
+        Removed rules are deleted before any rule is created or updated, so new rules can take their priorities.
+        '''
+        def delete(name):
+            poller = self.network_client.security_rules.delete(resource_group_name=self.resource_group,
+                                                               network_security_group_name=self.name,
+                                                               security_rule_name=name)
+            return self.get_poller_result(poller)
+
+        def create_or_update(rule):
+            poller = self.network_client.security_rules.create_or_update(resource_group_name=self.resource_group,
+                                                                         network_security_group_name=self.name,
+                                                                         security_rule_name=rule['name'],
+                                                                         security_rule_parameters=create_rule_instance(self, rule))
+            return self.get_poller_result(poller)
+
+        for func, items, names in ((delete, removed_rules, removed_rules),
+                                   (create_or_update, updated_rules, [rule['name'] for rule in updated_rules])):
+            errors = []
+            for name, (result, exc) in zip(names, self.run_concurrently(func, items, self.max_workers)):
+                if exc is not None:
+                    errors.append("{0} - {1}".format(name, str(exc)))
+            if errors:
+                self.fail("Error updating rules of security group {0} - {1}".format(self.name, '; '.join(errors)))
+
+        try:
+            nsg = self.network_client.network_security_groups.get(self.resource_group, self.name)
+        except CloudError as exc:
+            self.fail("Error getting security group {0} - {1}".format(self.name, str(exc)))
+        return create_network_security_group_dict(nsg)
+
     def delete(self):
         try:
             poller = self.network_client.network_security_groups.delete(resource_group_name=self.resource_group, network_security_group_name=self.name)
@@ -60,6 +60,7 @@ options:
         type: bool
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Yuwei Zhou (@yuwzho)
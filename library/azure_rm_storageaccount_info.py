@@ -53,6 +53,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Chris Houseknecht (@chouseknecht)
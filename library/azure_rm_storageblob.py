@@ -43,6 +43,15 @@ options:
             - block
             - page
         version_added: "2.5"
+    auth_mode:
+        description:
+            - How the blob client authenticates against the storage account.
+            - C(key) signs requests with the storage account access key.
+            - C(sas) signs requests with a short-lived account shared access signature derived from the key.
+        default: key
+        choices:
+            - key
+            - sas
     container:
         description:
             - Name of a blob container within the storage account.
@@ -201,6 +210,7 @@ class AzureRMStorageBlob(AzureRMModuleBase):
             storage_account_name=dict(required=True, type='str', aliases=['account_name', 'storage_account']),
             blob=dict(type='str', aliases=['blob_name']),
             blob_type=dict(type='str', default='block', choices=['block', 'page']),
+            auth_mode=dict(type='str', default='key', choices=['key', 'sas']),
             container=dict(required=True, type='str', aliases=['container_name']),
             dest=dict(type='path', aliases=['destination']),
             force=dict(type='bool', default=False),
@@ -224,6 +234,7 @@ class AzureRMStorageBlob(AzureRMModuleBase):
         self.blob = None
         self.blob_obj = None
         self.blob_type = None
+        self.auth_mode = None
         self.container = None
         self.container_obj = None
         self.dest = None
@@ -254,7 +265,8 @@ class AzureRMStorageBlob(AzureRMModuleBase):
 
         # add file path validation
 
-        self.blob_client = self.get_blob_client(self.resource_group, self.storage_account_name, self.blob_type)
+        self.blob_client = self.get_blob_client(self.resource_group, self.storage_account_name, self.blob_type,
+                                                auth_mode=self.auth_mode)
         self.container_obj = self.get_container()
 
         if self.blob is not None:
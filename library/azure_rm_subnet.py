@@ -313,6 +313,7 @@ class AzureRMSubnet(AzureRMModuleBase):
 
         if not self.check_mode:
 
+            existing = subnet
             if self.state == 'present' and changed:
                 if not subnet:
                     # create new subnet
@@ -342,7 +343,7 @@ class AzureRMSubnet(AzureRMModuleBase):
                     if results.get('service_endpoints') is not None:
                         subnet.service_endpoints = results['service_endpoints']
 
-                self.results['state'] = self.create_or_update_subnet(subnet)
+                self.results['state'] = self.create_or_update_subnet(subnet, existing)
             elif self.state == 'absent' and changed:
                 # delete subnet
                 self.delete_subnet()
@@ -352,14 +353,16 @@ class AzureRMSubnet(AzureRMModuleBase):
 
         return self.results
 
-    def create_or_update_subnet(self, subnet):
+    def create_or_update_subnet(self, subnet, existing=None):
         try:
             poller = self.network_client.subnets.create_or_update(self.resource_group,
                                                                   self.virtual_network_name,
                                                                   self.name,
-                                                                  subnet)
+                                                                  subnet,
+                                                                  custom_headers=self.if_match(existing))
             new_subnet = self.get_poller_result(poller)
         except Exception as exc:
+            self.check_etag_conflict(exc)
             self.fail("Error creating or updating subnet {0} - {1}".format(self.name, str(exc)))
         self.check_provisioning_state(new_subnet)
         return subnet_to_dict(new_subnet)
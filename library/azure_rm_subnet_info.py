@@ -36,6 +36,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Zim Kalinowski (@zikalino)
@@ -174,7 +175,7 @@ class AzureRMSubnetInfo(AzureRMModuleBase):
         self.resource_group = None
         self.virtual_network_name = None
         self.name = None
-        super(AzureRMSubnetInfo, self).__init__(self.module_arg_spec, supports_tags=False)
+        super(AzureRMSubnetInfo, self).__init__(self.module_arg_spec, supports_tags=False, facts_module=True)
 
     def exec_module(self, **kwargs):
         is_old_facts = self.module._name == 'azure_rm_subnet_facts'
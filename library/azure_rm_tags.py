@@ -0,0 +1,183 @@
+#!/usr/bin/python
+#
+# Copyright (c) Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: azure_rm_tags
+
+version_added: "2.10"
+
+short_description: Manage tags of many Azure subscriptions, resource groups and resources
+
+description:
+    - Merge, replace or delete tags of subscriptions, resource groups and resources with the Azure Tags API.
+    - Only the tags are updated, with one request per scope, the resources themselves are not updated.
+    - Scopes are updated concurrently, see I(max_workers).
+
+options:
+    scopes:
+        description:
+            - List of ids of the subscriptions, resource groups or resources to tag.
+            - "'/subscriptions/{subscriptionId}' for subscriptions."
+            - "'/subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}' for resource groups."
+            - "'/subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/{namespace}/{resourceType}/{resourceName}' for resources."
+        required: true
+        type: list
+    tags:
+        description:
+            - Dictionary of string:string pairs.
+            - With I(operation=delete), a tag with an empty value is deleted whatever its value.
+        required: true
+        type: dict
+    operation:
+        description:
+            - Use C(merge) to add I(tags) to the tags of every scope, updating tags with the same names.
+            - Use C(replace) to replace the tags of every scope with I(tags).
+            - Use C(delete) to delete I(tags) from the tags of every scope.
+        type: str
+        default: merge
+        choices:
+            - merge
+            - replace
+            - delete
+    max_workers:
+        description:
+            - Maximum number of scopes updated at the same time.
+        type: int
+        default: 8
+
+extends_documentation_fragment:
+    - azure
+
+author:
+    - Ansible Project
+'''
+
+EXAMPLES = '''
+    - name: Add tags to virtual machines
+      azure_rm_tags:
+        scopes:
+          - /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/myResourceGroup/providers/Microsoft.Compute/virtualMachines/myVM1
+          - /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/myResourceGroup/providers/Microsoft.Compute/virtualMachines/myVM2
+        tags:
+          env: production
+
+    - name: Replace the tags of all resources of a resource group
+      azure_rm_tags:
+        scopes: "{{ resources.resources | map(attribute='id') | list }}"
+        operation: replace
+        max_workers: 32
+        tags:
+          owner: myTeam
+
+    - name: Delete a tag from a resource group
+      azure_rm_tags:
+        scopes:
+          - /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/myResourceGroup
+        operation: delete
+        tags:
+          env: ''
+'''
+
+RETURN = '''
+scopes:
+    description:
+        - Results of the scopes, in the order of I(scopes).
+    returned: always
+    type: complex
+    contains:
+        scope:
+            description:
+                - Id of the subscription, resource group or resource.
+            returned: always
+            type: str
+            sample: /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/myResourceGroup
+        changed:
+            description:
+                - Whether the tags of the scope changed.
+            returned: always
+            type: bool
+            sample: true
+        tags:
+            description:
+                - Tags of the scope after the operation.
+            returned: when the scope did not fail
+            type: dict
+            sample: { "env": "production" }
+        failed:
+            description:
+                - Whether updating the tags of the scope failed.
+            returned: when the scope failed
+            type: bool
+            sample: true
+        msg:
+            description:
+                - Error of the scope.
+            returned: when the scope failed
+            type: str
+            sample: Error updating tags of /subscriptions/xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx/resourceGroups/myResourceGroup - Not found
+'''
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+
+
+class AzureRMTags(AzureRMModuleBase):
+
+    def __init__(self):
+
+        self.module_arg_spec = dict(
+            scopes=dict(type='list', required=True),
+            tags=dict(type='dict', required=True),
+            operation=dict(type='str', default='merge', choices=['merge', 'replace', 'delete']),
+            max_workers=dict(type='int', default=8)
+        )
+
+        self.results = dict(
+            changed=False,
+            scopes=[]
+        )
+
+        self.scopes = None
+        self.tags = None
+        self.operation = None
+        self.max_workers = None
+
+        super(AzureRMTags, self).__init__(self.module_arg_spec,
+                                          supports_check_mode=True,
+                                          supports_tags=False)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec.keys():
+            setattr(self, key, kwargs[key])
+
+        if self.operation != 'delete':
+            self.validate_tags(self.tags)
+
+        results = self.update_tags_at_scopes(self.scopes, self.tags, self.operation, self.max_workers)
+
+        self.results['scopes'] = results
+        self.results['changed'] = any(result['changed'] for result in results)
+        if any(result.get('failed') for result in results):
+            self.fail("Updating tags of one or more scopes failed", **self.results)
+        return self.results
+
+
+def main():
+    AzureRMTags()
+
+
+if __name__ == '__main__':
+    main()
@@ -39,6 +39,7 @@ options:
 
 extends_documentation_fragment:
     - azure
+    - azure_info_cache
 
 author:
     - Gustavo Muniz do Carmo (@gustavomcarmo)
@@ -266,6 +266,7 @@ class AzureRMVirtualNetwork(AzureRMModuleBase):
 
         changed = False
         results = dict()
+        vnet = None
 
         try:
             self.log('Fetching vnet {0}'.format(self.name))
@@ -362,18 +363,20 @@ class AzureRMVirtualNetwork(AzureRMModuleBase):
                         vnet_param.dhcp_options = self.network_models.DhcpOptions(
                             dns_servers=results['dns_servers']
                         )
-                    self.results['state'] = self.create_or_update_vnet(vnet_param)
+                    self.results['state'] = self.create_or_update_vnet(vnet_param, vnet)
             elif self.state == 'absent':
                 self.delete_virtual_network()
                 self.results['state']['status'] = 'Deleted'
 
         return self.results
 
-    def create_or_update_vnet(self, vnet):
+    def create_or_update_vnet(self, vnet, existing=None):
         try:
-            poller = self.network_client.virtual_networks.create_or_update(self.resource_group, self.name, vnet)
+            poller = self.network_client.virtual_networks.create_or_update(self.resource_group, self.name, vnet,
+                                                                           custom_headers=self.if_match(existing))
             new_vnet = self.get_poller_result(poller)
         except Exception as exc:
+            self.check_etag_conflict(exc)
             self.fail("Error creating or updating virtual network {0} - {1}".format(self.name, str(exc)))
         return virtual_network_to_dict(new_vnet)
 
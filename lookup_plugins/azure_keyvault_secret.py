@@ -16,8 +16,9 @@ DOCUMENTATION = """
       - When ansible host is MSI enabled Azure VM, user don't need provide any credential to access to Azure Key Vault.
     options:
         _terms:
-            description: Secret name, version can be included like secret_name/secret_version.
-            required: True
+            description:
+              - Secret name, version can be included like secret_name/secret_version.
+              - Not required when I(prefix) or I(all) is used.
         vault_url:
             description: Url of Azure Key Vault.
             required: True
@@ -27,12 +28,30 @@ DOCUMENTATION = """
             description: Secret of the service principal.
         tenant_id:
             description: Tenant id of service principal.
+        prefix:
+            description:
+              - Return the latest version of every secret whose name starts with this prefix.
+              - The secrets are listed once and fetched in parallel, the lookup returns a single dict of name to value.
+              - Disabled secrets are skipped.
+        all:
+            description:
+              - Return the latest version of every secret in the vault as a single dict of name to value.
+              - Disabled secrets are skipped.
+            type: bool
+            default: False
+        max_workers:
+            description: Maximum number of secrets fetched concurrently, capped at 32.
+            type: int
+            default: 8
     notes:
         - If version is not provided, this plugin will return the latest version of the secret.
         - If ansible is running on Azure Virtual Machine with MSI enabled, client_id, secret and tenant isn't required.
         - For enabling MSI on Azure VM, please refer to this doc https://docs.microsoft.com/en-us/azure/active-directory/managed-service-identity/
         - After enabling MSI on Azure VM, remember to grant access of the Key Vault to the VM by adding a new Acess Policy in Azure Portal.
         - If MSI is not enabled on ansible host, it's required to provide a valid service principal which has access to the key vault.
+        - The MSI endpoint is probed on the first lookup only, and the MSI token is cached and refreshed before it expires.
+        - Secret values are cached in process by vault url, name and version, so repeated lookups of the same secret
+          do not call Key Vault again.
 """
 
 EXAMPLE = """
@@ -48,6 +67,9 @@ EXAMPLE = """
     tenant: 'uvwxyz'
   debug: msg="the value of this secret is {{lookup('azure_keyvault_secret',secretname,vault_url=url, cliend_id=client_id, secret=secret, tenant_id=tenant)}}"
 
+- name: Look up all secrets starting with 'webapp-' in one call
+  debug: msg="{{ lookup('azure_keyvault_secret', vault_url='https://yourvault.vault.azure.net', prefix='webapp-') }}"
+
 # Example below creates an Azure Virtual Machine with SSH public key from key vault using 'azure_keyvault_secret' lookup plugin.
 - name: Create Azure VM
   hosts: localhost
@@ -85,10 +107,16 @@ from ansible.errors import AnsibleError, AnsibleParserError
 from ansible.plugins.lookup import LookupBase
 from ansible.utils.display import Display
 import requests
+import time
+from multiprocessing.pool import ThreadPool
 
 display = Display()
 
-TOKEN_ACQUIRED = False
+MSI_TOKEN_URL = 'http://169.254.169.254/metadata/identity/oauth2/token'
+# connect/read timeouts in seconds for the instance metadata service, off-Azure hosts fail fast on connect
+MSI_TIMEOUT = (2, 10)
+# refresh tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
 
 token_params = {
     'api-version': '2018-02-01',
@@ -97,78 +125,225 @@ token_params = {
 token_headers = {
     'Metadata': 'true'
 }
-token = None
-try:
-    token_res = requests.get('http://169.254.169.254/metadata/identity/oauth2/token', params=token_params, headers=token_headers)
-    token = token_res.json().get("access_token")
-    if token is not None:
-        TOKEN_ACQUIRED = True
-    else:
-        display.v('Successfully called MSI endpoint, but no token was available. Will use service principal if provided.')
-except requests.exceptions.RequestException:
-    display.v('Unable to fetch MSI token. Will use service principal if provided.')
-    TOKEN_ACQUIRED = False
 
+secret_params = {'api-version': '2016-10-01'}
+
+# default and upper bound of concurrent secret requests for a single lookup
+DEFAULT_MAX_WORKERS = 8
+MAX_WORKERS_LIMIT = 32
+REQUEST_TIMEOUT = (5, 30)
+
+# per process secret cache keyed by (vault_url, name, version), shared by all lookups of a run
+_secret_cache = {}
+_session = None
+_sp_clients = {}
 
+# per process MSI state, None until the first lookup decides whether MSI is usable
+_msi_available = None
+_msi_token = None
+_msi_token_expires_on = 0
 
-def lookup_secret_non_msi(terms, vault_url, kwargs):
-    import logging
-    logging.getLogger('msrestazure.azure_active_directory').addHandler(logging.NullHandler())
-    logging.getLogger('msrest.service_client').addHandler(logging.NullHandler())
 
+def _fetch_msi_token():
+    token_res = requests.get(MSI_TOKEN_URL, params=token_params, headers=token_headers, timeout=MSI_TIMEOUT)
+    token_json = token_res.json()
+    token = token_json.get('access_token')
     try:
-        from azure.common.credentials import ServicePrincipalCredentials
-        from azure.keyvault import KeyVaultClient
-        from msrest.exceptions import AuthenticationError, ClientRequestError
-        from azure.keyvault.models.key_vault_error import KeyVaultErrorException
-    except ImportError:
-        raise AnsibleError('The azure_keyvault_secret lookup plugin requires azure.keyvault and azure.common.credentials to be installed.')
+        expires_on = float(token_json.get('expires_on'))
+    except (TypeError, ValueError):
+        expires_on = time.time() + float(token_json.get('expires_in') or 0)
+    return token, expires_on
 
-    client_id = kwargs.pop('client_id', None)
-    secret = kwargs.pop('secret', None)
-    tenant_id = kwargs.pop('tenant_id', None)
+
+def get_msi_token():
+    '''
+    Return a cached MSI access token for Key Vault, or None when MSI is not available.
+    The metadata endpoint is only probed on first use, and the token is refreshed when it is about to expire.
+    '''
+    global _msi_available, _msi_token, _msi_token_expires_on
+
+    if _msi_available is False:
+        return None
+    if _msi_token is not None and _msi_token_expires_on - TOKEN_REFRESH_MARGIN > time.time():
+        return _msi_token
 
     try:
-        credentials = ServicePrincipalCredentials(
-            client_id=client_id,
-            secret=secret,
-            tenant=tenant_id
-        )
-        client = KeyVaultClient(credentials)
-    except AuthenticationError:
-        raise AnsibleError('Invalid credentials provided.')
-
-    ret = []
-    for term in terms:
+        token, expires_on = _fetch_msi_token()
+    except (requests.exceptions.RequestException, ValueError):
+        token, expires_on = None, 0
+        if _msi_available is None:
+            display.v('Unable to fetch MSI token. Will use service principal if provided.')
+    else:
+        if token is None and _msi_available is None:
+            display.v('Successfully called MSI endpoint, but no token was available. Will use service principal if provided.')
+
+    if _msi_available is None:
+        _msi_available = token is not None
+    elif token is None:
+        raise AnsibleError('Failed to refresh MSI token.')
+    _msi_token = token
+    _msi_token_expires_on = expires_on
+    return _msi_token
+
+
+class MSISecretFetcher(object):
+    '''
+    Reads secrets through the Key Vault REST API with an MSI token, sharing one pooled session.
+    '''
+
+    def __init__(self, vault_url, token):
+        self.vault_url = vault_url
+        self.headers = {'Authorization': 'Bearer ' + token}
+        self.session = get_session()
+
+    def get(self, name_version):
+        name, version = name_version
+        url = self.vault_url + '/secrets/' + name + ('/' + version if version else '')
+        try:
+            secret_res = self.session.get(url, params=secret_params, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            return secret_res.json()["value"]
+        except requests.exceptions.RequestException:
+            raise AnsibleError('Failed to fetch secret: ' + name + ' via MSI endpoint.')
+        except (KeyError, ValueError):
+            raise AnsibleError('Failed to fetch secret ' + name + '.')
+
+    def list_names(self):
+        names = []
+        url = self.vault_url + '/secrets'
+        params = dict(secret_params, maxresults=25)
+        while url:
+            try:
+                list_res = self.session.get(url, params=params, headers=self.headers, timeout=REQUEST_TIMEOUT).json()
+                # disabled secrets cannot be fetched
+                names.extend(item['id'].rstrip('/').split('/')[-1] for item in list_res['value']
+                             if (item.get('attributes') or {}).get('enabled') is not False)
+            except requests.exceptions.RequestException:
+                raise AnsibleError('Failed to list secrets via MSI endpoint.')
+            except (KeyError, ValueError):
+                raise AnsibleError('Failed to list secrets of ' + self.vault_url + '.')
+            # nextLink already carries the query string
+            url = list_res.get('nextLink')
+            params = None
+        return names
+
+
+class ServicePrincipalSecretFetcher(object):
+    '''
+    Reads secrets through KeyVaultClient authenticated with a service principal.
+    Clients are cached per process by client id and tenant.
+    '''
+
+    def __init__(self, vault_url, client_id, secret, tenant_id):
+        import logging
+        logging.getLogger('msrestazure.azure_active_directory').addHandler(logging.NullHandler())
+        logging.getLogger('msrest.service_client').addHandler(logging.NullHandler())
+
         try:
-            secret_val = client.get_secret(vault_url, term, '').value
-            ret.append(secret_val)
-        except ClientRequestError:
+            from azure.common.credentials import ServicePrincipalCredentials
+            from azure.keyvault import KeyVaultClient
+            from msrest.exceptions import AuthenticationError, ClientRequestError
+            from azure.keyvault.models.key_vault_error import KeyVaultErrorException
+        except ImportError:
+            raise AnsibleError('The azure_keyvault_secret lookup plugin requires azure.keyvault and azure.common.credentials to be installed.')
+
+        self.vault_url = vault_url
+        self.request_errors = (ClientRequestError, KeyVaultErrorException)
+        client_key = (client_id, tenant_id, secret)
+        self.client = _sp_clients.get(client_key)
+        if self.client is None:
+            try:
+                credentials = ServicePrincipalCredentials(
+                    client_id=client_id,
+                    secret=secret,
+                    tenant=tenant_id
+                )
+                self.client = _sp_clients[client_key] = KeyVaultClient(credentials)
+            except AuthenticationError:
+                raise AnsibleError('Invalid credentials provided.')
+
+    def get(self, name_version):
+        name, version = name_version
+        try:
+            return self.client.get_secret(self.vault_url, name, version).value
+        except self.request_errors[0]:
             raise AnsibleError('Error occurred in request')
-        except KeyVaultErrorException:
-            raise AnsibleError('Failed to fetch secret ' + term + '.')
-    return ret
+        except self.request_errors[1]:
+            raise AnsibleError('Failed to fetch secret ' + name + '.')
+
+    def list_names(self):
+        try:
+            # disabled secrets cannot be fetched
+            return [item.id.rstrip('/').split('/')[-1] for item in self.client.get_secrets(self.vault_url, maxresults=25)
+                    if item.attributes is None or item.attributes.enabled is not False]
+        except self.request_errors[0]:
+            raise AnsibleError('Error occurred in request')
+        except self.request_errors[1]:
+            raise AnsibleError('Failed to list secrets of ' + self.vault_url + '.')
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS_LIMIT)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+
+def split_term(term):
+    name, _, version = term.partition('/')
+    return name, version
+
+
+def resolve_secrets(vault_url, fetcher, name_versions, max_workers):
+    '''
+    Return secret values for a list of (name, version) tuples, fetching the ones not cached yet concurrently.
+    '''
+    missing = []
+    for name_version in name_versions:
+        if (vault_url,) + name_version not in _secret_cache and name_version not in missing:
+            missing.append(name_version)
+
+    if len(missing) == 1:
+        values = [fetcher.get(missing[0])]
+    elif missing:
+        pool = ThreadPool(max(1, min(max_workers, MAX_WORKERS_LIMIT, len(missing))))
+        try:
+            values = pool.map(fetcher.get, missing)
+        finally:
+            pool.close()
+            pool.join()
+    for name_version, value in zip(missing, values if missing else []):
+        _secret_cache[(vault_url,) + name_version] = value
+
+    return [_secret_cache[(vault_url,) + name_version] for name_version in name_versions]
 
 
 class LookupModule(LookupBase):
 
     def run(self, terms, variables, **kwargs):
 
-        ret = []
         vault_url = kwargs.pop('vault_url', None)
         if vault_url is None:
             raise AnsibleError('Failed to get valid vault url.')
-        if TOKEN_ACQUIRED:
-            secret_params = {'api-version': '2016-10-01'}
-            secret_headers = {'Authorization': 'Bearer ' + token}
-            for term in terms:
-                try:
-                    secret_res = requests.get(vault_url + '/secrets/' + term, params=secret_params, headers=secret_headers)
-                    ret.append(secret_res.json()["value"])
-                except requests.exceptions.RequestException:
-                    raise AnsibleError('Failed to fetch secret: ' + term + ' via MSI endpoint.')
-                except KeyError:
-                    raise AnsibleError('Failed to fetch secret ' + term + '.')
-            return ret
+        vault_url = vault_url.rstrip('/')
+        prefix = kwargs.pop('prefix', None)
+        all_secrets = kwargs.pop('all', False)
+        max_workers = int(kwargs.pop('max_workers', DEFAULT_MAX_WORKERS))
+
+        token = get_msi_token()
+        if token is not None:
+            fetcher = MSISecretFetcher(vault_url, token)
         else:
-            return lookup_secret_non_msi(terms, vault_url, kwargs)
+            fetcher = ServicePrincipalSecretFetcher(vault_url,
+                                                    kwargs.pop('client_id', None),
+                                                    kwargs.pop('secret', None),
+                                                    kwargs.pop('tenant_id', None))
+
+        if prefix is not None or all_secrets:
+            names = sorted(name for name in fetcher.list_names() if all_secrets or name.startswith(prefix))
+            values = resolve_secrets(vault_url, fetcher, [(name, '') for name in names], max_workers)
+            return [dict(zip(names, values))]
+
+        return resolve_secrets(vault_url, fetcher, [split_term(term) for term in terms], max_workers)
@@ -0,0 +1,365 @@
+# Copyright (c) Ansible Project
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Optional local broker which runs Azure modules in a warm process.
+
+Every module run otherwise imports the Azure SDKs and authenticates from scratch. The broker
+imports the SDKs and the role's module_utils once and keeps AzureRMAuth objects, with their
+tokens, per set of credentials. Each module run is handed to it over a Unix socket and runs
+in a process forked from the broker, so runs stay as isolated from each other as before.
+
+Start it on the host the modules run on, usually the controller, as the user running Ansible:
+
+    python module_utils/azure_rm_broker.py [--socket ~/.azure/ansible_broker.sock] [--idle-timeout 1800]
+
+Modules use the broker when its socket exists, AZURE_RM_BROKER sets another socket path and
+AZURE_RM_BROKER=off turns it off. When the broker is not running, or any module_util the module
+ships differs from the broker's, the module runs in its own process as usual.
+
+Only the AZURE_* variables and HOME of a module's environment, which select its credentials, are
+sent to the broker and set in the process running the module. Other variables, e.g. proxy settings,
+are the broker's own. Credentials are kept warm for modules whose AZURE_* variables and HOME are
+the same as the broker's, others authenticate in their own process.
+'''
+
+import json
+import os
+import socket
+import sys
+from hashlib import sha256
+from os.path import expanduser
+
+BROKER_ENV = 'AZURE_RM_BROKER'
+BROKER_SOCKET = expanduser('~/.azure/ansible_broker.sock')
+# changes whenever requests or responses change
+BROKER_PROTOCOL = 3
+BROKER_CONNECT_TIMEOUT = 1.0
+# AzureRMAuth objects are built again after this many seconds
+BROKER_AUTH_TTL = 1800
+
+
+def broker_socket_path():
+    '''
+    :return: path of the broker socket, or None when the broker is turned off
+    '''
+    path = os.environ.get(BROKER_ENV, BROKER_SOCKET)
+    if path.lower() in ('', '0', 'off', 'false', 'no'):
+        return None
+    return expanduser(path)
+
+
+def auth_environment(environ):
+    '''
+    Environment variables which, with the module parameters, select the credentials of a module run.
+    '''
+    return dict((key, value) for key, value in environ.items() if key.startswith('AZURE_') or key == 'HOME')
+
+
+def module_utils_digests(module_globals):
+    '''
+    Digests of the sources of the module_utils next to a module_util, given its globals, to tell whether
+    broker and module run the same module_utils.
+
+    :return: dict of digests by path relative to the module_utils directory, e.g. common/dict_transformations.py
+    '''
+    directory = os.path.dirname(module_globals['__file__'])
+    archive = getattr(module_globals.get('__loader__'), 'archive', None)
+    digests = dict()
+    if archive:
+        # AnsiballZ runs modules from a zip which holds the module_utils they import
+        import zipfile
+        prefix = os.path.relpath(directory, archive).replace(os.sep, '/') + '/'
+        with zipfile.ZipFile(archive) as payload:
+            for name in payload.namelist():
+                if name.startswith(prefix) and name.endswith('.py') and not name.endswith('__init__.py'):
+                    digests[name[len(prefix):]] = sha256(payload.read(name)).hexdigest()
+        return digests
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.py') and name != '__init__.py':
+                with open(os.path.join(root, name), 'rb') as f:
+                    path = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+                    digests[path] = sha256(f.read()).hexdigest()
+    return digests
+
+
+def _read_all(connection):
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _send(connection, message):
+    connection.sendall(json.dumps(message).encode('utf-8'))
+    connection.shutdown(socket.SHUT_WR)
+
+
+def run_in_broker(module_globals):
+    '''
+    Run the module of this process in the broker and exit with its result, if a broker is running.
+
+    Called by azure_rm_common while it is imported, before the SDK imports. Returns, so the module
+    runs in this process, when there is no broker or it cannot take the module.
+
+    :param module_globals: globals of azure_rm_common, to compare the module_utils next to it with the broker's
+    '''
+    path = broker_socket_path()
+    if not path or not os.path.exists(path):
+        return
+    from ansible.module_utils import basic
+    main = sys.modules.get('__main__')
+    # Python 2 has no __spec__, runpy sets __package__ to the package of the module there
+    spec = getattr(main, '__spec__', None)
+    name = spec.name if spec is not None else '{0}.'.format(getattr(main, '__package__', None))
+    # only modules started by Ansible, not plugins or scripts importing azure_rm_common
+    if basic._ANSIBLE_ARGS is None or not name.startswith('ansible.modules.'):
+        return
+    try:
+        args = basic._ANSIBLE_ARGS
+        request = dict(protocol=BROKER_PROTOCOL,
+                       digests=module_utils_digests(module_globals),
+                       file=main.__file__,
+                       source=main.__loader__.get_data(main.__file__).decode('utf-8'),
+                       args=args.decode('utf-8') if isinstance(args, bytes) else args,
+                       env=auth_environment(os.environ),
+                       cwd=os.getcwd())
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(BROKER_CONNECT_TIMEOUT)
+        connection.connect(path)
+        connection.settimeout(None)
+        _send(connection, request)
+    except Exception:
+        # no broker listening, e.g. a socket left behind
+        return
+    try:
+        response = json.loads(_read_all(connection).decode('utf-8'))
+    except Exception:
+        response = None
+    finally:
+        connection.close()
+    if response is None:
+        # the module may have run partly, so it is not run again here
+        print(json.dumps(dict(failed=True, msg='The Azure broker at {0} stopped before returning a result'.format(path))))
+        sys.exit(1)
+    if response.get('unavailable'):
+        return
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(response['rc'])
+
+
+class Broker(object):
+    '''
+    Server side of the broker: accepts module runs and forks a process per run.
+
+    :param path: path of the Unix socket
+    :param idle_timeout: seconds without requests after which the broker exits
+    :param max_workers: module runs at the same time, further requests wait
+    '''
+
+    def __init__(self, path, idle_timeout=1800, max_workers=16):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.max_workers = max_workers
+        self.workers = set()
+        # AzureRMAuth creation times by key, see warm_auth
+        self.auth_created = dict()
+        from ansible.module_utils import azure_rm_common
+        self.common = azure_rm_common
+        # the role's module_utils, all imported by _load_role_module_utils
+        self.digests = module_utils_digests(vars(azure_rm_common))
+
+    def serve(self):
+        import select
+        import signal
+        from time import time
+        # remove the socket when stopped with kill
+        signal.signal(signal.SIGTERM, _terminate)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        listener.listen(64)
+        last_request = time()
+        try:
+            while self.workers or time() - last_request < self.idle_timeout:
+                self.reap(block=False)
+                readable = select.select([listener], [], [], 1.0)[0]
+                if not readable:
+                    continue
+                connection = listener.accept()[0]
+                last_request = time()
+                try:
+                    self.handle(listener, connection)
+                finally:
+                    connection.close()
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            while self.workers:
+                self.reap(block=True)
+
+    def reap(self, block):
+        while self.workers:
+            pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            if pid == 0:
+                return
+            self.workers.discard(pid)
+            if block:
+                return
+
+    def handle(self, listener, connection):
+        try:
+            request = json.loads(_read_all(connection).decode('utf-8'))
+        except ValueError:
+            return
+        digests = request.get('digests') or dict()
+        # the module only ships the module_utils it imports, those must be the broker's
+        if request.get('protocol') != BROKER_PROTOCOL or any(digests.get(name, digest) != digest for name, digest in self.digests.items()):
+            _send(connection, dict(unavailable='the broker runs other module_utils, restart it'))
+            return
+        while len(self.workers) >= self.max_workers:
+            self.reap(block=True)
+        self.warm_auth(request)
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        try:
+            import signal
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            listener.close()
+            self.run(connection, request)
+        finally:
+            os._exit(0)
+
+    def warm_auth(self, request):
+        '''
+        Build AzureRMAuth for the credentials of a request here, so every forked run inherits it with its token.
+
+        Only done when the request has the AZURE_* variables and HOME of the broker, its environment is set in the
+        forked process, see run.
+        '''
+        from time import time
+        if request.get('env') != auth_environment(os.environ):
+            return
+        try:
+            params = json.loads(request['args'])['ANSIBLE_MODULE_ARGS']
+        except (ValueError, KeyError, TypeError):
+            return
+        key = self.common.azure_auth_key(params)
+        if time() - self.auth_created.get(key, 0) < BROKER_AUTH_TTL:
+            return
+        self.common._AZURE_AUTH_CACHE.pop(key, None)
+        try:
+            self.common._AZURE_AUTH_CACHE[key] = self.common.AzureRMAuth(**self.common.azure_auth_params(params))
+            self.auth_created[key] = time()
+        except Exception:
+            # the module reports the error when it authenticates itself
+            pass
+
+    def run(self, connection, request):
+        '''
+        Run a module in this forked process and send back what it printed and its exit code.
+        '''
+        import tempfile
+        import traceback
+        import types
+        from timeit import default_timer
+        from ansible.module_utils import basic
+        from ansible.module_utils._text import to_bytes
+
+        # phases reported by AZURE_RM_PROFILE start now, the imports are done
+        self.common._IMPORT_STARTED = default_timer()
+        for key in auth_environment(os.environ):
+            os.environ.pop(key)
+        os.environ.update(request['env'])
+        try:
+            os.chdir(request['cwd'])
+        except OSError:
+            pass
+        output = tempfile.TemporaryFile()
+        errors = tempfile.TemporaryFile()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(output.fileno(), 1)
+        os.dup2(errors.fileno(), 2)
+
+        rc = 0
+        try:
+            basic._ANSIBLE_ARGS = to_bytes(request['args'])
+            main = types.ModuleType('__main__')
+            main.__file__ = request['file']
+            main.__builtins__ = __builtins__
+            sys.modules['__main__'] = main
+            sys.argv = [request['file']]
+            exec(compile(request['source'], request['file'], 'exec'), main.__dict__)
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                rc = exc.code or 0
+            else:
+                sys.stderr.write('{0}\n'.format(exc.code))
+                rc = 1
+        except BaseException:
+            traceback.print_exc()
+            rc = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        result = dict(rc=rc)
+        for name, f in (('stdout', output), ('stderr', errors)):
+            f.seek(0)
+            result[name] = f.read().decode('utf-8', 'replace')
+        _send(connection, result)
+
+
+def _terminate(signum, frame):
+    sys.exit(0)
+
+
+def _load_role_module_utils(directory):
+    '''
+    Make the role's module_utils, next to this file, win over the ones shipped with Ansible, as they do for modules.
+    '''
+    import ansible.module_utils
+    import ansible.module_utils.common
+    ansible.module_utils.__path__.insert(0, directory)
+    ansible.module_utils.common.__path__.insert(0, os.path.join(directory, 'common'))
+    import importlib
+    for root, dirs, files in os.walk(directory):
+        package = os.path.relpath(root, directory).replace(os.sep, '.').strip('.')
+        for name in sorted(files):
+            if name.endswith('.py') and name != '__init__.py':
+                importlib.import_module('.'.join(['ansible.module_utils'] + ([package] if package else []) + [name[:-3]]))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Run Azure modules in a warm local process.')
+    parser.add_argument('--socket', default=broker_socket_path() or BROKER_SOCKET, help='socket path, default %(default)s')
+    parser.add_argument('--idle-timeout', type=int, default=1800, help='exit after this many seconds without requests')
+    parser.add_argument('--max-workers', type=int, default=16, help='module runs at the same time')
+    args = parser.parse_args()
+
+    _load_role_module_utils(os.path.dirname(os.path.abspath(__file__)))
+    directory = os.path.dirname(args.socket)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    sys.stderr.write('Azure broker listening on {0}\n'.format(args.socket))
+    Broker(args.socket, args.idle_timeout, args.max_workers).serve()
+
+
+if __name__ == '__main__':
+    main()
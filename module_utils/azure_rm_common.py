@@ -10,16 +10,33 @@ import copy
 import inspect
 import traceback
 import json
+import datetime
+import threading
+import heapq
+import itertools
 
+from contextlib import contextmanager
+from functools import wraps
 from os.path import expanduser
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
 
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+# start of the imports phase reported by AZURE_RM_PROFILE, see ProfilePhases
+_IMPORT_STARTED = default_timer()
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib, remove_values
+from ansible.module_utils.basic import _load_params as load_module_params
 try:
     from ansible.module_utils.ansible_release import __version__ as ANSIBLE_VERSION
 except Exception:
     ANSIBLE_VERSION = 'unknown'
+from ansible.module_utils.six import string_types
 from ansible.module_utils.six.moves import configparser
 import ansible.module_utils.six.moves.urllib.parse as urlparse
+from ansible.module_utils.azure_rm_broker import run_in_broker, auth_environment
+
+# with a broker running, the module runs there and this process exits here, before the SDK imports
+run_in_broker(globals())
 
 AZURE_COMMON_ARGS = dict(
     auth_source=dict(
@@ -157,6 +174,10 @@ AZURE_TAG_ARGS = dict(
     append_tags=dict(type='bool', default=True),
 )
 
+AZURE_FACTS_ARGS = dict(
+    cache_ttl=dict(type='int')
+)
+
 AZURE_COMMON_REQUIRED_IF = [
     ('log_mode', 'file', ['log_path'])
 ]
@@ -230,6 +251,7 @@ try:
     from azure.mgmt.trafficmanager import TrafficManagerManagementClient
     from azure.storage.cloudstorageaccount import CloudStorageAccount
     from azure.storage.blob import PageBlobService, BlockBlobService
+    from azure.storage.models import ResourceTypes, AccountPermissions
     from adal.authentication_context import AuthenticationContext
     from azure.mgmt.sql import SqlManagementClient
     from azure.mgmt.servicebus import ServiceBusManagementClient
@@ -254,6 +276,11 @@ except ImportError as exc:
     HAS_AZURE_EXC = traceback.format_exc()
     HAS_AZURE = False
 
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+
+# Tags API, tags of any scope without a PUT of the whole resource
+TAGS_API_VERSION = '2019-10-01'
+
 from base64 import b64encode, b64decode
 from hashlib import sha256
 from hmac import HMAC
@@ -264,6 +291,18 @@ try:
 except ImportError:
     from urllib.parse import (urlencode, quote_plus)
 
+try:
+    import sqlite3
+    HAS_SQLITE = True
+except ImportError:
+    HAS_SQLITE = False
+
+try:
+    from azure.keyvault import KeyVaultClient, KeyVaultAuthentication
+except ImportError:
+    # Key Vault data plane modules check for azure.keyvault themselves
+    KeyVaultClient = None
+
 try:
     from azure.cli.core.util import CLIError
     from azure.common.credentials import get_azure_cli_credentials, get_cli_profile
@@ -296,6 +335,15 @@ def normalize_location_name(name):
     return name.replace(' ', '').lower()
 
 
+def dns_record_set_type(record_set):
+    # record set types look like Microsoft.Network/dnszones/A
+    return record_set.type.split('/')[-1]
+
+
+def tags_url(scope):
+    return '/{0}/providers/Microsoft.Resources/tags/default'.format(scope.strip('/'))
+
+
 # FUTURE: either get this from the requirements file (if we can be sure it's always available at runtime)
 # or generate the requirements files from this so we only have one source of truth to maintain...
 AZURE_PKG_VERSIONS = {
@@ -336,17 +384,328 @@ AZURE_PKG_VERSIONS = {
 
 AZURE_MIN_RELEASE = '2.0.0'
 
+# per process caches shared by all module instances, including the items of an azure_rm_batch run, see get_blob_client
+_BLOB_CLIENT_LOCK = threading.Lock()
+_BLOB_CLIENT_CACHE = {}
+_STORAGE_ACCOUNT_KEYS = {}
+
+KEYVAULT_RESOURCE = 'https://vault.azure.net'
+# remembers across module runs whether MSI works on this host, so off-Azure hosts skip the MSI probe
+KEYVAULT_AUTH_MARKER = expanduser('~/.azure/ansible_keyvault_auth.json')
+KEYVAULT_AUTH_MARKER_TTL = 86400
+# refresh Key Vault tokens this many seconds before they expire
+KEYVAULT_TOKEN_REFRESH_MARGIN = 300
+
+# times exec_module is run again after a write was rejected because the resource changed since it was read
+ETAG_CONFLICT_RETRIES = 3
+
+
+class ETagConflictError(Exception):
+    '''
+    A write sent with If-Match was rejected because the resource changed since it was read.
+    '''
+    pass
+
+
+# results of facts modules run with cache_ttl, see exec_module_cached
+INFO_CACHE_PATH = expanduser('~/.azure/ansible_info_cache.sqlite')
+INFO_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# module arguments which do not change what a facts module returns
+INFO_CACHE_IGNORED_ARGS = ['auth_source', 'profile', 'client_id', 'secret', 'tenant', 'ad_user', 'password',
+                           'cert_validation_mode', 'adfs_authority_url', 'cache_ttl']
+# changing a resource type also changes what the facts modules of these resource types return
+INFO_CACHE_RELATED_TYPES = dict(
+    subnet=['virtualnetwork'],
+    virtualnetworkpeering=['virtualnetwork'],
+    route=['routetable'],
+    dnsrecordset=['dnszone'],
+    dnszone_file=['dnsrecordset', 'dnszone'],
+    keyvaultkey=['keyvault'],
+    keyvaultsecret=['keyvault'],
+)
+# results holding fields with these names, e.g. account keys or connection strings, are never cached
+INFO_CACHE_SECRET_FIELDS = re.compile(r'password|secret|token|connection_?strings?|kube_?config|app_settings|(^|_)keys?$', re.IGNORECASE)
+
+
+def info_cache_resource_type(module_name):
+    '''
+    Resource type a module reads or writes, e.g. subnet for both azure_rm_subnet and azure_rm_subnet_info.
+    '''
+    name = module_name.split('.')[-1]
+    if name.startswith('azure_rm_'):
+        name = name[len('azure_rm_'):]
+    for suffix in ['_info', '_facts']:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def info_cache_has_secrets(value):
+    '''
+    Whether a facts module result holds a non empty field named like a secret, see INFO_CACHE_SECRET_FIELDS.
+    '''
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if item not in (None, '', [], {}) and not isinstance(item, bool) and 'public' not in str(key).lower() \
+                    and INFO_CACHE_SECRET_FIELDS.search(str(key)):
+                return True
+            if info_cache_has_secrets(item):
+                return True
+    elif isinstance(value, list):
+        return any(info_cache_has_secrets(item) for item in value)
+    return False
+
+
+def keyvault_item_created(item):
+    '''
+    Creation time of a Key Vault key or secret item as an ISO 8601 string, to order versions.
+    '''
+    created = item.attributes.created if item.attributes else None
+    return created.isoformat() if created else ''
+
+
+def select_keyvault_items(items, max_items=None, max_versions=None):
+    '''
+    Limit Key Vault key or secret items listed by the service, for the Key Vault info modules.
+
+    With max_versions only the newest max_versions items are kept, in memory. Key Vault does not order versions,
+    so every page is still listed for this. With max_items listing stops once that many items were read.
+
+    :param items: iterable of KeyItem or SecretItem objects, e.g. a paged response
+    :return: iterable of the selected items
+    '''
+    if max_versions:
+        items = heapq.nlargest(max_versions, items, key=keyvault_item_created)
+    if max_items:
+        items = itertools.islice(items, max_items)
+    return items
+
+
+def json_isoformat(obj):
+    '''
+    json.dumps default writing dates and times in ISO 8601.
+    '''
+    return obj.isoformat() if hasattr(obj, 'isoformat') else str(obj)
+
+
+# per process Key Vault clients and service principal tokens, see get_keyvault_client
+_KEYVAULT_LOCK = threading.Lock()
+_KEYVAULT_CLIENTS = {}
+_KEYVAULT_TOKENS = {}
+
+# AzureRMAuth objects by azure_auth_key, filled by the broker before it forks a module run, see azure_rm_broker
+_AZURE_AUTH_CACHE = {}
+
+
+def azure_auth_params(params):
+    '''
+    Arguments of AzureRMAuth out of module parameters.
+    '''
+    return dict((key, params.get(key, spec.get('default'))) for key, spec in AZURE_COMMON_ARGS.items())
+
+
+def azure_auth_key(params):
+    '''
+    Key of the AzureRMAuth for module parameters in the current environment, which holds further credentials.
+    '''
+    key = json.dumps([azure_auth_params(params), auth_environment(os.environ)], sort_keys=True, default=str)
+    return sha256(key.encode('utf-8')).hexdigest()
+
+
+# set to 1 to time the phases of a module run and return them as azure_rm_profile, see ProfilePhases
+PROFILE_ENV = 'AZURE_RM_PROFILE'
+# with profiling on, also write cProfile statistics to this file; {module} and {pid} are replaced
+PROFILE_OUTPUT_ENV = 'AZURE_RM_PROFILE_OUTPUT'
+
+
+class ProfilePhases(object):
+    '''
+    Wall time spent in the phases of a module run, in seconds.
+
+    The imports phase starts when azure_rm_common is imported, so it includes the SDK imports of the module itself.
+    Time spent in a phase entered from another phase only counts for the inner one, so the phases and 'other' add up
+    to the total. Phases entered on worker threads, see run_concurrently, overlap the phase that started them.
+    '''
+
+    def __init__(self, output=None):
+        self.started = _IMPORT_STARTED
+        self.seconds = dict(imports=default_timer() - _IMPORT_STARTED)
+        self.calls = dict()
+        self._stacks = threading.local()
+        self._lock = threading.Lock()
+        self.output = output
+        self.profiler = None
+        if output:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @classmethod
+    def from_environment(cls):
+        '''
+        :return: ProfilePhases object, or None when AZURE_RM_PROFILE is not set
+        '''
+        if os.environ.get(PROFILE_ENV, '').lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        return cls(os.environ.get(PROFILE_OUTPUT_ENV))
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stacks.__dict__.setdefault('entries', [])
+        # name, start and time spent in nested phases
+        entry = [name, default_timer(), 0.0]
+        stack.append(entry)
+        try:
+            yield
+        finally:
+            if stack and stack[-1] is entry:
+                stack.pop()
+                self._charge(entry, stack)
+                with self._lock:
+                    self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _charge(self, entry, stack):
+        elapsed = default_timer() - entry[1]
+        if stack:
+            stack[-1][2] += elapsed
+        with self._lock:
+            self.seconds[entry[0]] = self.seconds.get(entry[0], 0.0) + elapsed - entry[2]
+
+    def finish(self, module_name):
+        '''
+        Stop profiling and write the cProfile statistics, if requested.
+
+        :param module_name: name of the module, for the statistics file name
+        :return: compact breakdown, e.g. {'total': 2.1, 'phases': {'imports': 0.9, ...}, 'calls': {'serialize_obj': 40}}
+        '''
+        # phases left by fail(), e.g. exec_module
+        stack = self._stacks.__dict__.get('entries', [])
+        while stack:
+            self._charge(stack.pop(), stack)
+        total = default_timer() - self.started
+        result = dict(total=round(total, 3),
+                      phases=dict((name, round(seconds, 3)) for name, seconds in self.seconds.items()),
+                      calls=dict(self.calls))
+        result['phases']['other'] = round(max(total - sum(self.seconds.values()), 0.0), 3)
+        if self.profiler:
+            self.profiler.disable()
+            path = self.output.replace('{module}', module_name.split('.')[-1]).replace('{pid}', str(os.getpid()))
+            try:
+                self.profiler.dump_stats(path)
+                result['output'] = path
+            except (IOError, OSError) as exc:
+                result['output_error'] = str(exc)
+        return result
+
+
+def profiled(phase):
+    '''
+    Count the time spent in the decorated AzureRMModuleBase method to a profile phase, see ProfilePhases.
+    '''
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._profile is None:
+                return method(self, *args, **kwargs)
+            with self._profile.phase(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _NoProfilePhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NO_PROFILE_PHASE = _NoProfilePhase()
+
+# item of an azure_rm_batch run handled by the current thread, see AzureRMModuleBase.run_batch
+_BATCH_ITEM = threading.local()
+
+
+class _BatchItemModule(AnsibleModule):
+    '''
+    AnsibleModule of one item of an azure_rm_batch run: the arguments come from the item, and the result
+    is kept for the batch instead of being printed.
+
+    Warnings and deprecations are kept per item as well, since other items run on other threads of the same process.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        self.batch_warnings = []
+        self.batch_deprecations = []
+        super(_BatchItemModule, self).__init__(*args, **kwargs)
+
+    def _load_params(self):
+        # check mode, diff, verbosity and the like of the batch
+        params = dict((key, value) for key, value in load_module_params().items() if key.startswith('_ansible_'))
+        params.update(copy.deepcopy(_BATCH_ITEM.args))
+        params['_ansible_module_name'] = _BATCH_ITEM.batch['module_name']
+        self.params = params
+
+    def warn(self, warning):
+        self.batch_warnings.append(warning)
+        self.log('[WARNING] {0}'.format(warning))
+
+    def deprecate(self, msg, version=None, **kwargs):
+        deprecation = dict(kwargs, msg=msg, version=version)
+        self.batch_deprecations.append(dict((key, value) for key, value in deprecation.items() if value is not None))
+        self.log('[DEPRECATION WARNING] {0} {1}'.format(msg, version))
+
+    def exit_json(self, **kwargs):
+        self.keep_result(kwargs)
+        raise SystemExit(0)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs.update(failed=True, msg=msg)
+        self.keep_result(kwargs)
+        raise SystemExit(1)
+
+    def keep_result(self, result):
+        '''
+        Keep the result of the item for the batch, with its warnings and deprecations and without values of no_log arguments.
+        '''
+        self.do_cleanup_files()
+        self.add_path_info(result)
+        result.setdefault('invocation', dict(module_args=self.params))
+        warnings = result.pop('warnings', [])
+        for warning in [warnings] if isinstance(warnings, string_types) else warnings:
+            self.warn(warning)
+        for deprecation in result.pop('deprecations', []):
+            if isinstance(deprecation, dict):
+                self.deprecate(deprecation['msg'], version=deprecation.get('version'))
+            else:
+                self.deprecate(deprecation)
+        if self.batch_warnings:
+            result['warnings'] = self.batch_warnings
+        if self.batch_deprecations:
+            result['deprecations'] = self.batch_deprecations
+        _BATCH_ITEM.result = remove_values(result, self.no_log_values)
+        _BATCH_ITEM.item = remove_values(_BATCH_ITEM.item, self.no_log_values)
+
 
 class AzureRMModuleBase(object):
+    # phases of this module run when AZURE_RM_PROFILE is set, see ProfilePhases
+    _profile = None
+
     def __init__(self, derived_arg_spec, bypass_checks=False, no_log=False,
                  check_invalid_arguments=None, mutually_exclusive=None, required_together=None,
                  required_one_of=None, add_file_common_args=False, supports_check_mode=False,
                  required_if=None, supports_tags=True, facts_module=False, skip_exec=False):
 
+        if not skip_exec:
+            self._profile = ProfilePhases.from_environment()
+
         merged_arg_spec = dict()
         merged_arg_spec.update(AZURE_COMMON_ARGS)
         if supports_tags:
             merged_arg_spec.update(AZURE_TAG_ARGS)
+        if facts_module:
+            merged_arg_spec.update(AZURE_FACTS_ARGS)
 
         if derived_arg_spec:
             merged_arg_spec.update(derived_arg_spec)
@@ -355,16 +714,18 @@ class AzureRMModuleBase(object):
         if required_if:
             merged_required_if += required_if
 
-        self.module = AnsibleModule(argument_spec=merged_arg_spec,
-                                    bypass_checks=bypass_checks,
-                                    no_log=no_log,
-                                    check_invalid_arguments=check_invalid_arguments,
-                                    mutually_exclusive=mutually_exclusive,
-                                    required_together=required_together,
-                                    required_one_of=required_one_of,
-                                    add_file_common_args=add_file_common_args,
-                                    supports_check_mode=supports_check_mode,
-                                    required_if=merged_required_if)
+        module_class = _BatchItemModule if getattr(_BATCH_ITEM, 'batch', None) else AnsibleModule
+        with self.profile_phase('module_args'):
+            self.module = module_class(argument_spec=merged_arg_spec,
+                                       bypass_checks=bypass_checks,
+                                       no_log=no_log,
+                                       check_invalid_arguments=check_invalid_arguments,
+                                       mutually_exclusive=mutually_exclusive,
+                                       required_together=required_together,
+                                       required_one_of=required_one_of,
+                                       add_file_common_args=add_file_common_args,
+                                       supports_check_mode=supports_check_mode,
+                                       required_if=merged_required_if)
 
         if not HAS_PACKAGING_VERSION:
             self.fail(msg=missing_required_lib('packaging'),
@@ -401,6 +762,7 @@ class AzureRMModuleBase(object):
         self._automation_client = None
         self._IoThub_client = None
         self._lock_client = None
+        self._tags_client = None
 
         self.check_mode = self.module.check_mode
         self.api_profile = self.module.params.get('api_profile')
@@ -408,16 +770,46 @@ class AzureRMModuleBase(object):
         # self.debug = self.module.params.get('debug')
 
         # delegate auth to AzureRMAuth class (shared with all plugin types)
-        self.azure_auth = AzureRMAuth(fail_impl=self.fail, **self.module.params)
+        with self.profile_phase('credentials'):
+            cached = _AZURE_AUTH_CACHE.get(azure_auth_key(self.module.params)) if _AZURE_AUTH_CACHE else None
+            if cached:
+                # shares credentials and tokens, but reports errors through this module
+                self.azure_auth = copy.copy(cached)
+                self.azure_auth._fail_impl = self.fail
+            else:
+                self.azure_auth = AzureRMAuth(fail_impl=self.fail, **self.module.params)
 
         # common parameter validation
         if self.module.params.get('tags'):
             self.validate_tags(self.module.params['tags'])
 
         if not skip_exec:
-            res = self.exec_module(**self.module.params)
+            with self.profile_phase('exec_module'):
+                if facts_module and self.module.params.get('cache_ttl'):
+                    res = self.exec_module_cached()
+                else:
+                    res = self.exec_module_with_retries()
+                    if not facts_module and res.get('changed') and not self.check_mode:
+                        self.invalidate_info_cache()
+            self.finish_profile(res)
             self.module.exit_json(**res)
 
+    def profile_phase(self, name):
+        '''
+        Context manager counting the time spent in it to a profile phase, doing nothing unless AZURE_RM_PROFILE is set.
+        '''
+        if self._profile is None:
+            return _NO_PROFILE_PHASE
+        return self._profile.phase(name)
+
+    def finish_profile(self, result):
+        '''
+        Add the phase breakdown of this module run to result as azure_rm_profile, if profiling is on.
+        '''
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            result['azure_rm_profile'] = profile.finish(self.module._name)
+
     def check_client_version(self, client_type):
         # Ensure Azure modules are at least 2.0.0rc5.
         package_version = AZURE_PKG_VERSIONS.get(client_type.__name__, None)
@@ -440,6 +832,123 @@ class AzureRMModuleBase(object):
     def exec_module(self, **kwargs):
         self.fail("Error: {0} failed to implement exec_module method.".format(self.__class__.__name__))
 
+    def exec_module_with_retries(self):
+        '''
+        Run exec_module, running it again from the start when a conditional write reports an ETag conflict.
+        '''
+        attempt = 0
+        while True:
+            try:
+                return self.exec_module(**self.module.params)
+            except ETagConflictError as exc:
+                attempt += 1
+                if attempt > ETAG_CONFLICT_RETRIES:
+                    self.fail("Resource kept changing while being updated, giving up after {0} attempts - {1}".format(attempt, str(exc)))
+                self.log("Resource changed since it was read, running again: {0}".format(str(exc)))
+
+    def if_match(self, resource):
+        '''
+        Headers for writing back a resource only if it did not change since it was read.
+
+        :param resource: resource as read, or None when creating a resource
+        :return: custom_headers for an SDK create_or_update call
+        '''
+        etag = getattr(resource, 'etag', None) if resource is not None else None
+        return {'If-Match': etag} if etag else None
+
+    def check_etag_conflict(self, exc):
+        '''
+        Raise ETagConflictError if exc reports a failed If-Match precondition, so exec_module is run again.
+        '''
+        if isinstance(exc, CloudError) and exc.status_code == 412:
+            raise ETagConflictError(str(exc))
+
+    def _open_info_cache(self, create=True):
+        if not HAS_SQLITE or (not create and not os.path.exists(INFO_CACHE_PATH)):
+            return None
+        try:
+            if not os.path.isdir(os.path.dirname(INFO_CACHE_PATH)):
+                os.makedirs(os.path.dirname(INFO_CACHE_PATH), 0o700)
+            # the database and its journal, which SQLite creates with the same mode, are only readable by the user
+            os.close(os.open(INFO_CACHE_PATH, os.O_RDWR | os.O_CREAT, 0o600))
+            if os.stat(INFO_CACHE_PATH).st_mode & 0o077:
+                os.chmod(INFO_CACHE_PATH, 0o600)
+            connection = sqlite3.connect(INFO_CACHE_PATH, timeout=30)
+            connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, subscription_id TEXT, resource_type TEXT, '
+                               'expires REAL, accessed REAL, size INTEGER, value TEXT)')
+            return connection
+        except Exception as exc:
+            self.log('Info cache unavailable: {0}'.format(str(exc)))
+            return None
+
+    def exec_module_cached(self):
+        '''
+        Run exec_module of a facts module, reusing the result of an earlier run with the same arguments within cache_ttl seconds.
+
+        Results are kept in a local SQLite database keyed by subscription, module and arguments. The least recently used
+        results are evicted once the database holds more than INFO_CACHE_MAX_BYTES of results. Results holding secrets,
+        either values of no_log arguments or fields named like INFO_CACHE_SECRET_FIELDS, are not cached.
+        '''
+        params = dict((key, value) for key, value in self.module.params.items() if key not in INFO_CACHE_IGNORED_ARGS)
+        key = sha256(json.dumps([self.subscription_id, self.module._name, params], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        now = time()
+
+        connection = self._open_info_cache()
+        if connection is None:
+            return self.exec_module(**self.module.params)
+        try:
+            try:
+                with connection:
+                    row = connection.execute('SELECT value FROM results WHERE key = ? AND expires > ?', (key, now)).fetchone()
+                    if row:
+                        connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+                        self.log('Info cache hit for {0}'.format(self.module._name))
+                        return json.loads(row[0])
+            except sqlite3.Error as exc:
+                self.log('Info cache unavailable: {0}'.format(str(exc)))
+
+            res = self.exec_module(**self.module.params)
+            value = json.dumps(res, default=str)
+            if info_cache_has_secrets(res) or any(secret in value for secret in self.module.no_log_values):
+                self.log('Result of {0} holds secrets, not caching it'.format(self.module._name))
+                return res
+            try:
+                with connection:
+                    connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                       (key, self.subscription_id, info_cache_resource_type(self.module._name),
+                                        now + self.module.params['cache_ttl'], now, len(value), value))
+                    connection.execute('DELETE FROM results WHERE expires <= ?', (now,))
+                    total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+                    if total > INFO_CACHE_MAX_BYTES:
+                        for evict_key, size in connection.execute('SELECT key, size FROM results ORDER BY accessed').fetchall():
+                            if total <= INFO_CACHE_MAX_BYTES:
+                                break
+                            connection.execute('DELETE FROM results WHERE key = ?', (evict_key,))
+                            total -= size
+            except sqlite3.Error as exc:
+                self.log('Info cache unavailable: {0}'.format(str(exc)))
+            return res
+        finally:
+            connection.close()
+
+    def invalidate_info_cache(self):
+        '''
+        Drop cached facts module results of the resource type this module changed.
+        '''
+        connection = self._open_info_cache(create=False)
+        if connection is None:
+            return
+        resource_type = info_cache_resource_type(self.module._name)
+        resource_types = [resource_type] + INFO_CACHE_RELATED_TYPES.get(resource_type, [])
+        try:
+            with connection:
+                connection.execute('DELETE FROM results WHERE subscription_id = ? AND resource_type IN ({0})'.format(
+                                   ', '.join('?' * len(resource_types))), [self.subscription_id] + resource_types)
+        except sqlite3.Error as exc:
+            self.log('Info cache unavailable: {0}'.format(str(exc)))
+        finally:
+            connection.close()
+
     def fail(self, msg, **kwargs):
         '''
         Shortcut for calling module.fail()
@@ -448,6 +957,7 @@ class AzureRMModuleBase(object):
         :param kwargs: Any key=value pairs
         :return: None
         '''
+        self.finish_profile(kwargs)
         self.module.fail_json(msg=msg, **kwargs)
 
     def deprecate(self, msg, version=None):
@@ -473,6 +983,17 @@ class AzureRMModuleBase(object):
                 if not isinstance(value, str):
                     self.fail("Tags values must be strings. Found {0}:{1}".format(str(key), str(value)))
 
+    def validate_positive(self, **values):
+        '''
+        Fail unless every given integer argument that is set is positive.
+
+        :param values: argument values by argument name
+        :return: None
+        '''
+        for name, value in sorted(values.items()):
+            if value is not None and value < 1:
+                self.fail("{0} must be a positive integer, got {1}".format(name, value))
+
     def update_tags(self, tags):
         '''
         Call from the module to update metadata tags. Returns tuple
@@ -500,6 +1021,72 @@ class AzureRMModuleBase(object):
                     changed = True
         return changed, new_tags
 
+    def get_tags_at_scope(self, scope):
+        '''
+        Get the tags of a subscription, resource group or resource with the Tags API.
+
+        :param scope: id of the subscription, resource group or resource
+        :return: dict of tags
+        '''
+        response = self.tags_client.query(tags_url(scope), 'GET', {'api-version': TAGS_API_VERSION}, None, None, [200], 0, 0)
+        return json.loads(response.text).get('properties', {}).get('tags') or dict()
+
+    def patch_tags_at_scope(self, scope, tags, operation='merge'):
+        '''
+        Merge, replace or delete tags of a subscription, resource group or resource with the Tags API.
+
+        Only the tags are sent, the resource itself is not updated.
+
+        :param scope: id of the subscription, resource group or resource
+        :param tags: dict of tags
+        :param operation: merge, replace or delete
+        :return: dict of tags after the operation
+        '''
+        body = dict(operation=operation.capitalize(), properties=dict(tags=tags))
+        response = self.tags_client.query(tags_url(scope), 'PATCH', {'api-version': TAGS_API_VERSION}, None, body, [200], 0, 0)
+        return json.loads(response.text).get('properties', {}).get('tags') or dict()
+
+    def update_tags_at_scopes(self, scopes, tags, operation='merge', max_workers=8):
+        '''
+        Merge, replace or delete tags of many subscriptions, resource groups or resources concurrently.
+
+        The tags of every scope are read first, and only scopes whose tags change are patched, none in check mode.
+        Tags deleted with a value are only deleted where they have that value.
+
+        :param scopes: list of ids of subscriptions, resource groups or resources
+        :param tags: dict of tags
+        :param operation: merge, replace or delete
+        :param max_workers: maximum number of scopes updated at the same time
+        :return: list of dicts with changed and tags, or failed and msg, and the scope, in the order of scopes
+        '''
+        # create the client before the threads do
+        self.tags_client
+
+        def update(scope):
+            current = self.get_tags_at_scope(scope)
+            if operation == 'delete':
+                patch = dict((key, value) for key, value in current.items()
+                             if key in tags and tags[key] in (None, '', value))
+                new_tags = dict((key, value) for key, value in current.items() if key not in patch)
+            else:
+                patch = tags
+                new_tags = dict(current) if operation == 'merge' else dict()
+                new_tags.update(tags)
+            if new_tags == current:
+                return dict(changed=False, tags=current)
+            if not self.check_mode:
+                new_tags = self.patch_tags_at_scope(scope, patch, operation)
+            return dict(changed=True, tags=new_tags)
+
+        results = []
+        for scope, (result, exc) in zip(scopes, self.run_concurrently(update, scopes, max_workers)):
+            if exc is not None:
+                result = dict(changed=False, failed=True,
+                              msg="Error updating tags of {0} - {1}".format(scope, getattr(exc, 'message', None) or str(exc)))
+            result['scope'] = scope
+            results.append(result)
+        return results
+
     def has_tags(self, obj_tags, tag_list):
         '''
         Used in fact modules to compare object tags to list of parameter tags. Return true if list of parameter tags
@@ -556,6 +1143,7 @@ class AzureRMModuleBase(object):
         resource_dict['subscription_id'] = resource_dict.get('subscription_id', self.subscription_id)
         return resource_dict
 
+    @profiled('serialize_obj')
     def serialize_obj(self, obj, class_name, enum_modules=None):
         '''
         Return a JSON representation of an Azure object.
@@ -578,6 +1166,124 @@ class AzureRMModuleBase(object):
         serializer = Serializer(classes=dependencies)
         return serializer.body(obj, class_name, keep_readonly=True)
 
+    def run_concurrently(self, func, items, max_workers=8):
+        '''
+        Call func for every item on a bounded pool of threads.
+
+        Worker threads must not call fail(), so exceptions are captured and handed back to the caller.
+
+        :param func: callable taking a single item
+        :param items: list of items
+        :param max_workers: maximum number of concurrent calls
+        :return: list of (result, exception) tuples in the order of items
+        '''
+        def call(item):
+            try:
+                return func(item), None
+            except Exception as exc:
+                return None, exc
+
+        items = list(items)
+        if len(items) <= 1 or max_workers <= 1:
+            return [call(item) for item in items]
+        pool = ThreadPool(min(max_workers, len(items)))
+        try:
+            return pool.map(call, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def apply_dns_record_set_changes(self, resource_group, zone_name, changes, unchanged=0, max_workers=8):
+        '''
+        Report the record set changes computed by a DNS module and, unless in check mode, apply them concurrently.
+
+        Writes are guarded by the etags of the record sets, so concurrent writers fail instead of silently
+        overwriting each other.
+
+        :param resource_group: name of the resource group of the zone
+        :param zone_name: name of the zone
+        :param changes: list of dicts with action (created, updated or deleted), etag, item with relative_name and
+                        record_type, and the RecordSet to write in record_set unless deleted
+        :param unchanged: number of record sets left unchanged
+        :param max_workers: maximum number of record sets written concurrently
+        :return: dict with changed, counts and record_sets results
+        '''
+        counts = dict(created=0, updated=0, deleted=0, unchanged=unchanged)
+        for change in changes:
+            counts[change['action']] += 1
+        results = dict(changed=len(changes) > 0,
+                       counts=counts,
+                       record_sets=[dict(relative_name=change['item']['relative_name'],
+                                         record_type=change['item']['record_type'],
+                                         action=change['action']) for change in changes])
+        if self.check_mode or not changes:
+            return results
+
+        def apply_change(change):
+            item = change['item']
+            if change['action'] == 'deleted':
+                return self.dns_client.record_sets.delete(resource_group_name=resource_group,
+                                                          zone_name=zone_name,
+                                                          relative_record_set_name=item['relative_name'],
+                                                          record_type=item['record_type'],
+                                                          if_match=change['etag'])
+            return self.dns_client.record_sets.create_or_update(resource_group_name=resource_group,
+                                                                zone_name=zone_name,
+                                                                relative_record_set_name=item['relative_name'],
+                                                                record_type=item['record_type'],
+                                                                parameters=change['record_set'],
+                                                                if_match=change['etag'],
+                                                                if_none_match=None if change['etag'] else '*')
+
+        errors = []
+        for change, (result, exc) in zip(changes, self.run_concurrently(apply_change, changes, max_workers)):
+            if exc is not None:
+                errors.append("{0} {1} - {2}".format(change['item']['relative_name'], change['item']['record_type'],
+                                                     getattr(exc, 'message', None) or str(exc)))
+        if errors:
+            self.fail("Error applying {0} of {1} record set changes: {2}".format(len(errors), len(changes), '; '.join(errors)),
+                      **results)
+        return results
+
+    def run_batch(self, main, module_name, items, max_workers=8):
+        '''
+        Run the main() of a module once per item of arguments in this process, for azure_rm_batch.
+
+        The runs share the credentials of this module and the management clients they create. Arguments
+        of this module for authentication are defaults for the items.
+
+        :param main: main function of the module
+        :param module_name: name of the module
+        :param items: list of argument dicts
+        :param max_workers: maximum number of concurrent runs
+        :return: list of module results in the order of items
+        '''
+        _AZURE_AUTH_CACHE[azure_auth_key(self.module.params)] = self.azure_auth
+        defaults = dict((key, value) for key, value in azure_auth_params(self.module.params).items() if value is not None)
+        batch = dict(module_name=module_name, lock=threading.Lock(), clients=dict())
+
+        def run(args):
+            item_args = dict(defaults)
+            item_args.update(args)
+            _BATCH_ITEM.batch = batch
+            _BATCH_ITEM.args = item_args
+            _BATCH_ITEM.item = args
+            _BATCH_ITEM.result = None
+            try:
+                main()
+            except SystemExit:
+                pass
+            except Exception as exc:
+                _BATCH_ITEM.result = dict(failed=True, msg='{0} failed - {1}'.format(module_name, str(exc)),
+                                          exception=traceback.format_exc())
+            result = _BATCH_ITEM.result or dict(failed=True, msg='{0} returned no result'.format(module_name))
+            result.setdefault('failed', False)
+            result.update(item=_BATCH_ITEM.item, ansible_loop_var='item')
+            _BATCH_ITEM.__dict__.clear()
+            return result
+
+        return [result for result, exc in self.run_concurrently(run, items, max_workers)]
+
     def get_poller_result(self, poller, wait=5):
         '''
         Consistent method of waiting on and retrieving results from Azure's long poller
@@ -630,30 +1336,202 @@ class AzureRMModuleBase(object):
                 self.fail("Error {0} has a provisioning state of {1}. Expecting state to be {2}.".format(
                     azure_object.name, azure_object.provisioning_state, AZURE_SUCCESS_STATE))
 
-    def get_blob_client(self, resource_group_name, storage_account_name, storage_blob_type='block'):
-        keys = dict()
+    def get_storage_account_key(self, resource_group_name, storage_account_name):
+        '''
+        Return the first access key of a storage account. Keys are cached per process, subscription and
+        credentials, so modules talking to many blobs in one account list the keys only once.
+
+        :param resource_group_name: name of the resource group containing the account
+        :param storage_account_name: name of the storage account
+        :return: account key string
+        '''
+        cache_key = (self.subscription_id, azure_auth_key(self.module.params), resource_group_name.lower(), storage_account_name.lower())
+        with _BLOB_CLIENT_LOCK:
+            account_key = _STORAGE_ACCOUNT_KEYS.get(cache_key)
+        if account_key:
+            return account_key
         try:
             # Get keys from the storage account
             self.log('Getting keys')
             account_keys = self.storage_client.storage_accounts.list_keys(resource_group_name, storage_account_name)
         except Exception as exc:
             self.fail("Error getting keys for account {0} - {1}".format(storage_account_name, str(exc)))
+        account_key = account_keys.keys[0].value
+        with _BLOB_CLIENT_LOCK:
+            _STORAGE_ACCOUNT_KEYS[cache_key] = account_key
+        return account_key
 
+    def get_blob_client(self, resource_group_name, storage_account_name, storage_blob_type='block',
+                        auth_mode='key', sas_expiry=3600):
+        '''
+        Return a blob service client for a storage account. Clients are memoized per process by
+        subscription, credentials, resource group, account, blob type and auth mode.
+
+        :param resource_group_name: name of the resource group containing the account
+        :param storage_account_name: name of the storage account
+        :param storage_blob_type: one of 'block' or 'page'
+        :param auth_mode: 'key' to sign requests with the account key, 'sas' to use a short-lived account
+                          SAS token so the client never holds the key
+        :param sas_expiry: lifetime in seconds of the SAS token when auth_mode is 'sas'
+        :return: BlockBlobService or PageBlobService object
+        '''
+        cache_key = (self.subscription_id, azure_auth_key(self.module.params), resource_group_name.lower(),
+                     storage_account_name.lower(), storage_blob_type, auth_mode)
+        with _BLOB_CLIENT_LOCK:
+            cached = _BLOB_CLIENT_CACHE.get(cache_key)
+        # refresh SAS based clients a minute ahead of token expiry
+        if cached and (cached[1] is None or cached[1] - 60 > time()):
+            return cached[0]
+
+        account_key = self.get_storage_account_key(resource_group_name, storage_account_name)
         try:
             self.log('Create blob service')
             if storage_blob_type == 'page':
-                return PageBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
-                                       account_name=storage_account_name,
-                                       account_key=account_keys.keys[0].value)
+                client_type = PageBlobService
             elif storage_blob_type == 'block':
-                return BlockBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
-                                        account_name=storage_account_name,
-                                        account_key=account_keys.keys[0].value)
+                client_type = BlockBlobService
             else:
                 raise Exception("Invalid storage blob type defined.")
+            endpoint_suffix = self._cloud_environment.suffixes.storage_endpoint
+            expires_on = None
+            if auth_mode == 'sas':
+                expires_on = time() + sas_expiry
+                signer = client_type(endpoint_suffix=endpoint_suffix,
+                                     account_name=storage_account_name,
+                                     account_key=account_key)
+                sas_token = signer.generate_account_shared_access_signature(
+                    ResourceTypes(service=True, container=True, object=True),
+                    AccountPermissions(read=True, write=True, delete=True, list=True, add=True, create=True),
+                    datetime.datetime.utcfromtimestamp(expires_on))
+                client = client_type(endpoint_suffix=endpoint_suffix,
+                                     account_name=storage_account_name,
+                                     sas_token=sas_token)
+            elif auth_mode == 'key':
+                client = client_type(endpoint_suffix=endpoint_suffix,
+                                     account_name=storage_account_name,
+                                     account_key=account_key)
+            else:
+                raise Exception("Invalid storage auth mode defined.")
         except Exception as exc:
             self.fail("Error creating blob service client for storage account {0} - {1}".format(storage_account_name,
                                                                                                 str(exc)))
+        with _BLOB_CLIENT_LOCK:
+            _BLOB_CLIENT_CACHE[cache_key] = (client, expires_on)
+        return client
+
+    def _read_keyvault_auth_marker(self):
+        try:
+            with open(KEYVAULT_AUTH_MARKER) as marker_file:
+                marker = json.load(marker_file)
+            if marker.get('timestamp', 0) + KEYVAULT_AUTH_MARKER_TTL > time():
+                return marker.get('auth_source')
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    def _write_keyvault_auth_marker(self, auth_source):
+        try:
+            fd = os.open(KEYVAULT_AUTH_MARKER, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as marker_file:
+                json.dump(dict(auth_source=auth_source, timestamp=time()), marker_file)
+        except (IOError, OSError):
+            self.log('Unable to write Key Vault auth marker {0}'.format(KEYVAULT_AUTH_MARKER))
+
+    def _get_keyvault_sp_token(self, resource):
+        if self.credentials.get('client_id') is None or self.credentials.get('secret') is None:
+            self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
+
+        tenant = self.credentials.get('tenant') or "common"
+        token_key = (self.credentials['client_id'], tenant, resource)
+        with _KEYVAULT_LOCK:
+            token = _KEYVAULT_TOKENS.get(token_key)
+        if token and float(token.get('expires_on', 0)) - KEYVAULT_TOKEN_REFRESH_MARGIN > time():
+            return token
+
+        authcredential = ServicePrincipalCredentials(
+            client_id=self.credentials['client_id'],
+            secret=self.credentials['secret'],
+            tenant=tenant,
+            cloud_environment=self._cloud_environment,
+            resource=resource)
+        token = authcredential.token
+        with _KEYVAULT_LOCK:
+            _KEYVAULT_TOKENS[token_key] = token
+        return token
+
+    def get_keyvault_client(self):
+        '''
+        Return a KeyVaultClient for the Key Vault data plane, shared by all Key Vault modules in this process.
+
+        MSI is tried first unless a previous run on this host found it unavailable and a service principal
+        is configured, in which case the service principal is used straight away. Service principal tokens
+        are reused until they expire.
+
+        :return: KeyVaultClient object
+        '''
+        if KeyVaultClient is None:
+            self.fail(msg=missing_required_lib('azure-keyvault'))
+
+        auth_source = self.module.params.get('auth_source')
+        if auth_source != 'msi':
+            auth_source = self._read_keyvault_auth_marker()
+            # MSI may have failed transiently, it is the only option without a service principal
+            if auth_source == 'sp' and (self.credentials.get('client_id') is None or self.credentials.get('secret') is None):
+                auth_source = None
+        if auth_source == 'msi':
+            client_key = ('msi',)
+        else:
+            client_key = ('sp', self.credentials.get('client_id'), self.credentials.get('tenant'))
+
+        with _KEYVAULT_LOCK:
+            client = _KEYVAULT_CLIENTS.get(client_key)
+        if client:
+            return client
+
+        if auth_source != 'sp':
+            try:
+                self.log("Get KeyVaultClient from MSI")
+                client = KeyVaultClient(MSIAuthentication(resource=KEYVAULT_RESOURCE))
+                client_key = ('msi',)
+            except Exception:
+                self.log("Get KeyVaultClient from service principal")
+            if auth_source is None:
+                self._write_keyvault_auth_marker('msi' if client else 'sp')
+
+        if not client:
+            # Create KeyVault Client using KeyVault auth class and auth_callback
+            def auth_callback(server, resource, scope):
+                token = self._get_keyvault_sp_token(resource or KEYVAULT_RESOURCE)
+                return token['token_type'], token['access_token']
+
+            client = KeyVaultClient(KeyVaultAuthentication(auth_callback))
+
+        # keep the underlying HTTP session so consecutive calls reuse the connection
+        if hasattr(client.config, 'keep_alive'):
+            client.config.keep_alive = True
+        client.config = self.add_user_agent(client.config)
+        with _KEYVAULT_LOCK:
+            _KEYVAULT_CLIENTS[client_key] = client
+        return client
+
+    def write_json_lines(self, dest, items, to_dict):
+        '''
+        Write items to a file as JSON lines, one item in memory at a time.
+
+        :param dest: path of the file
+        :param items: iterable of items, e.g. a paged response
+        :param to_dict: function converting an item to a dictionary
+        :return: number of items written
+        '''
+        count = 0
+        try:
+            with open(dest, 'w') as dest_file:
+                for item in items:
+                    dest_file.write(json.dumps(to_dict(item), default=json_isoformat) + '\n')
+                    count += 1
+        except (IOError, OSError) as exc:
+            self.fail("Failed to write to {0}: {1}".format(dest, str(exc)))
+        return count
 
     def create_default_pip(self, resource_group, location, public_ip_name, allocation_method='Dynamic', sku=None):
         '''
@@ -817,7 +1695,17 @@ class AzureRMModuleBase(object):
         # wrap basic strings in a dict that just defines the default
         return dict(default_api_version=profile_raw)
 
+    @profiled('get_mgmt_svc_client')
     def get_mgmt_svc_client(self, client_type, base_url=None, api_version=None):
+        # items of an azure_rm_batch run share their clients
+        batch = getattr(_BATCH_ITEM, 'batch', None)
+        client_key = (client_type, base_url, api_version, self.api_profile, id(self.azure_auth.azure_credentials))
+        if batch is not None:
+            with batch['lock']:
+                client = batch['clients'].get(client_key)
+            if client is not None:
+                return client
+
         self.log('Getting management service client {0}'.format(client_type.__name__))
         self.check_client_version(client_type)
 
@@ -866,6 +1754,9 @@ class AzureRMModuleBase(object):
         if self.azure_auth._cert_validation_mode == 'ignore':
             client.config.session_configuration_callback = self._validation_ignore_callback
 
+        if batch is not None:
+            with batch['lock']:
+                client = batch['clients'].setdefault(client_key, client)
         return client
 
     def add_user_agent(self, config):
@@ -944,6 +1835,14 @@ class AzureRMModuleBase(object):
         self.log("Getting network models...")
         return NetworkManagementClient.models("2018-08-01")
 
+    @property
+    def tags_client(self):
+        self.log('Getting tags client')
+        if not self._tags_client:
+            self._tags_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                         base_url=self._cloud_environment.endpoints.resource_manager)
+        return self._tags_client
+
     @property
     def rm_client(self):
         self.log('Getting resource manager client')
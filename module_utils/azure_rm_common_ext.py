@@ -3,27 +3,100 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+import marshal
 import re
+import threading
 from ansible.module_utils.common.dict_transformations import _camel_to_snake, _snake_to_camel
 from ansible.module_utils.six import string_types
 
+# compare modifiers compiled from argument specs, which are static per module class, see create_compare_modifiers
+_COMPARE_MODIFIERS_LOCK = threading.Lock()
+_COMPARE_MODIFIERS = {}
+
+# resource id patterns compiled by _compile_resource_id_pattern
+_RESOURCE_ID_PATTERNS = {}
+_PLACEHOLDER = re.compile(r'\{([^{}]*)\}')
+
+
+def _compile_resource_id_pattern(pattern):
+    '''
+    Split a swagger style resource id pattern once.
+
+    :return: tuple of the path segments, each either (True, placeholder name) or (False, lower case literal),
+             and the set of placeholder names in the pattern
+    '''
+    compiled = _RESOURCE_ID_PATTERNS.get(pattern)
+    if compiled is None:
+        segments = tuple((True, part[1:-1]) if part.startswith('{') else (False, part.lower()) for part in pattern.split('/'))
+        compiled = (segments, frozenset(_PLACEHOLDER.findall(pattern)))
+        _RESOURCE_ID_PATTERNS[pattern] = compiled
+    return compiled
+
+
+def _identical(new, old):
+    '''
+    Cheap check whether two subtrees are identical, including the types of their leaves.
+
+    Equality alone would treat True and 1, or 1 and 1.0, as equal while default_compare reports them as changed,
+    so equal subtrees must also serialize to the same marshal data, which records the type of every leaf.
+    Marshal format 2 is used as it neither shares references nor marks interned strings.
+    A False result only means the subtrees have to be compared item by item.
+    '''
+    if new != old:
+        return False
+    try:
+        return marshal.dumps(new, 2) == marshal.dumps(old, 2)
+    except ValueError:
+        return False
+
 
 class AzureRMModuleBaseExt(AzureRMModuleBase):
 
+    def _inflate_plan(self, spec):
+        '''
+        Compile the options of spec for inflate_parameters, once per spec.
+
+        :return: list of (name, option, purge if None, pattern, absolute disposition, path, target name, suboptions)
+        '''
+        plans = self.__dict__.setdefault('_inflate_plans', {})
+        cached = plans.get(id(spec))
+        if cached is not None and cached[0] is spec:
+            return cached[1]
+        plan = []
+        for name in spec.keys():
+            option = spec[name]
+            pattern = option.get('pattern', None)
+            if pattern and pattern != 'camelize':
+                patterns = pattern if isinstance(pattern, list) else [pattern]
+                for p in patterns:
+                    _compile_resource_id_pattern(p)
+            disposition = option.get('disposition', '*')
+            absolute = disposition.startswith('/')
+            if disposition == '/':
+                disposition = '/*'
+            parts = disposition.split('/')
+            if parts[0] == '':
+                # should fail if level is > 0?
+                parts.pop(0)
+            plan.append((name, option.get('purgeIfNone', False), pattern, absolute,
+                         tuple(parts[:-1]), parts[-1] if parts[-1] != '*' else name, option.get('options')))
+        # keep a reference to spec, so its id is not reused while cached
+        plans[id(spec)] = (spec, plan)
+        return plan
+
     def inflate_parameters(self, spec, body, level):
         if isinstance(body, list):
             for item in body:
                 self.inflate_parameters(spec, item, level)
             return
-        for name in spec.keys():
+        for name, purge_if_none, pattern, absolute, path, target_name, options in self._inflate_plan(spec):
             # first check if option was passed
             param = body.get(name)
             if param is None:
-                if spec[name].get('purgeIfNone', False):
+                if purge_if_none:
                     body.pop(name, None)
                 continue
             # check if pattern needs to be used
-            pattern = spec[name].get('pattern', None)
             if pattern:
                 if pattern == 'camelize':
                     param = _snake_to_camel(param, True)
@@ -37,23 +110,15 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
                 else:
                     param = self.normalize_resource_id(param, pattern)
                     body[name] = param
-            disposition = spec[name].get('disposition', '*')
-            if level == 0 and not disposition.startswith('/'):
+            if level == 0 and not absolute:
                 continue
-            if disposition == '/':
-                disposition = '/*'
-            parts = disposition.split('/')
-            if parts[0] == '':
-                # should fail if level is > 0?
-                parts.pop(0)
             target_dict = body
             elem = body.pop(name)
-            while len(parts) > 1:
-                target_dict = target_dict.setdefault(parts.pop(0), {})
-            targetName = parts[0] if parts[0] != '*' else name
-            target_dict[targetName] = elem
-            if spec[name].get('options'):
-                self.inflate_parameters(spec[name].get('options'), target_dict[targetName], level + 1)
+            for part in path:
+                target_dict = target_dict.setdefault(part, {})
+            target_dict[target_name] = elem
+            if options:
+                self.inflate_parameters(options, target_dict[target_name], level + 1)
 
     def normalize_resource_id(self, value, pattern):
         '''
@@ -62,19 +127,19 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
         :param resource_id: It could be a resource name, resource id or dict containing parts from the pattern.
         :param pattern: pattern of resource is, just like in Azure Swagger
         '''
+        segments, placeholders = _compile_resource_id_pattern(pattern)
         value_dict = {}
         if isinstance(value, string_types):
             value_parts = value.split('/')
             if len(value_parts) == 1:
                 value_dict['name'] = value
             else:
-                pattern_parts = pattern.split('/')
-                if len(value_parts) != len(pattern_parts):
+                if len(value_parts) != len(segments):
                     return None
-                for i in range(len(value_parts)):
-                    if pattern_parts[i].startswith('{'):
-                        value_dict[pattern_parts[i][1:-1]] = value_parts[i]
-                    elif value_parts[i].lower() != pattern_parts[i].lower():
+                for value_part, (is_placeholder, segment) in zip(value_parts, segments):
+                    if is_placeholder:
+                        value_dict[segment] = value_part
+                    elif value_part.lower() != segment:
                         return None
         elif isinstance(value, dict):
             value_dict = value
@@ -87,7 +152,7 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
 
         # check if any extra values passed
         for k in value_dict:
-            if not ('{' + k + '}') in pattern:
+            if k not in placeholders and not ('{' + k + '}') in pattern:
                 return None
         # format url
         return pattern.format(**value_dict)
@@ -105,6 +170,22 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
         return self.default_compare(modifiers, new_params, old_params, '', self.results)
 
     def create_compare_modifiers(self, arg_spec, path, result):
+        '''
+        Add the compare modifiers of arg_spec to result.
+
+        Modifiers are compiled once per module class and argument spec, and reused afterwards.
+        '''
+        key = (type(self).__module__, type(self).__name__, path, tuple(sorted(arg_spec.keys())))
+        with _COMPARE_MODIFIERS_LOCK:
+            modifiers = _COMPARE_MODIFIERS.get(key)
+        if modifiers is None:
+            modifiers = {}
+            self._compile_compare_modifiers(arg_spec, path, modifiers)
+            with _COMPARE_MODIFIERS_LOCK:
+                _COMPARE_MODIFIERS[key] = modifiers
+        result.update((k, dict(v)) for k, v in modifiers.items())
+
+    def _compile_compare_modifiers(self, arg_spec, path, result):
         for k in arg_spec.keys():
             o = arg_spec[k]
             updatable = o.get('updatable', True)
@@ -119,7 +200,7 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
             if comparison != 'default' or not updatable:
                 result[p] = {'updatable': updatable, 'comparison': comparison}
             if o.get('options'):
-                self.create_compare_modifiers(o.get('options'), p, result)
+                self._compile_compare_modifiers(o.get('options'), p, result)
 
     def default_compare(self, modifiers, new, old, path, result):
         '''
@@ -146,13 +227,20 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
             Returns True if no difference between structures has been detected.
             Returns False if difference was detected.
         '''
+        plan = dict((tuple(k.split('/')), (v.get('updatable', True), v.get('comparison', 'default'))) for k, v in modifiers.items())
+        return self._compare(plan, new, old, tuple(path.split('/')), result)
+
+    def _compare(self, plan, new, old, path, result):
+        # path is a tuple of the components of the slash separated path string, which is only built for messages
         if new is None:
             return True
         elif isinstance(new, dict):
             comparison_result = True
             if not isinstance(old, dict):
-                result['compare'].append('changed [' + path + '] old dict is null')
+                result['compare'].append('changed [' + '/'.join(path) + '] old dict is null')
                 comparison_result = False
+            elif _identical(new, old):
+                return True
             else:
                 for k in set(new.keys()) | set(old.keys()):
                     new_item = new.get(k, None)
@@ -160,38 +248,37 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
                     if new_item is None:
                         if isinstance(old_item, dict):
                             new[k] = old_item
-                            result['compare'].append('new item was empty, using old [' + path + '][ ' + k + ' ]')
-                    elif not self.default_compare(modifiers, new_item, old_item, path + '/' + k, result):
+                            result['compare'].append('new item was empty, using old [' + '/'.join(path) + '][ ' + k + ' ]')
+                    elif not self._compare(plan, new_item, old_item, path + (k,), result):
                         comparison_result = False
             return comparison_result
         elif isinstance(new, list):
             comparison_result = True
             if not isinstance(old, list) or len(new) != len(old):
-                result['compare'].append('changed [' + path + '] length is different or old value is null')
+                result['compare'].append('changed [' + '/'.join(path) + '] length is different or old value is null')
                 comparison_result = False
+            elif _identical(new, old):
+                return True
             else:
                 if isinstance(old[0], dict):
-                    key = None
-                    if 'id' in old[0] and 'id' in new[0]:
-                        key = 'id'
-                    elif 'name' in old[0] and 'name' in new[0]:
-                        key = 'name'
-                    else:
+                    if not ('id' in old[0] and 'id' in new[0]) and not ('name' in old[0] and 'name' in new[0]):
                         key = next(iter(old[0]))
                         new = sorted(new, key=lambda x: x.get(key, None))
                         old = sorted(old, key=lambda x: x.get(key, None))
                 else:
                     new = sorted(new)
                     old = sorted(old)
+                item_path = path + ('*',)
                 for i in range(len(new)):
-                    if not self.default_compare(modifiers, new[i], old[i], path + '/*', result):
+                    if not self._compare(plan, new[i], old[i], item_path, result):
                         comparison_result = False
             return comparison_result
         else:
-            updatable = modifiers.get(path, {}).get('updatable', True)
-            comparison = modifiers.get(path, {}).get('comparison', 'default')
+            updatable, comparison = plan.get(path, (True, 'default'))
             if comparison == 'ignore':
                 return True
+            if type(new) is type(old) and new == old:
+                return True
             elif comparison == 'default' or comparison == 'sensitive':
                 if isinstance(old, string_types) and isinstance(new, string_types):
                     new = new.lower()
@@ -201,11 +288,11 @@ class AzureRMModuleBaseExt(AzureRMModuleBase):
                     new = new.replace(' ', '').lower()
                     old = old.replace(' ', '').lower()
             if str(new) != str(old):
-                result['compare'].append('changed [' + path + '] ' + str(new) + ' != ' + str(old) + ' - ' + str(comparison))
+                result['compare'].append('changed [' + '/'.join(path) + '] ' + str(new) + ' != ' + str(old) + ' - ' + str(comparison))
                 if updatable:
                     return False
                 else:
-                    self.module.warn("property '" + path + "' cannot be updated (" + str(old) + "->" + str(new) + ")")
+                    self.module.warn("property '" + '/'.join(path) + "' cannot be updated (" + str(old) + "->" + str(new) + ")")
                     return True
             else:
                 return True
@@ -2,7 +2,10 @@
 #
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import time
+
 from ansible.module_utils.ansible_release import __version__ as ANSIBLE_VERSION
+from ansible.module_utils.six.moves.urllib.parse import parse_qsl, urlsplit
 
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -19,6 +22,8 @@ except ImportError:
 
 ANSIBLE_USER_AGENT = 'Ansible/{0}'.format(ANSIBLE_VERSION)
 
+FINISHED_STATES = ['succeeded', 'failed', 'canceled', 'cancelled']
+
 
 class GenericRestClientConfiguration(AzureConfiguration):
 
@@ -46,8 +51,7 @@ class GenericRestClient(object):
         self._client = ServiceClient(self.config.credentials, self.config)
         self.models = None
 
-    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, polling_timeout, polling_interval):
-        # Construct and send request
+    def _send(self, url, method, query_parameters, header_parameters, body):
         operation_config = {}
 
         request = None
@@ -72,7 +76,13 @@ class GenericRestClient(object):
         elif method == 'MERGE':
             request = self._client.merge(url, query_parameters)
 
-        response = self._client.send(request, header_parameters, body, **operation_config)
+        return self._client.send(request, header_parameters, body, **operation_config)
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, polling_timeout, polling_interval):
+        # Construct and send request
+        operation_config = {}
+
+        response = self._send(url, method, query_parameters, header_parameters, body)
 
         if response.status_code not in expected_status_codes:
             exp = CloudError(response)
@@ -95,3 +105,135 @@ class GenericRestClient(object):
             return poller.result()
         except Exception as exc:
             raise
+
+    def submit(self, url, method, query_parameters, header_parameters, body, expected_status_codes):
+        """
+        Send a request without waiting for the long running operation it may start.
+
+        :return: GenericRestOperation, to be passed to wait_all() if not done
+        """
+        response = self._send(url, method, query_parameters, header_parameters, body)
+
+        if response.status_code not in expected_status_codes:
+            exp = CloudError(response)
+            exp.request_id = response.headers.get('x-ms-request-id')
+            raise exp
+
+        return GenericRestOperation(url, method, response, query_parameters)
+
+    def wait_all(self, operations, timeout, polling_interval=5):
+        """
+        Wait for many long running operations, polling them on one shared session.
+
+        Each operation is polled on its own Azure-AsyncOperation or Location URL, no sooner than its Retry-After header
+        allows. Operations are yielded as they finish, failed ones with their error set. Operations still running when
+        the timeout expires are not yielded and stay not done.
+
+        :param operations: list of GenericRestOperation returned by submit()
+        :param timeout: seconds to wait for all operations
+        :param polling_interval: seconds between polls of an operation not sending Retry-After
+        """
+        deadline = time.time() + timeout
+        pending = []
+        for operation in operations:
+            if operation.done:
+                yield operation
+            else:
+                pending.append(operation)
+        if not pending:
+            return
+
+        with self._client:
+            while pending:
+                now = time.time()
+                if now >= deadline:
+                    return
+                ready = [operation for operation in pending if operation.next_poll <= now]
+                if not ready:
+                    time.sleep(min(min(operation.next_poll for operation in pending), deadline) - now)
+                    continue
+                for operation in ready:
+                    try:
+                        self._poll(operation, polling_interval)
+                    except Exception as exc:
+                        operation.error = exc
+                        operation.done = True
+                    if operation.done:
+                        pending.remove(operation)
+                        yield operation
+
+    def _poll(self, operation, polling_interval):
+        response = self._send(operation.polling_url, 'GET', {}, None, None)
+        if response.status_code not in [200, 201, 202, 204]:
+            raise CloudError(response)
+
+        if operation.polling_kind == 'async':
+            status = json.loads(response.text).get('status', '') if response.text else ''
+            if status.lower() not in FINISHED_STATES:
+                operation.schedule(response, polling_interval)
+                return
+            if status.lower() != 'succeeded':
+                raise CloudError(response, error="Long running operation {0}".format(status))
+            if operation.method in ['PUT', 'PATCH']:
+                operation.result = self._send(operation.url, 'GET', operation.final_query_parameters(operation.url), None, None)
+            elif operation.location_url:
+                operation.result = self._send(operation.location_url, 'GET', operation.final_query_parameters(operation.location_url),
+                                              None, None)
+            else:
+                operation.result = response
+        elif response.status_code == 202:
+            operation.schedule(response, polling_interval)
+            return
+        else:
+            operation.result = response
+        operation.done = True
+
+
+class GenericRestOperation(object):
+    """
+    Handle of a request sent by GenericRestClient.submit().
+
+    When done, result holds the final response, or error the exception that ended the operation.
+    """
+
+    def __init__(self, url, method, response, query_parameters=None):
+        self.url = url
+        self.method = method
+        self.response = response
+        self.query_parameters = query_parameters or {}
+        self.result = None
+        self.error = None
+        self.async_url = response.headers.get('Azure-AsyncOperation')
+        self.location_url = response.headers.get('Location')
+        self.next_poll = 0
+        if self.async_url:
+            self.polling_kind = 'async'
+            self.polling_url = self.async_url
+        elif response.status_code == 202 and self.location_url:
+            self.polling_kind = 'location'
+            self.polling_url = self.location_url
+        else:
+            self.polling_kind = None
+            self.polling_url = None
+        self.done = self.polling_url is None
+        if self.done:
+            self.result = response
+        else:
+            self.schedule(response, 0)
+
+    def final_query_parameters(self, url):
+        """
+        Query parameters of the request, such as api-version, for the GET of its result at url, unless url has them.
+        """
+        present = set(name.lower() for name, value in parse_qsl(urlsplit(url).query, keep_blank_values=True))
+        return dict((name, value) for name, value in self.query_parameters.items() if name.lower() not in present)
+
+    def schedule(self, response, polling_interval):
+        delay = polling_interval
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = int(retry_after)
+            except ValueError:
+                pass
+        self.next_poll = time.time() + delay
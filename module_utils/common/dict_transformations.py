@@ -10,6 +10,47 @@ __metaclass__ = type
 import re
 from copy import deepcopy
 
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2
+    lru_cache = None
+
+
+# number of converted keys remembered by each conversion
+KEY_CACHE_SIZE = 4096
+
+_UPPER_PATTERN = re.compile(r'[A-Z]')
+# Cope with pluralized abbreviations such as TargetGroupARNs
+# that would otherwise be rendered target_group_ar_ns
+_PLURAL_PATTERN = re.compile(r'[A-Z]{3,}s$')
+# Remainder of solution seems to be https://stackoverflow.com/a/1176023
+_FIRST_CAP_PATTERN = re.compile(r'(.)([A-Z][a-z]+)')
+_ALL_CAP_PATTERN = re.compile(r'([a-z0-9])([A-Z]+)')
+
+
+def _key_cache(func):
+    '''
+    Bounded LRU cache of key conversions, keyed by the type and value of the arguments.
+    '''
+    if lru_cache is not None:
+        return lru_cache(maxsize=KEY_CACHE_SIZE, typed=True)(func)
+
+    cache = {}
+
+    def wrapper(name, flag):
+        key = (type(name), name, flag)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        result = func(name, flag)
+        if len(cache) >= KEY_CACHE_SIZE:
+            cache.clear()
+        cache[key] = result
+        return result
+    return wrapper
+
 
 def camel_dict_to_snake_dict(camel_dict, reversible=False, ignore_list=()):
     """
@@ -24,28 +65,29 @@ def camel_dict_to_snake_dict(camel_dict, reversible=False, ignore_list=()):
     particularly important for tags, where keys are case-sensitive. We convert
     the 'Tags' key but nothing below.
     """
-
-    def value_is_list(camel_list):
-
-        checked_list = []
-        for item in camel_list:
-            if isinstance(item, dict):
-                checked_list.append(camel_dict_to_snake_dict(item, reversible))
-            elif isinstance(item, list):
-                checked_list.append(value_is_list(item))
-            else:
-                checked_list.append(item)
-
-        return checked_list
-
+    convert = _convert_camel_to_snake
     snake_dict = {}
-    for k, v in camel_dict.items():
-        if isinstance(v, dict) and k not in ignore_list:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = camel_dict_to_snake_dict(v, reversible)
-        elif isinstance(v, list) and k not in ignore_list:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = value_is_list(v)
+    # dicts and lists still to be converted, with the empty copies to fill,
+    # walked without recursion so deeply nested payloads do not exhaust the stack
+    pending = [(camel_dict, snake_dict, ignore_list)]
+    while pending:
+        source, target, ignored = pending.pop()
+        if isinstance(target, dict):
+            for k, v in source.items():
+                key = convert(k, reversible)
+                if isinstance(v, (dict, list)) and k not in ignored:
+                    target[key] = {} if isinstance(v, dict) else []
+                    # ignore_list only applies to the top level
+                    pending.append((v, target[key], ()))
+                else:
+                    target[key] = v
         else:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = v
+            for item in source:
+                if isinstance(item, (dict, list)):
+                    target.append({} if isinstance(item, dict) else [])
+                    pending.append((item, target[-1], ()))
+                else:
+                    target.append(item)
 
     return snake_dict
 
@@ -56,25 +98,42 @@ def snake_dict_to_camel_dict(snake_dict, capitalize_first=False):
     rather than true CamelCase. Passing capitalize_first=True returns
     CamelCase. The default remains False as that was the original implementation
     """
-
-    def camelize(complex_type, capitalize_first=False):
-        if complex_type is None:
-            return
-        new_type = type(complex_type)()
-        if isinstance(complex_type, dict):
-            for key in complex_type:
-                new_type[_snake_to_camel(key, capitalize_first)] = camelize(complex_type[key], capitalize_first)
-        elif isinstance(complex_type, list):
-            for i in range(len(complex_type)):
-                new_type.append(camelize(complex_type[i], capitalize_first))
+    if not isinstance(snake_dict, (dict, list)):
+        return snake_dict
+
+    convert = _convert_snake_to_camel
+    # dicts and lists keep their type, e.g. OrderedDict
+    camel_dict = type(snake_dict)()
+    pending = [(snake_dict, camel_dict)]
+    while pending:
+        source, target = pending.pop()
+        if isinstance(source, dict):
+            for key in source:
+                value = source[key]
+                if isinstance(value, (dict, list)):
+                    new_value = type(value)()
+                    pending.append((value, new_value))
+                else:
+                    new_value = value
+                target[convert(key, capitalize_first)] = new_value
         else:
-            return complex_type
-        return new_type
+            for value in source:
+                if isinstance(value, (dict, list)):
+                    new_value = type(value)()
+                    pending.append((value, new_value))
+                else:
+                    new_value = value
+                target.append(new_value)
 
-    return camelize(snake_dict, capitalize_first)
+    return camel_dict
 
 
 def _snake_to_camel(snake, capitalize_first=False):
+    return _convert_snake_to_camel(snake, capitalize_first)
+
+
+@_key_cache
+def _convert_snake_to_camel(snake, capitalize_first):
     if capitalize_first:
         return ''.join(x.capitalize() or '_' for x in snake.split('_'))
     else:
@@ -82,29 +141,25 @@ def _snake_to_camel(snake, capitalize_first=False):
 
 
 def _camel_to_snake(name, reversible=False):
+    return _convert_camel_to_snake(name, reversible)
 
-    def prepend_underscore_and_lower(m):
-        return '_' + m.group(0).lower()
 
-    if reversible:
-        upper_pattern = r'[A-Z]'
-    else:
-        # Cope with pluralized abbreviations such as TargetGroupARNs
-        # that would otherwise be rendered target_group_ar_ns
-        upper_pattern = r'[A-Z]{3,}s$'
+def _prepend_underscore_and_lower(m):
+    return '_' + m.group(0).lower()
+
 
-    s1 = re.sub(upper_pattern, prepend_underscore_and_lower, name)
+@_key_cache
+def _convert_camel_to_snake(name, reversible):
+    upper_pattern = _UPPER_PATTERN if reversible else _PLURAL_PATTERN
+    s1 = upper_pattern.sub(_prepend_underscore_and_lower, name)
     # Handle when there was nothing before the plural_pattern
     if s1.startswith("_") and not name.startswith("_"):
         s1 = s1[1:]
     if reversible:
         return s1
 
-    # Remainder of solution seems to be https://stackoverflow.com/a/1176023
-    first_cap_pattern = r'(.)([A-Z][a-z]+)'
-    all_cap_pattern = r'([a-z0-9])([A-Z]+)'
-    s2 = re.sub(first_cap_pattern, r'\1_\2', s1)
-    return re.sub(all_cap_pattern, r'\1_\2', s2).lower()
+    s2 = _FIRST_CAP_PATTERN.sub(r'\1_\2', s1)
+    return _ALL_CAP_PATTERN.sub(r'\1_\2', s2).lower()
 
 
 def dict_merge(a, b):
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Benchmark AzureRMModuleBaseExt.create_compare_modifiers and default_compare.
+
+Each body is compared against an identical copy and against a copy with one changed leaf.
+Without arguments, bodies shaped like Application Gateway and Cosmos DB responses are generated.
+Recorded bodies, e.g. saved GET responses, can be passed as JSON files instead.
+
+    python tests/perf/bench_default_compare.py [--baseline old/azure_rm_common_ext.py] [body.json ...]
+
+With --baseline, the same benchmark is run against another copy of azure_rm_common_ext.py,
+for example one extracted with git show, and the results of both are checked to be equal.
+"""
+
+import argparse
+import copy
+import types
+
+from perf_utils import bench, load_bodies, load_module_utils
+
+
+def app_gateway_body(size):
+    sub = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg/providers/Microsoft.Network/applicationGateways/gw'
+    return {
+        'location': 'West US',
+        'tags': {'env': 'perf'},
+        'properties': {
+            'sku': {'name': 'Standard_Medium', 'tier': 'Standard', 'capacity': 2},
+            'gatewayIPConfigurations': [{'name': 'gwip', 'properties': {'subnet': {'id': sub + '/subnet'}}}],
+            'frontendPorts': [{'name': 'port{0}'.format(i), 'properties': {'port': 8000 + i}} for i in range(size)],
+            'backendAddressPools': [{'name': 'pool{0}'.format(i),
+                                     'properties': {'backendAddresses': [{'ipAddress': '10.0.{0}.{1}'.format(i, j)} for j in range(4)]}}
+                                    for i in range(size)],
+            'backendHttpSettingsCollection': [{'name': 'settings{0}'.format(i),
+                                               'properties': {'port': 80, 'protocol': 'Http', 'cookieBasedAffinity': 'Disabled',
+                                                              'requestTimeout': 30, 'pickHostNameFromBackendAddress': False}}
+                                              for i in range(size)],
+            'httpListeners': [{'name': 'listener{0}'.format(i),
+                               'properties': {'frontendIPConfiguration': {'id': sub + '/frontendIPConfigurations/fe'},
+                                              'frontendPort': {'id': sub + '/frontendPorts/port{0}'.format(i)},
+                                              'protocol': 'Http', 'requireServerNameIndication': False}}
+                              for i in range(size)],
+            'requestRoutingRules': [{'name': 'rule{0}'.format(i),
+                                     'properties': {'ruleType': 'Basic',
+                                                    'httpListener': {'id': sub + '/httpListeners/listener{0}'.format(i)},
+                                                    'backendAddressPool': {'id': sub + '/backendAddressPools/pool{0}'.format(i)},
+                                                    'backendHttpSettings': {'id': sub + '/backendHttpSettingsCollection/settings{0}'.format(i)}}}
+                                    for i in range(size)],
+        }
+    }
+
+
+def cosmosdb_body(size):
+    return {
+        'location': 'eastus',
+        'kind': 'GlobalDocumentDB',
+        'properties': {
+            'databaseAccountOfferType': 'Standard',
+            'consistencyPolicy': {'defaultConsistencyLevel': 'Session', 'maxIntervalInSeconds': 5, 'maxStalenessPrefix': 100},
+            'locations': [{'locationName': 'region {0}'.format(i), 'failoverPriority': i, 'isZoneRedundant': False} for i in range(size)],
+            'ipRangeFilter': ','.join('10.0.0.{0}'.format(i) for i in range(size)),
+            'isVirtualNetworkFilterEnabled': True,
+            'virtualNetworkRules': [{'id': '/subscriptions/x/resourceGroups/rg/providers/Microsoft.Network/virtualNetworks/vnet/subnets/s{0}'.format(i),
+                                     'ignoreMissingVNetServiceEndpoint': False} for i in range(size)],
+            'enableAutomaticFailover': True,
+        }
+    }
+
+
+APP_GATEWAY_SPEC = dict(
+    location=dict(type='str', comparison='location', updatable=False, disposition='/'),
+    tags=dict(type='dict', disposition='/'),
+    sku=dict(type='dict', disposition='/properties/sku', options=dict(
+        name=dict(type='str'), tier=dict(type='str'), capacity=dict(type='int'))),
+    backend_address_pools=dict(type='list', disposition='/properties/backendAddressPools', options=dict(
+        name=dict(type='str'),
+        backend_addresses=dict(type='list', disposition='properties/backendAddresses', options=dict(
+            ip_address=dict(type='str', disposition='ipAddress'))))),
+    request_routing_rules=dict(type='list', disposition='/properties/requestRoutingRules', options=dict(
+        name=dict(type='str'),
+        rule_type=dict(type='str', disposition='properties/ruleType', updatable=False))),
+)
+
+
+def change_one_leaf(body):
+    changed = copy.deepcopy(body)
+    node = changed['properties']
+    for value in node.values():
+        if isinstance(value, list) and value:
+            item = value[-1]
+            key = sorted(item.keys())[-1]
+            item[key] = 'changed'
+            break
+    return changed
+
+
+def make_instance(module):
+    instance = module.AzureRMModuleBaseExt.__new__(module.AzureRMModuleBaseExt)
+    instance.module = types.SimpleNamespace(warn=lambda msg: None)
+    return instance
+
+
+def run(label, module, bodies, number):
+    instance = make_instance(module)
+    outcomes = []
+    bench('{0} create_compare_modifiers'.format(label),
+          lambda: instance.create_compare_modifiers(APP_GATEWAY_SPEC, '', {}), number * 10)
+    modifiers = {}
+    instance.create_compare_modifiers(APP_GATEWAY_SPEC, '', modifiers)
+    for name, body in bodies:
+        for case, other in [('identical', copy.deepcopy(body)), ('one change', change_one_leaf(body))]:
+            result = dict(compare=[])
+            outcomes.append((instance.default_compare(modifiers, copy.deepcopy(body), other, '', result), result['compare']))
+            bench('{0} {1} {2}'.format(label, name, case),
+                  lambda: instance.default_compare(modifiers, body, other, '', dict(compare=[])), number)
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', help='another azure_rm_common_ext.py to compare with')
+    parser.add_argument('--number', type=int, default=20, help='calls per timing run')
+    parser.add_argument('--size', type=int, default=200, help='items per list of generated bodies')
+    parser.add_argument('bodies', nargs='*', help='recorded JSON bodies')
+    args = parser.parse_args()
+
+    load_module_utils('azure_rm_common')
+    bodies = load_bodies(args.bodies) if args.bodies else [('appgateway', app_gateway_body(args.size)),
+                                                            ('cosmosdb', cosmosdb_body(args.size))]
+
+    outcomes = run('current', load_module_utils('azure_rm_common_ext'), bodies, args.number)
+    if args.baseline:
+        baseline = run('baseline', load_module_utils('azure_rm_common_ext_baseline', args.baseline), bodies, args.number)
+        if baseline != outcomes:
+            raise SystemExit('baseline and current comparisons differ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Benchmark camel_dict_to_snake_dict and snake_dict_to_camel_dict of module_utils/common/dict_transformations.py.
+
+Without arguments, a list response shaped like virtual machines is generated and converted to
+snake case and back. Recorded bodies, e.g. saved GET responses, can be passed as JSON files instead.
+
+    python tests/perf/bench_dict_transformations.py [--baseline old/dict_transformations.py] [body.json ...]
+
+With --baseline, the same conversions are run against another copy of dict_transformations.py,
+for example one extracted with git show, and the results of both, including key order and
+container types, are checked to be equal.
+"""
+
+import argparse
+import collections
+import copy
+import json
+import os
+import sys
+
+from perf_utils import MODULE_UTILS, bench, load_bodies, load_module_utils
+
+
+def virtual_machines_body(size):
+    sub = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg/providers'
+    return {
+        'value': [{
+            'id': sub + '/Microsoft.Compute/virtualMachines/vm{0}'.format(i),
+            'name': 'vm{0}'.format(i),
+            'location': 'westus',
+            'tags': {'CostCenter': 'perf', 'ownerEmail': 'perf@example.com'},
+            'properties': {
+                'vmId': '{0:08d}'.format(i),
+                'hardwareProfile': {'vmSize': 'Standard_D2s_v3'},
+                'storageProfile': {
+                    'imageReference': {'publisher': 'Canonical', 'offer': 'UbuntuServer', 'sku': '18.04-LTS', 'version': 'latest'},
+                    'osDisk': {'osType': 'Linux', 'createOption': 'FromImage', 'diskSizeGB': 30,
+                               'managedDisk': {'storageAccountType': 'Premium_LRS', 'id': sub + '/disks/os{0}'.format(i)}},
+                    'dataDisks': [{'lun': j, 'createOption': 'Empty', 'diskSizeGB': 128} for j in range(2)],
+                },
+                'osProfile': {'computerName': 'vm{0}'.format(i), 'adminUsername': 'azureuser',
+                              'linuxConfiguration': {'disablePasswordAuthentication': True, 'provisionVMAgent': True}},
+                'networkProfile': {'networkInterfaces': [{'id': sub + '/networkInterfaces/nic{0}'.format(i),
+                                                          'properties': {'primary': True}}]},
+                'diagnosticsProfile': {'bootDiagnostics': {'enabled': False}},
+                'provisioningState': 'Succeeded',
+                'targetGroupARNs': ['arn{0}'.format(i)],
+                'HTTPEndpoint': None,
+            },
+        } for i in range(size)]
+    }
+
+
+def nested_body(depth):
+    body = leaf = collections.OrderedDict()
+    for i in range(depth):
+        leaf['nextLevel'] = collections.OrderedDict([('levelIndex', i)])
+        leaf = leaf['nextLevel']
+    return body
+
+
+def describe(value):
+    '''
+    Result as a comparable value which keeps key order and container types.
+    '''
+    if isinstance(value, dict):
+        return type(value).__name__, [(k, describe(v)) for k, v in value.items()]
+    if isinstance(value, list):
+        return type(value).__name__, [describe(v) for v in value]
+    return value
+
+
+def run(label, module, bodies, number):
+    outcomes = []
+    for name, body in bodies:
+        for reversible in (False, True):
+            snake = module.camel_dict_to_snake_dict(body, reversible, ignore_list=['tags'])
+            camel = module.snake_dict_to_camel_dict(snake, reversible)
+            outcomes.append((describe(snake), describe(camel)))
+        bench('{0} {1} camel_dict_to_snake_dict'.format(label, name),
+              lambda: module.camel_dict_to_snake_dict(body, ignore_list=['tags']), number)
+        bench('{0} {1} snake_dict_to_camel_dict'.format(label, name),
+              lambda: module.snake_dict_to_camel_dict(snake), number)
+    try:
+        depth = sys.getrecursionlimit() * 2
+        module.snake_dict_to_camel_dict(module.camel_dict_to_snake_dict(nested_body(depth)))
+        print('{0} converted a body nested {1} levels deep'.format(label, depth))
+    except RuntimeError:
+        # RecursionError on Python 3
+        print('{0} exceeded the recursion limit on a body nested {1} levels deep'.format(label, depth))
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', help='another dict_transformations.py to compare with')
+    parser.add_argument('--number', type=int, default=1, help='calls per timing run')
+    parser.add_argument('--size', type=int, default=10000, help='items of the generated list response')
+    parser.add_argument('bodies', nargs='*', help='recorded JSON bodies')
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.bodies) if args.bodies else [('virtualmachines', virtual_machines_body(args.size))]
+    bodies.append(('ordered', json.loads(json.dumps(bodies[0][1]), object_pairs_hook=collections.OrderedDict)))
+
+    current = load_module_utils('dict_transformations', os.path.join(MODULE_UTILS, 'common', 'dict_transformations.py'))
+    outcomes = run('current', current, bodies, args.number)
+    if args.baseline:
+        baseline = run('baseline', load_module_utils('dict_transformations_baseline', args.baseline), copy.deepcopy(bodies), args.number)
+        if baseline != outcomes:
+            raise SystemExit('baseline and current conversions differ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Check and benchmark AzureRMModuleBaseExt.inflate_parameters and normalize_resource_id.
+
+Parameters shaped like azure_rm_appgateway options are inflated, and a set of resource ids,
+names, dicts and malformed values is normalized against patterns of nested resources.
+
+    python tests/perf/bench_inflate_parameters.py [--baseline old/azure_rm_common_ext.py]
+
+Every run first checks the results, including raised errors, against fixtures/inflate_parameters.json,
+recorded with the split based implementation these methods had before patterns were compiled.
+--record rewrites the fixtures with the results of --baseline, or of the current module_utils.
+
+With --baseline, the same cases are run against another copy of azure_rm_common_ext.py,
+for example one extracted with git show, and every result is checked to be equal.
+Randomly generated cases are added to the fixed ones, see --cases and --seed.
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import types
+
+from perf_utils import bench, load_module_utils
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+GATEWAY_ID = '/subscriptions/{0}/resourceGroups/rg/providers/Microsoft.Network/applicationGateways/gw'.format(SUBSCRIPTION_ID)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'inflate_parameters.json')
+FIXTURE_CASES = 26
+
+PATTERNS = [
+    '/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Network/virtualNetworks/{name}',
+    '/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Network/virtualNetworks/{virtual_network}/subnets/{name}',
+    '/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Network/applicationGateways/{gateway}/httpListeners/{name}',
+    '/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.Network/publicIPAddresses/{name}',
+]
+
+VALUES = [
+    'name',
+    'Name-With.Dots',
+    '',
+    '/subscriptions/{0}/resourceGroups/other/providers/Microsoft.Network/virtualNetworks/vnet'.format(SUBSCRIPTION_ID),
+    '/SUBSCRIPTIONS/{0}/RESOURCEGROUPS/other/PROVIDERS/microsoft.network/VIRTUALNETWORKS/vnet'.format(SUBSCRIPTION_ID),
+    '/subscriptions/{0}/resourceGroups/other/providers/Microsoft.Network/virtualNetworks/vnet/subnets/default'.format(SUBSCRIPTION_ID),
+    '/subscriptions/{0}/resourceGroups/other/providers/Microsoft.Network/publicIPAddresses/ip'.format(SUBSCRIPTION_ID),
+    GATEWAY_ID + '/httpListeners/listener',
+    '/subscriptions//resourceGroups//providers/Microsoft.Network/virtualNetworks/',
+    'rg/vnet',
+    '/a/b/c',
+    {'name': 'vnet'},
+    {'name': 'vnet', 'resource_group': 'other'},
+    {'name': 'default', 'virtual_network': 'vnet', 'subscription_id': 'sub'},
+    {'name': 'listener', 'gateway': 'gw', 'resource_group': ''},
+    {'name': 'vnet', 'unknown': 'x'},
+    None,
+    42,
+    ['vnet'],
+]
+
+APP_GATEWAY_SPEC = dict(
+    resource_group=dict(type='str', required=True),
+    name=dict(type='str', required=True),
+    location=dict(type='str', disposition='/'),
+    tags=dict(type='dict', disposition='/'),
+    sku=dict(type='dict', disposition='/properties/sku', options=dict(
+        name=dict(type='str'), tier=dict(type='str'), capacity=dict(type='int'))),
+    gateway_ip_configurations=dict(type='list', disposition='/properties/gatewayIPConfigurations', options=dict(
+        name=dict(type='str'),
+        subnet=dict(type='raw', disposition='properties/subnet/id', pattern=PATTERNS[1]))),
+    frontend_ip_configurations=dict(type='list', disposition='/properties/frontendIPConfigurations', options=dict(
+        name=dict(type='str'),
+        private_ip_address=dict(type='str', disposition='properties/privateIPAddress'),
+        private_ip_allocation_method=dict(type='str', disposition='properties/privateIPAllocationMethod', pattern='camelize'),
+        public_ip_address=dict(type='raw', disposition='properties/publicIPAddress/id', pattern=PATTERNS[3]),
+        subnet=dict(type='raw', disposition='properties/subnet/id', pattern=[PATTERNS[1], PATTERNS[0]]),
+        unused=dict(type='str', purgeIfNone=True))),
+    backend_address_pools=dict(type='list', disposition='/properties/backendAddressPools', options=dict(
+        name=dict(type='str'),
+        backend_addresses=dict(type='list', disposition='properties/backendAddresses', options=dict(
+            ip_address=dict(type='str', disposition='ipAddress'),
+            fqdn=dict(type='str'))))),
+    request_routing_rules=dict(type='list', disposition='/properties/requestRoutingRules', options=dict(
+        name=dict(type='str'),
+        rule_type=dict(type='str', disposition='properties/ruleType'),
+        http_listener=dict(type='raw', disposition='properties/httpListener/id', pattern=PATTERNS[2]))),
+    enable_http2=dict(type='bool', disposition='/properties/*'),
+)
+
+
+def app_gateway_parameters(size, rng=None):
+    def pick(values):
+        return rng.choice(values) if rng else values[0]
+
+    return dict(
+        resource_group='rg',
+        name='gw',
+        location='westus',
+        tags=dict(env='perf'),
+        sku=dict(name='standard_medium', tier='standard', capacity=2),
+        gateway_ip_configurations=[dict(name='gwip{0}'.format(i), subnet=pick(VALUES[5:] + VALUES[:5])) for i in range(size)],
+        frontend_ip_configurations=[dict(name='fe{0}'.format(i), private_ip_address='10.0.0.{0}'.format(i),
+                                         private_ip_allocation_method=pick(['static', 'dynamic']),
+                                         public_ip_address=pick([VALUES[0]] + VALUES),
+                                         subnet=pick([VALUES[5]] + VALUES), unused=pick([None, 'x']))
+                                    for i in range(size)],
+        backend_address_pools=[dict(name='pool{0}'.format(i),
+                                    backend_addresses=[dict(ip_address='10.0.{0}.{1}'.format(i, j), fqdn=None) for j in range(4)])
+                               for i in range(size)],
+        request_routing_rules=[dict(name='rule{0}'.format(i), rule_type='Basic',
+                                    http_listener=pick([GATEWAY_ID + '/httpListeners/listener{0}'.format(i)] + VALUES)) for i in range(size)],
+        enable_http2=pick([True, None]),
+    )
+
+
+def make_instance(module):
+    instance = module.AzureRMModuleBaseExt.__new__(module.AzureRMModuleBaseExt)
+    instance.module = types.SimpleNamespace(warn=lambda msg: None)
+    instance.azure_auth = types.SimpleNamespace(subscription_id=SUBSCRIPTION_ID)
+    instance.resource_group = 'rg'
+    return instance
+
+
+def outcome(func, *args):
+    try:
+        return func(*args)
+    except Exception as exc:
+        # e.g. KeyError for placeholders of a pattern missing from the value
+        return type(exc).__name__, str(exc)
+
+
+def normalize_all(instance):
+    return [outcome(instance.normalize_resource_id, copy.deepcopy(value), pattern) for pattern in PATTERNS for value in VALUES]
+
+
+def as_json(value):
+    # results as loaded from the fixtures, e.g. tuples become lists
+    return json.loads(json.dumps(value))
+
+
+def record(module):
+    instance = make_instance(module)
+    rng = random.Random(0)
+    fixtures = dict(normalize_resource_id=[], inflate_parameters=[])
+    for pattern in PATTERNS:
+        for value in VALUES:
+            fixtures['normalize_resource_id'].append(dict(
+                pattern=pattern, value=value, expected=outcome(instance.normalize_resource_id, copy.deepcopy(value), pattern)))
+    for i in range(FIXTURE_CASES):
+        # without the values shared between items of the generated parameters, as when loaded again
+        parameters = as_json(app_gateway_parameters(rng.randint(0, 5), rng))
+        body = copy.deepcopy(parameters)
+        result = outcome(instance.inflate_parameters, APP_GATEWAY_SPEC, body, 0)
+        fixtures['inflate_parameters'].append(dict(parameters=parameters, expected=[result, body]))
+    return as_json(fixtures)
+
+
+def check(module, fixtures):
+    instance = make_instance(module)
+    failures = []
+    for case in fixtures['normalize_resource_id']:
+        result = as_json(outcome(instance.normalize_resource_id, copy.deepcopy(case['value']), case['pattern']))
+        if result != case['expected']:
+            failures.append('normalize_resource_id({0!r}, {1!r}) returned {2!r}, expected {3!r}'.format(
+                case['value'], case['pattern'], result, case['expected']))
+    for index, case in enumerate(fixtures['inflate_parameters']):
+        body = copy.deepcopy(case['parameters'])
+        result = as_json([outcome(instance.inflate_parameters, APP_GATEWAY_SPEC, body, 0), body])
+        if result != case['expected']:
+            failures.append('inflate_parameters case {0} returned {1!r}, expected {2!r}'.format(index, result, case['expected']))
+    return failures
+
+
+def run(label, module, cases, size, number):
+    instance = make_instance(module)
+    outcomes = [normalize_all(instance)]
+    for parameters in cases:
+        body = copy.deepcopy(parameters)
+        outcomes.append((outcome(instance.inflate_parameters, APP_GATEWAY_SPEC, body, 0), body))
+    bench('{0} normalize_resource_id'.format(label), lambda: normalize_all(instance), number * 10)
+    parameters = app_gateway_parameters(size)
+    bench('{0} inflate_parameters'.format(label),
+          lambda: instance.inflate_parameters(APP_GATEWAY_SPEC, copy.deepcopy(parameters), 0), number)
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', help='another azure_rm_common_ext.py to compare with')
+    parser.add_argument('--number', type=int, default=20, help='calls per timing run')
+    parser.add_argument('--size', type=int, default=100, help='items per list of generated parameters')
+    parser.add_argument('--cases', type=int, default=200, help='randomly generated parameters to cross-check')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated parameters')
+    parser.add_argument('--record', action='store_true', help='rewrite the fixtures instead of checking them')
+    args = parser.parse_args()
+
+    load_module_utils('azure_rm_common')
+    current = load_module_utils('azure_rm_common_ext')
+    if args.record:
+        source = load_module_utils('azure_rm_common_ext_baseline', args.baseline) if args.baseline else current
+        with open(FIXTURES, 'w') as f:
+            json.dump(record(source), f, indent=1, sort_keys=True)
+            f.write('\n')
+        print('recorded {0}'.format(FIXTURES))
+        return
+
+    with open(FIXTURES) as f:
+        fixtures = json.load(f)
+    failures = check(current, fixtures)
+    for failure in failures:
+        print(failure)
+    if failures:
+        raise SystemExit('{0} of {1} fixture cases differ'.format(
+            len(failures), len(fixtures['normalize_resource_id']) + len(fixtures['inflate_parameters'])))
+    print('{0} fixture cases are equal'.format(len(fixtures['normalize_resource_id']) + len(fixtures['inflate_parameters'])))
+
+    rng = random.Random(args.seed)
+    cases = [app_gateway_parameters(args.size)] + [app_gateway_parameters(rng.randint(0, 5), rng) for i in range(args.cases)]
+
+    outcomes = run('current', current, cases, args.size, args.number)
+    if args.baseline:
+        baseline = run('baseline', load_module_utils('azure_rm_common_ext_baseline', args.baseline), cases, args.size, args.number)
+        if baseline != outcomes:
+            raise SystemExit('baseline and current results differ')
+        print('{0} cases are equal'.format(len(outcomes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Check GenericRestClient.submit and wait_all against the perf server.
+
+A PUT and a POST starting long running operations are submitted and waited for. The final GET
+of each result must carry the api-version of the request, ARM rejects it otherwise.
+
+    python tests/perf/check_rest_client.py
+"""
+
+import sys
+
+from fake_arm import FakeARMServer, SUBSCRIPTION_ID, redirect_requests
+from perf_utils import load_module_utils
+
+API_VERSION = '2019-01-01'
+RESOURCE = '/subscriptions/{0}/resourceGroups/rg/providers/Microsoft.Perf/widgets/widget'.format(SUBSCRIPTION_ID)
+RESULT = '/subscriptions/{0}/providers/Microsoft.Perf/operationResults/result'.format(SUBSCRIPTION_ID)
+
+INTERACTIONS = [
+    {"method": "PUT", "path": RESOURCE, "lro": True, "body": {"name": "widget"}},
+    {"method": "GET", "path": RESOURCE, "query": {"api-version": API_VERSION},
+     "body": {"name": "widget", "properties": {"provisioningState": "Succeeded"}}},
+    {"method": "POST", "path": RESOURCE + "/restart", "lro": True,
+     "headers": {"Location": "https://management.azure.com{0}?api-version={1}".format(RESULT, API_VERSION)}, "body": ""},
+    {"method": "GET", "path": RESULT, "query": {"api-version": API_VERSION}, "body": {"status": "restarted"}},
+]
+
+
+def main():
+    from msrest.authentication import BasicTokenAuthentication
+    rest = load_module_utils('azure_rm_common_rest')
+
+    server = FakeARMServer(lro_polls=2).start()
+    redirect_requests(server.url)
+    server.load(INTERACTIONS)
+    client = rest.GenericRestClient(BasicTokenAuthentication(dict(access_token='perf')), SUBSCRIPTION_ID)
+    query_parameters = {'api-version': API_VERSION}
+
+    operations = [client.submit(RESOURCE, 'PUT', query_parameters, None, dict(location='westus'), [200, 201, 202]),
+                  client.submit(RESOURCE + '/restart', 'POST', query_parameters, None, None, [200, 202])]
+    finished = list(client.wait_all(operations, timeout=30, polling_interval=0))
+    server.stop()
+
+    failures = []
+    if len(finished) != len(operations):
+        failures.append('{0} of {1} operations finished'.format(len(finished), len(operations)))
+    for operation in operations:
+        if operation.error is not None:
+            failures.append('{0} {1} failed - {2}'.format(operation.method, operation.url, operation.error))
+        elif operation.result is None or operation.result.status_code != 200:
+            failures.append('{0} {1} has no result'.format(operation.method, operation.url))
+    for request in server.stats()['unmatched']:
+        failures.append('unexpected request {0}'.format(request))
+
+    for failure in failures:
+        print(failure)
+    print('{0} failures'.format(len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
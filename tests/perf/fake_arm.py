@@ -0,0 +1,285 @@
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Local HTTP stand-in for Azure Resource Manager, Azure AD, Key Vault and Blob endpoints.
+
+The server replays the interactions of a scenario file. Requests reach it through
+redirect_requests, which sends every request made with the requests library to the
+server, keeping the original host in the X-Perf-Host header. Hosts are matched by kind:
+
+    login       login.microsoftonline.com, always answered with a bearer token
+    management  management.azure.com
+    vault       *.vault.azure.net, answered with the Key Vault authentication challenge
+                until a bearer token is sent
+    blob        *.blob.core.windows.net
+
+An interaction matches on method, host kind and path, with fnmatch wildcards and
+{subscription_id} substituted, ignoring case and the query string unless 'query' is given:
+
+    {"method": "GET", "host": "management",
+     "path": "/subscriptions/{subscription_id}/resourceGroups/rg/providers/Microsoft.Network/networkSecurityGroups/*",
+     "status": 200, "headers": {}, "body": {...}}
+
+Instead of a single response, 'responses' may list several, served in turn with the last one
+repeated. 'generate' builds a list body of 'count' copies of a template, where {i} in strings
+is replaced by the index, split in pages of 'page_size' items linked with nextLink. 'lro' answers
+with an Azure-AsyncOperation header and 'status', by default 201 for PUT and 202 otherwise; the
+operation reports InProgress 'lro' times, or lro_polls times for true, with Retry-After, before
+Succeeded.
+
+Latency, throttling with 429 and Retry-After, and the number of LRO polls can be injected for
+all interactions, see FakeARMServer.
+"""
+
+import copy
+import fnmatch
+import itertools
+import json
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+    from urlparse import parse_qsl, urlsplit, urlunsplit
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+TENANT_ID = '11111111-1111-1111-1111-111111111111'
+HOST_HEADER = 'X-Perf-Host'
+OPERATIONS_PATH = '/perf/operations/'
+
+
+def host_kind(host):
+    host = host.split(':')[0].lower()
+    if host.startswith('login.'):
+        return 'login'
+    if '.vault.' in host:
+        return 'vault'
+    if '.blob.' in host:
+        return 'blob'
+    return 'management'
+
+
+def expand(value, index):
+    '''
+    Copy of a template with {i} replaced by index in every string.
+    '''
+    if isinstance(value, dict):
+        return dict((k, expand(v, index)) for k, v in value.items())
+    if isinstance(value, list):
+        return [expand(v, index) for v in value]
+    if isinstance(value, str) and '{i}' in value:
+        return value.replace('{i}', str(index))
+    return value
+
+
+class Interaction(object):
+
+    def __init__(self, spec, lro_polls):
+        self.spec = spec
+        self.method = spec.get('method', 'GET').upper()
+        self.host = spec.get('host', 'management')
+        self.path = spec['path'].replace('{subscription_id}', SUBSCRIPTION_ID).lower()
+        self.query = dict((k.lower(), v) for k, v in spec.get('query', {}).items())
+        self.responses = spec.get('responses') or [dict((k, spec[k]) for k in ('status', 'headers', 'body', 'generate') if k in spec)]
+        self.lro = spec.get('lro')
+        if self.lro is True:
+            self.lro = lro_polls
+        self.served = 0
+
+    def matches(self, method, host, path, query):
+        if method != self.method or host != self.host or not fnmatch.fnmatchcase(path.lower(), self.path):
+            return False
+        return all(query.get(k) == v for k, v in self.query.items())
+
+    def next_response(self):
+        response = self.responses[min(self.served, len(self.responses) - 1)]
+        self.served += 1
+        return response
+
+
+class FakeARMServer(ThreadingMixIn, HTTPServer):
+    '''
+    :param latency: seconds added to every response
+    :param throttle_every: answer every n-th request to management endpoints with 429
+    :param retry_after: Retry-After, in seconds, of throttled requests and LRO polls
+    :param lro_polls: InProgress answers of interactions with "lro": true
+    '''
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, throttle_every=0, retry_after=0, lro_polls=1):
+        HTTPServer.__init__(self, ('127.0.0.1', port), FakeARMHandler)
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.lro_polls = lro_polls
+        self.lock = threading.Lock()
+        self.operation_ids = itertools.count()
+        self.thread = None
+        self.load([])
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server_address[1])
+
+    def load(self, interactions):
+        '''
+        Replace the interactions and reset the counters.
+        '''
+        with self.lock:
+            self.interactions = [Interaction(spec, self.lro_polls) for spec in interactions]
+            self.operations = {}
+            self.requests = 0
+            self.throttled = 0
+            self.unmatched = []
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def stats(self):
+        with self.lock:
+            return dict(requests=self.requests, throttled=self.throttled, unmatched=list(self.unmatched))
+
+    def respond(self, method, host, path, query, headers, body):
+        '''
+        :return: status, headers and body of the answer
+        '''
+        kind = host_kind(host)
+        with self.lock:
+            self.requests += 1
+            count = self.requests
+            if self.throttle_every and kind == 'management' and count % self.throttle_every == 0:
+                self.throttled += 1
+                return 429, {'Retry-After': str(self.retry_after)}, error_body('TooManyRequests', 'throttled by the perf server')
+            if kind == 'login':
+                return 200, {}, dict(token_type='Bearer', expires_in='3600', ext_expires_in='3600',
+                                     expires_on=str(int(time.time()) + 3600), not_before=str(int(time.time())),
+                                     resource=dict(parse_qsl(body or '')).get('resource', 'https://management.azure.com/'),
+                                     access_token='perf-token')
+            if kind == 'vault' and not headers.get('Authorization'):
+                challenge = 'Bearer authorization="https://login.microsoftonline.com/{0}", resource="https://vault.azure.net"'.format(TENANT_ID)
+                return 401, {'WWW-Authenticate': challenge}, ''
+            if path.startswith(OPERATIONS_PATH):
+                return self.operation_status(path[len(OPERATIONS_PATH):])
+            for interaction in self.interactions:
+                if interaction.matches(method, kind, path, query):
+                    return self.replay(interaction, host, path, query)
+            self.unmatched.append('{0} {1} {2}'.format(method, kind, path))
+        return 404, {}, error_body('ResourceNotFound', 'no recorded response for {0} {1}'.format(method, path))
+
+    def replay(self, interaction, host, path, query):
+        response = interaction.next_response()
+        status = response.get('status', 200)
+        headers = dict(response.get('headers', {}))
+        body = copy.deepcopy(response.get('body', ''))
+        if 'generate' in response:
+            body = self.generate(response['generate'], host, path, query)
+        if interaction.lro and interaction.served == 1:
+            operation_id = str(next(self.operation_ids))
+            self.operations[operation_id] = interaction.lro
+            headers['Azure-AsyncOperation'] = 'https://{0}{1}{2}'.format(host, OPERATIONS_PATH, operation_id)
+            headers['Retry-After'] = str(self.retry_after)
+            status = response.get('status', 201 if interaction.method == 'PUT' else 202)
+        return status, headers, body
+
+    def generate(self, spec, host, path, query):
+        count = spec['count']
+        page_size = spec.get('page_size') or count or 1
+        token = query.get('$skiptoken') or query.get('skiptoken') or '0'
+        if '://' in token:
+            # azure_rm_resource_info sends the whole nextLink back as skiptoken
+            token = dict(parse_qsl(urlsplit(token).query)).get('$skiptoken', '0')
+        start = int(token)
+        body = dict(value=[expand(spec['template'], i) for i in range(start, min(start + page_size, count))])
+        if start + page_size < count:
+            query = dict((k, v) for k, v in query.items() if k not in ('skiptoken', '$skiptoken'))
+            query['$skiptoken'] = str(start + page_size)
+            body['nextLink'] = urlunsplit(('https', host, path, urlencode(sorted(query.items())), ''))
+        return body
+
+    def operation_status(self, operation_id):
+        remaining = self.operations.get(operation_id)
+        if remaining is None:
+            return 404, {}, error_body('NotFound', 'unknown operation {0}'.format(operation_id))
+        if remaining > 0:
+            self.operations[operation_id] = remaining - 1
+            return 200, {'Retry-After': str(self.retry_after)}, dict(status='InProgress')
+        return 200, {}, dict(status='Succeeded')
+
+
+def error_body(code, message):
+    return dict(error=dict(code=code, message=message))
+
+
+class FakeARMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, avoid delayed ACKs on kept alive connections
+    disable_nagle_algorithm = True
+
+    def handle_any(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        parts = urlsplit(self.path)
+        query = dict((k.lower(), v) for k, v in parse_qsl(parts.query, keep_blank_values=True))
+        host = self.headers.get(HOST_HEADER) or self.headers.get('Host')
+        status, headers, payload = self.server.respond(self.command, host, parts.path, query, self.headers, body)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not isinstance(payload, str):
+            payload = json.dumps(payload)
+            headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        data = payload.encode('utf-8')
+        # HEAD answers may carry the length of the blob they describe
+        length = headers.pop('Content-Length', len(data)) if self.command == 'HEAD' else len(data)
+        headers.pop('Content-Length', None)
+        self.send_response(status)
+        headers.setdefault('x-ms-request-id', 'perf')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = do_HEAD = handle_any
+
+    def log_message(self, format, *args):
+        pass
+
+
+def redirect_requests(server_url):
+    '''
+    Send every request made with the requests library to the perf server, over plain HTTP.
+    '''
+    from requests.adapters import HTTPAdapter
+    target = urlsplit(server_url)
+    send = HTTPAdapter.send
+
+    def redirected_send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.netloc == target.netloc:
+            return send(self, request, **kwargs)
+        redirected = request.copy()
+        redirected.headers[HOST_HEADER] = parts.netloc
+        redirected.url = urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+        response = send(self, redirected, **kwargs)
+        # callers, e.g. LRO pollers, build further URLs from the response
+        response.request = request
+        response.url = request.url
+        return response
+
+    HTTPAdapter.send = redirected_send
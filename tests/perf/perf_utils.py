@@ -0,0 +1,65 @@
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Helpers shared by the benchmarks in this directory.
+
+The benchmarks run outside of Ansible, so the role's module_utils are loaded from the
+source tree and registered under ansible.module_utils, the same way Ansible ships them.
+"""
+
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MODULE_UTILS = os.path.join(ROOT, 'module_utils')
+
+
+def load_module_utils(name, path=None):
+    '''
+    Load module_utils/<name>.py, or path, as ansible.module_utils.<name>.
+    Dotted names, e.g. common.dict_transformations, are loaded from the sub-directories.
+    '''
+    import importlib
+    full_name = 'ansible.module_utils.' + name
+    path = path or os.path.join(MODULE_UTILS, *name.split('.')) + '.py'
+    parent_name, attribute = full_name.rsplit('.', 1)
+    parent = importlib.import_module(parent_name)
+    # further module_utils imported by this one come from the role as well
+    import ansible.module_utils
+    if MODULE_UTILS not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(full_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[full_name] = module
+        spec.loader.exec_module(module)
+    except ImportError:
+        import imp
+        module = imp.load_source(full_name, path)
+        sys.modules[full_name] = module
+    setattr(parent, attribute, module)
+    return module
+
+
+def load_bodies(paths):
+    '''
+    Load recorded JSON bodies, e.g. saved responses of GET requests.
+    '''
+    bodies = []
+    for path in paths:
+        with open(path) as f:
+            bodies.append((os.path.basename(path), json.load(f)))
+    return bodies
+
+
+def bench(label, func, number):
+    '''
+    Print the best time per call out of three runs of func.
+    '''
+    best = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print('{0:<48} {1:>12.1f} us'.format(label, best * 1e6))
+    return best
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Run modules against the local ARM stand-in of fake_arm.py and compare them with a baseline.
+
+Each scenario in tests/perf/scenarios names a module, its arguments and the recorded
+interactions to replay. Every run happens in a fresh Python process, the same way Ansible
+runs a module, but in-process there: the module's main() is called directly with the role's
+module_utils, so imports, authentication, client construction and exec_module are all measured.
+Scenarios may also list 'files' to create, by name and size in bytes, in a temporary directory
+which replaces {files} in the arguments.
+
+    python tests/perf/run_modules.py [--repeat 3] [--latency 0.05] [--throttle-every 10] [scenario ...]
+
+For each scenario the best wall time, the number of requests and the peak RSS are reported.
+The number of requests does not depend on the machine and is compared with tests/perf/baseline.json:
+more requests than the baseline is a regression and makes the run fail. --update-baseline records
+the numbers instead.
+
+Wall time and peak RSS are only compared with --compare-timing, against a baseline recorded on
+the same machine, as they vary between machines:
+
+    python tests/perf/run_modules.py --baseline /tmp/perf.json --compare-timing --update-baseline
+    python tests/perf/run_modules.py --baseline /tmp/perf.json --compare-timing
+
+A wall time or peak RSS above that baseline by more than --tolerance is then a regression too. Requests without a recorded response are
+listed, which helps when recording a new scenario. With AZURE_RM_PROFILE=1 set, the phases
+reported by the modules are listed as well.
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PERF = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(PERF))
+SCENARIOS = os.path.join(PERF, 'scenarios')
+BASELINE = os.path.join(PERF, 'baseline.json')
+METRICS = ('wall_time', 'requests', 'peak_rss_mb')
+# vary between machines, only compared with --compare-timing
+TIMING_METRICS = ('wall_time', 'peak_rss_mb')
+
+
+def load_scenario(path):
+    with open(path) as f:
+        scenario = json.load(f)
+    scenario.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def worker(scenario_path, server_url):
+    '''
+    Run the module of a scenario in this process and print the measurements as JSON.
+    '''
+    start = time.time()
+    sys.path.insert(0, PERF)
+    from fake_arm import SUBSCRIPTION_ID, TENANT_ID, redirect_requests
+    from perf_utils import load_module_utils
+    redirect_requests(server_url)
+    os.environ.update(AZURE_SUBSCRIPTION_ID=SUBSCRIPTION_ID, AZURE_TENANT=TENANT_ID,
+                      AZURE_CLIENT_ID='perf', AZURE_SECRET='perf')
+    for key in ('AZURE_PROFILE', 'AZURE_AD_USER', 'AZURE_PASSWORD', 'AZURE_CLOUD_ENVIRONMENT'):
+        os.environ.pop(key, None)
+
+    scenario = load_scenario(scenario_path)
+    files = tempfile.mkdtemp(prefix='perf-')
+    for name, size in scenario.get('files', {}).items():
+        with open(os.path.join(files, name), 'wb') as f:
+            f.write(b'\0' * size)
+    args = json.loads(json.dumps(scenario.get('args', {})).replace('{files}', files))
+    from ansible.module_utils import basic
+    from ansible.module_utils._text import to_bytes
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps(dict(ANSIBLE_MODULE_ARGS=args)))
+    load_module_utils('common.dict_transformations')
+    for name in ('azure_rm_common', 'azure_rm_common_ext', 'azure_rm_common_rest'):
+        load_module_utils(name)
+
+    stdout = sys.stdout
+    output = sys.stdout = ModuleOutput()
+    try:
+        runpy.run_path(os.path.join(ROOT, 'library', scenario['module'] + '.py'), run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        sys.stdout = stdout
+        shutil.rmtree(files, ignore_errors=True)
+    result = output.result()
+    print(json.dumps(dict(wall_time=time.time() - start, peak_rss_mb=peak_rss_mb(),
+                          failed=bool(result.get('failed')), msg=result.get('msg'), profile=result.get('azure_rm_profile'))))
+
+
+class ModuleOutput(object):
+    '''
+    Collect what the module prints, i.e. its JSON result.
+    '''
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(data)
+
+    def flush(self):
+        pass
+
+    def result(self):
+        text = ''.join(self.parts).strip()
+        try:
+            return json.loads(text[text.index('{'):])
+        except ValueError:
+            return dict(failed=True, msg='module printed no result: {0}'.format(text[-500:]))
+
+
+def run_scenario(server, path, repeat):
+    scenario = load_scenario(path)
+    samples = []
+    for i in range(repeat):
+        server.load(scenario['interactions'])
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', path, '--server', server.url],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, errors = process.communicate()
+        if process.returncode:
+            raise SystemExit('{0} did not run:\n{1}'.format(scenario['name'], errors.decode('utf-8')))
+        sample = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        sample.update(server.stats())
+        samples.append(sample)
+    best = min(samples, key=lambda s: s['wall_time'])
+    return scenario['name'], dict(wall_time=round(best['wall_time'], 3),
+                                  requests=max(s['requests'] for s in samples),
+                                  peak_rss_mb=round(max(s['peak_rss_mb'] for s in samples), 1),
+                                  throttled=best['throttled'],
+                                  failed=best['failed'], msg=best['msg'], unmatched=best['unmatched'], profile=best['profile'])
+
+
+def compare(name, numbers, baseline, tolerance, compare_timing=False):
+    '''
+    :return: list of regressions of numbers against baseline
+    '''
+    regressions = []
+    if not baseline:
+        return regressions
+    if numbers['requests'] > baseline['requests']:
+        regressions.append('{0}: {1} requests instead of {2}'.format(name, numbers['requests'], baseline['requests']))
+    for metric in TIMING_METRICS if compare_timing else ():
+        if metric in baseline and numbers[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append('{0}: {1} {2} is more than {3:.0%} above {4}'.format(name, metric, numbers[metric],
+                                                                                 tolerance, baseline[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', help='scenario files, all of tests/perf/scenarios by default')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario, the fastest one is reported')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--throttle-every', type=int, default=0, help='answer every n-th management request with 429')
+    parser.add_argument('--retry-after', type=int, default=0, help='Retry-After of throttled requests and LRO polls')
+    parser.add_argument('--lro-polls', type=int, default=1, help='InProgress answers of long running operations')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline to compare with, default %(default)s')
+    parser.add_argument('--compare-timing', action='store_true',
+                        help='also compare, or record, wall time and peak RSS, use a baseline recorded on the same machine')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase of wall time and peak RSS')
+    parser.add_argument('--update-baseline', action='store_true', help='write the numbers to the baseline instead')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.server)
+
+    from fake_arm import FakeARMServer
+    paths = args.scenarios or sorted(glob.glob(os.path.join(SCENARIOS, '*.json')))
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    server = FakeARMServer(latency=args.latency, throttle_every=args.throttle_every,
+                           retry_after=args.retry_after, lro_polls=args.lro_polls).start()
+    metrics = METRICS if args.compare_timing else ('requests',)
+    results = {}
+    regressions = []
+    failures = []
+    print('{0:<32} {1:>10} {2:>9} {3:>9}   {4}'.format('scenario', 'wall (s)', 'requests', 'rss (MB)', 'baseline'))
+    try:
+        for path in paths:
+            name, numbers = run_scenario(server, path, args.repeat)
+            results[name] = dict((metric, numbers[metric]) for metric in metrics)
+            expected = baseline.get(name)
+            print('{0:<32} {1:>10.3f} {2:>9} {3:>9.1f}   {4}'.format(
+                name, numbers['wall_time'], numbers['requests'], numbers['peak_rss_mb'],
+                ' / '.join(str(expected.get(metric, '-')) for metric in METRICS) if expected else 'none'))
+            if numbers['failed']:
+                failures.append('{0}: module failed - {1}'.format(name, numbers['msg']))
+                results.pop(name)
+            if numbers['profile']:
+                phases = sorted(numbers['profile']['phases'].items(), key=lambda item: -item[1])
+                print('    ' + ', '.join('{0} {1:.3f}'.format(phase, seconds) for phase, seconds in phases))
+            for request in numbers['unmatched']:
+                print('    no recorded response for {0}'.format(request))
+            regressions.extend(compare(name, numbers, expected, args.tolerance, args.compare_timing))
+    finally:
+        server.stop()
+
+    if args.update_baseline:
+        # failed runs are not recorded
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        regressions = []
+    if failures or regressions:
+        print('\n'.join(['', 'Regressions:'] + failures + regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()